@@ -0,0 +1,72 @@
+"""Compares alliance totals from Member objects with AllianceAggregates on Alliance_Members payloads
+
+"members" decodes the body, builds every Member and sums their attributes, as get_alliance_members would be used.
+"aggregates" streams the body into a new AllianceAggregates, and "repoll" updates one from the previous poll, where
+a tenth of the members changed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_aggregates --sizes 100 500 2000
+"""
+import argparse
+import json
+import time
+import numpy as np
+from benchmarks.data import make_members
+from pwapi.aggregates import AllianceAggregates
+from pwapi.models import Member, Stockpile
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def member_totals(body: bytes) -> dict:
+    members = [Member(row) for row in json.loads(body)["nations"]]
+    totals = {name: sum(getattr(member, name) for member in members) for name in Stockpile.__slots__}
+    totals["militarization"] = sum(member.militarization()["total"] for member in members) / len(members)
+    totals["vacation_mode"] = sum(member.vacation_mode for member in members)
+    totals["score"] = np.percentile([member.score for member in members], [10, 50, 90])
+    return totals
+
+
+def chunks(body: bytes, size: int = 64 * 1024):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'members':>8} {'members':>10} {'aggregates':>11} {'repoll':>10}")
+    for size in args.sizes:
+        payload = make_members(size)
+        body = json.dumps(payload).encode()
+        changed = make_members(size, seed=1)["nations"]
+        repolled = dict(payload, nations=[changed[i] if i % 10 == 0 else row
+                                          for i, row in enumerate(payload["nations"])])
+        repolled_body = json.dumps(repolled).encode()
+        previous = AllianceAggregates()
+        previous.consume(chunks(body))
+
+        def repoll():
+            aggregates = AllianceAggregates()
+            aggregates.merge(previous)
+            start = time.perf_counter()
+            aggregates.consume(chunks(repolled_body))
+            return time.perf_counter() - start
+
+        members = best_of(lambda: member_totals(body), args.repeat)
+        aggregates = best_of(lambda: AllianceAggregates().consume(chunks(body)), args.repeat)
+        repolls = min(repoll() for _ in range(args.repeat))
+        print(f"{size:>8} {members * 1000:>8.2f}ms {aggregates * 1000:>9.2f}ms {repolls * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
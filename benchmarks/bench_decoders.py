@@ -0,0 +1,63 @@
+"""Compares the JSON decoder backends on Nations payloads of several sizes, valid and malformed
+
+"old path" is what call_api did before decoding bytes: r.json() on the text, falling back to fix_json and another
+json.loads for malformed bodies.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_decoders --sizes 1000 5000 15000
+"""
+import argparse
+import json
+import time
+from benchmarks.data import make_nations, malformations
+from pwapi.decoders import available, get_decoder
+from pwapi.requests import fix_json, repair_json
+
+
+def best_of(fn, body, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def old_path(body: bytes):
+    text = body.decode("utf-8")
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(fix_json(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 15000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    decoders = [get_decoder(name) for name in available()]
+    print(f"{'nations':>8} {'MB':>6} {'payload':<18} {'old path':>10} " +
+          " ".join(f"{decoder.name:>10}" for decoder in decoders))
+    for size in args.sizes:
+        text = json.dumps(make_nations(size))
+        for name, body in [("valid", text)] + list(malformations(text)):
+            body = body.encode()
+            expected = old_path(body)
+            times = [best_of(old_path, body, args.repeat)]
+            for decoder in decoders:
+                def decode(data, loads=decoder.loads):
+                    try:
+                        return loads(data)
+                    except ValueError:
+                        return repair_json(data, loads)
+                assert decode(body) == expected
+                times.append(best_of(decode, body, args.repeat))
+            print(f"{size:>8} {len(body) / 1e6:>6.2f} {name:<18} " +
+                  " ".join(f"{t * 1000:>8.1f}ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
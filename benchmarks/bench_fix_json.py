@@ -0,0 +1,42 @@
+"""Compares repair_json with the fix_json retry loop on large malformed Nations payloads
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fix_json --sizes 1000 5000 15000
+"""
+import argparse
+import json
+import time
+from benchmarks.data import make_nations, malformations
+from pwapi.requests import fix_json, repair_json
+
+
+def best_of(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 15000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nations':>8} {'MB':>6} {'malformation':<18} {'fix_json':>10} {'repair_json':>12} {'speedup':>8}")
+    for size in args.sizes:
+        text = json.dumps(make_nations(size))
+        for name, bad in malformations(text):
+            # call_api decoded the output of fix_json once more, so that parse is part of its cost
+            assert repair_json(bad) == json.loads(fix_json(bad))
+            old = best_of(lambda t: json.loads(fix_json(t)), bad, args.repeat)
+            new = best_of(repair_json, bad, args.repeat)
+            print(f"{size:>8} {len(bad) / 1e6:>6.2f} {name:<18} {old * 1000:>8.1f}ms {new * 1000:>10.1f}ms "
+                  f"{old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compares construction of the eager and lazy nation models
+
+Times building the models alone, and building them then reading the attributes most jobs use (score, cities and
+military).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_lazy_models --count 10000
+"""
+import argparse
+import time
+from pwapi.lazy import LazyCompleteMember, LazyMember, LazyNation
+from pwapi.models import CompleteMember, Member, Nation
+from tests.stubs import nation_stub, members_stub
+
+
+def read_common(model):
+    return (model.score, model.city_count, model.soldiers, model.tanks, model.aircraft, model.ships,
+            model.militarization())
+
+
+def timed(fn, payloads):
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(*payload)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    nations = [(dict(nation_stub, nationid=str(i)),) for i in range(args.count)]
+    members = [(dict(members_stub["nations"][i % 2], nationid=i),) for i in range(args.count)]
+    complete = [(members[i][0], nations[i][0]) for i in range(args.count)]
+    cases = [("Nation", Nation, LazyNation, nations),
+             ("Member", Member, LazyMember, members),
+             ("CompleteMember", CompleteMember, LazyCompleteMember, complete)]
+
+    print(f"{args.count} objects, us per object")
+    print(f"{'model':<16} {'eager':>8} {'lazy':>8} {'eager+read':>11} {'lazy+read':>10}")
+    for name, eager, lazy, payloads in cases:
+        results = [timed(eager, payloads), timed(lazy, payloads),
+                   timed(lambda *data: read_common(eager(*data)), payloads),
+                   timed(lambda *data: read_common(lazy(*data)), payloads)]
+        print(f"{name:<16} " + " ".join(f"{t / args.count * 1e6:>{w}.2f}" for t, w in zip(results, (8, 8, 11, 10))))
+
+
+if __name__ == "__main__":
+    main()
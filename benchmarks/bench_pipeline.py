@@ -0,0 +1,65 @@
+"""Compares a multi-alliance sweep on threads alone with the thread + process Pipeline
+
+Both fetch from a local stand-in server with the same number of requests in flight. The threaded sweep decodes and
+builds the Member objects in the fetching threads, the pipeline in worker processes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --alliances 50 --members 1000
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.server import StandInServer
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.pipeline import Pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alliances", type=int, default=50)
+    parser.add_argument("--members", type=int, default=1000, help="members per alliance")
+    parser.add_argument("--io-workers", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    alliance_ids = list(range(1, args.alliances + 1))
+    with StandInServer(nations=args.alliances * args.members, alliances=args.alliances) as server:
+        # call_endpoint builds its URLs from api.pw_api, which is put back afterwards
+        pw_api = api.pw_api
+        api.pw_api = server.api_url
+        try:
+            client = APIClient(pool_size=args.io_workers)
+            # warm the server's response cache, so both runs only measure the client
+            with ThreadPoolExecutor(args.io_workers) as pool:
+                list(pool.map(lambda alliance_id: client.get(f"{server.api_url}/alliance-members/?allianceid="
+                                                             f"{alliance_id}&key=key"), alliance_ids))
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.io_workers) as pool:
+                threaded = list(pool.map(lambda alliance_id: api.get_alliance_members(alliance_id, "key", client),
+                                         alliance_ids))
+            threaded_time = time.perf_counter() - start
+
+            with Pipeline(client, args.io_workers, args.processes) as pipeline:
+                # start the worker processes before timing
+                list(pipeline.alliances(alliance_ids[:1], "key"))
+                start = time.perf_counter()
+                packed = [result for _, result in pipeline.alliances(alliance_ids, "key")]
+                packed_time = time.perf_counter() - start
+                members = [list(result) for result in packed]
+                unpacked_time = time.perf_counter() - start
+        finally:
+            api.pw_api = pw_api
+
+    assert [len(result) for result in threaded] == [len(result) for result in members]
+    total = sum(len(result) for result in threaded)
+    print(f"{args.alliances} alliances, {total} members")
+    print(f"threads only            {threaded_time:>7.2f}s")
+    print(f"pipeline, packed        {packed_time:>7.2f}s  {threaded_time / packed_time:.1f}x")
+    print(f"pipeline, unpacked      {unpacked_time:>7.2f}s  {threaded_time / unpacked_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
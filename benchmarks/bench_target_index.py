@@ -0,0 +1,68 @@
+"""Compares TargetIndex range queries with a linear scan over NationStub objects
+
+Run from the repository root:
+
+    python -m benchmarks.bench_target_index --nations 15000 --queries 1000
+"""
+import argparse
+import random
+import time
+from benchmarks.data import make_nations
+from pwapi import formulas
+from pwapi.models import NationStub
+from pwapi.targets import TargetIndex
+
+
+def linear_offensive(nations, score, open_slots):
+    ranges = formulas.war_range(score)["offensive"]
+    return [nation for nation in nations
+            if ranges["min"] <= nation.score <= ranges["max"]
+            and not nation.vacation_mode
+            and (not open_slots or nation.defensive_war_count < 3)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nations", type=int, default=15000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    data = make_nations(args.nations)
+    nations = [NationStub(row) for row in data["nations"]]
+    start = time.perf_counter()
+    index = TargetIndex(nations)
+    build = time.perf_counter() - start
+
+    rng = random.Random(1)
+    scores = [rng.choice(nations).score for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    linear = [linear_offensive(nations, score, True) for score in scores]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.offensive(score, vacation_mode=False, open_slots=True) for score in scores]
+    index_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for score in scores:
+        index.offensive(score, vacation_mode=False, open_slots=True, ids=True)
+    ids_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for nation in rng.sample(nations, 100):
+        index.update_score(nation.nation_id, nation.score * rng.uniform(0.9, 1.1))
+    update_time = time.perf_counter() - start
+
+    assert [sorted(n.nation_id for n in r) for r in linear] == [sorted(n.nation_id for n in r) for r in indexed]
+    print(f"{args.nations} nations, {args.queries} offensive range queries")
+    print(f"index build:  {build * 1000:9.2f} ms")
+    print(f"matches:      {sum(map(len, indexed)) / args.queries:9.0f} nations/query")
+    print(f"linear scan:  {linear_time / args.queries * 1e6:9.1f} us/query")
+    print(f"target index: {index_time / args.queries * 1e6:9.1f} us/query ({linear_time / index_time:.1f}x)")
+    print(f"index, ids:   {ids_time / args.queries * 1e6:9.1f} us/query ({linear_time / ids_time:.1f}x)")
+    print(f"score update: {update_time / 100 * 1e6:9.1f} us/update")
+
+
+if __name__ == "__main__":
+    main()
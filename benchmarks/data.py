@@ -0,0 +1,111 @@
+"""Synthetic API payloads for benchmarks, scaled up from the stubs in tests/stubs.py"""
+import random
+from tests.stubs import members_stub, nation_stub, nations_stub
+
+resources = ["money", "food", "coal", "oil", "uranium", "bauxite", "iron", "lead", "gasoline", "munitions", "aluminum",
+             "steel", "credits"]
+projects = ["bauxiteworks", "ironworks", "armsstockpile", "emgasreserve", "massirrigation", "inttradecenter",
+            "nuclearresfac", "irondome", "vitaldefsys", "intagncy", "uraniumenrich", "propbureau", "cenciveng"]
+garbage = "<br /><b>Warning</b>: SERVERERROR"
+
+colors = ["aqua", "beige", "black", "blue", "brown", "gray", "green", "lime", "maroon", "olive", "orange", "pink",
+          "purple", "red", "white", "yellow"]
+
+
+def make_nations(count: int = 15000, alliances: int = 500, seed: int = 0) -> dict:
+    """Builds a Nations API payload with `count` nations spread over `alliances` alliances"""
+    rng = random.Random(seed)
+    template = nations_stub["nations"][0]
+    nations = []
+    for nation_id in range(1, count + 1):
+        cities = rng.randint(1, 40)
+        alliance_id = rng.randint(0, alliances)
+        nations.append(dict(template,
+                            nationid=nation_id,
+                            nation=f"Nation {nation_id}",
+                            leader=f"Leader {nation_id}",
+                            color=rng.choice(colors),
+                            alliance=f"Alliance {alliance_id}" if alliance_id else "None",
+                            allianceid=alliance_id,
+                            allianceposition=rng.randint(0, 5) if alliance_id else 0,
+                            cities=cities,
+                            infrastructure=round(cities * rng.uniform(100, 2500), 2),
+                            offensivewars=rng.choice([0, 0, 0, 1, 2, 5]),
+                            defensivewars=rng.choice([0, 0, 0, 1, 3]),
+                            score=round(cities * rng.uniform(20, 150), 2),
+                            rank=nation_id,
+                            vacmode=rng.choice([0] * 9 + [rng.randint(1, 200)]),
+                            minutessinceactive=int(rng.expovariate(1 / 2000))))
+    return {"success": True, "nations": nations}
+
+
+def _military(rng, cities: int) -> dict:
+    """Unit counts, as the strings the Nation and Alliance_Members APIs return"""
+    return {"soldiers": str(rng.randint(0, 15000 * cities)),
+            "tanks": str(rng.randint(0, 1250 * cities)),
+            "aircraft": str(rng.randint(0, 90 * cities)),
+            "ships": str(rng.randint(0, 15 * cities)),
+            "missiles": str(rng.randint(0, 10)),
+            "nukes": str(rng.randint(0, 5))}
+
+
+def make_members(count: int = 500, alliance_id: int = 615, seed: int = 0) -> dict:
+    """Builds an Alliance_Members API payload for an alliance of `count` members"""
+    rng = random.Random(seed)
+    template = members_stub["nations"][0]
+    nations = []
+    for i in range(count):
+        nation_id = 1000 + i
+        cities = rng.randint(1, 40)
+        nations.append(dict(template,
+                            nationid=nation_id,
+                            nation=f"Nation {nation_id}",
+                            leader=f"Leader {nation_id}",
+                            color=rng.choice(colors),
+                            allianceid=alliance_id,
+                            allianceposition=rng.randint(1, 5),
+                            cities=cities,
+                            offensivewars=rng.choice([0, 0, 0, 1, 2, 5]),
+                            defensivewars=rng.choice([0, 0, 0, 1, 3]),
+                            score=f"{cities * rng.uniform(20, 150):.2f}",
+                            vacmode=str(rng.choice([0] * 9 + [rng.randint(1, 200)])),
+                            minutessinceactive=int(rng.expovariate(1 / 2000)),
+                            infrastructure=f"{cities * rng.uniform(100, 2500):.2f}",
+                            cityprojecttimerturns=rng.randint(0, 120),
+                            spies=str(rng.randint(0, 60)),
+                            **{project: rng.choice("01") for project in projects},
+                            **{resource: f"{rng.uniform(0, 1e6):.2f}" for resource in resources},
+                            **_military(rng, cities)))
+    return {"success": True, "nations": nations}
+
+
+def make_nation_details(count: int = 500, alliance_id: int = 615, seed: int = 0) -> list:
+    """Builds `count` Nation API payloads, with the same nation IDs as make_members"""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        nation_id = 1000 + i
+        cities = rng.randint(1, 40)
+        city_ids = [str(nation_id * 100 + city) for city in range(cities)]
+        payloads.append(dict(nation_stub,
+                             nationid=str(nation_id),
+                             name=f"Nation {nation_id}",
+                             leadername=f"Leader {nation_id}",
+                             color=rng.choice(colors),
+                             allianceid=str(alliance_id),
+                             cities=cities,
+                             cityids=city_ids,
+                             score=f"{cities * rng.uniform(20, 150):.2f}",
+                             totalinfrastructure=round(cities * rng.uniform(100, 2500), 2),
+                             offensivewar_ids=[rng.randint(1, 10 ** 6) for _ in range(rng.choice([0, 0, 1, 2]))],
+                             defensivewar_ids=[rng.randint(1, 10 ** 6) for _ in range(rng.choice([0, 0, 1]))],
+                             **{project: rng.choice("01") for project in projects},
+                             **_military(rng, cities)))
+    return payloads
+
+
+def malformations(text: str):
+    """Yields (name, malformed text) pairs built from valid JSON, covering the errors fix_json repairs"""
+    yield "trailing garbage", text + garbage
+    yield "one double comma", text.replace('"rank": 1,', '"rank": 1,,', 1) + garbage
+    yield "all double commas", text.replace(', "', ',, "') + garbage
@@ -0,0 +1,129 @@
+"""Load test of call_api or get_nation against the stand-in server, reporting throughput and tail latency
+
+Starts a StandInServer in process unless --url points at one already running. For each concurrency level, the
+requests are spread over that many threads sharing one APIClient.
+
+Run from the repository root:
+
+    python -m benchmarks.loadtest --concurrency 1 8 32 --requests 2000 --latency 0.02 --jitter 0.01 --malformed 0.05
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.server import StandInServer
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.metrics import Metrics
+from pwapi.requests import call_api
+from pwapi.resilience import Resilience
+
+
+def run(api_url: str, mode: str, concurrency: int, requests: int, nations: int, keys: list,
+        resilience: bool = False) -> dict:
+    """Sends `requests` calls with `concurrency` threads
+
+    :param resilience: send the calls through a Resilience with its default deadline, retries and hedging
+
+    return: dictionary of throughput, latency percentiles in milliseconds, error counts and the client's metrics"""
+    rng = random.Random(concurrency)
+    targets = [(rng.randint(1, nations), keys[i % len(keys)]) for i in range(requests)]
+    metrics = Metrics()
+    policy = Resilience(workers=2 * concurrency) if resilience else None
+    client = APIClient(pool_size=2 * concurrency if resilience else concurrency, retries=0, hooks=[metrics],
+                       resilience=policy)
+
+    def call(target):
+        nation_id, key = target
+        start = time.perf_counter()
+        try:
+            if mode == "get_nation":
+                api.get_nation(nation_id, key, client)
+            else:
+                call_api(f"{api_url}/nation/id={nation_id}&key={key}", client)
+            error = None
+        except Exception as e:
+            error = type(e).__name__
+        return time.perf_counter() - start, error
+
+    # call_endpoint builds its URLs from api.pw_api, which is put back afterwards
+    pw_api = api.pw_api
+    api.pw_api = api_url
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, targets))
+        elapsed = time.perf_counter() - start
+    finally:
+        api.pw_api = pw_api
+        client.close()
+        if policy is not None:
+            policy.close()
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = {}
+    for _, error in results:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    p50, p90, p99 = np.percentile(latencies, (50, 90, 99))
+    return {"concurrency": concurrency,
+            "requests": requests,
+            "seconds": elapsed,
+            "throughput": requests / elapsed,
+            "p50_ms": p50,
+            "p90_ms": p90,
+            "p99_ms": p99,
+            "max_ms": latencies.max(),
+            "errors": errors,
+            "metrics": metrics.report()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running stand-in server, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=("call_api", "get_nation"), default="get_nation")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per concurrency level")
+    parser.add_argument("--keys", type=int, default=4, help="number of API keys to spread the calls over")
+    parser.add_argument("--nations", type=int, default=15000)
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean extra server latency in seconds")
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of malformed responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--daily-limit", type=int, default=10 ** 9, help="requests allowed per key")
+    parser.add_argument("--resilience", action="store_true", help="send the calls through a default Resilience")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = StandInServer(nations=args.nations, latency=args.latency, jitter=args.jitter,
+                               malformed=args.malformed, error_rate=args.error_rate,
+                               daily_limit=args.daily_limit).start()
+        url = server.url
+    keys = [f"key{i}" for i in range(args.keys)]
+
+    reports = []
+    print(f"{args.mode}, {args.requests} requests per level")
+    print(f"{'threads':>7} {'req/s':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  errors")
+    try:
+        for concurrency in args.concurrency:
+            report = run(f"{url}/api", args.mode, concurrency, args.requests, args.nations, keys,
+                         args.resilience)
+            reports.append(report)
+            print(f"{concurrency:>7} {report['throughput']:>9.1f} {report['p50_ms']:>7.1f}ms "
+                  f"{report['p90_ms']:>7.1f}ms {report['p99_ms']:>7.1f}ms {report['max_ms']:>7.1f}ms  "
+                  f"{report['errors'] or ''}")
+    finally:
+        if server is not None:
+            server.stop()
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(reports, file, indent=2, default=float)
+
+
+if __name__ == "__main__":
+    main()
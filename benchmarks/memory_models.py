@@ -0,0 +1,75 @@
+"""Reports memory used per member object, for the slotted models and the previous dict based layout
+
+Memory is measured with tracemalloc while building the objects, and includes the attribute values they own.
+
+Run from the repository root:
+
+    python -m benchmarks.memory_models --count 10000
+"""
+import argparse
+import gc
+import tracemalloc
+from pwapi.lazy import LazyMember
+from pwapi.models import CompleteMember, Member, NationStub
+from tests.stubs import members_stub, nation_stub
+
+_legacy_projects = {"bw": "bauxiteworks", "iw": "ironworks", "as": "armsstockpile", "egr": "emgasreserve",
+                    "mi": "massirrigation", "itc": "inttradecenter", "mlp": "missilepad", "nrf": "nuclearresfac",
+                    "id": "irondome", "vds": "vitaldefsys", "uep": "uraniumenrich", "ia": "intagncy",
+                    "pb": "propbureau", "cce": "cenciveng"}
+
+
+class LegacyBaseNation(NationStub):
+    """BaseNation as it was, with a dict of bools for projects"""
+
+    __slots__ = ["soldiers", "tanks", "aircraft", "ships", "missiles", "nukes", "projects"]
+
+    def __init__(self, data):
+        super().__init__(data)
+        for name in ("soldiers", "tanks", "aircraft", "ships", "missiles", "nukes"):
+            setattr(self, name, int(data[name]))
+        self.projects = {name: bool(int(data[key])) for name, key in _legacy_projects.items()}
+
+
+class LegacyMember(LegacyBaseNation):
+    """Member as it was, without slots so every instance carried a __dict__"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.city_cooldown = data["cityprojecttimerturns"]
+        for name in ("money", "food", "uranium", "coal", "oil", "bauxite", "lead", "iron", "gasoline", "munitions",
+                     "aluminum", "steel", "credits", "spies"):
+            setattr(self, name, float(data[name]))
+
+
+def bytes_per_object(build, payloads):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(*payload) for payload in payloads]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # the list holding the objects is not part of their size
+    used -= objects.__sizeof__()
+    return used / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    members = [(dict(members_stub["nations"][i % 2], nationid=i),) for i in range(args.count)]
+    complete = [(members[i][0], dict(nation_stub, nationid=str(i))) for i in range(args.count)]
+    cases = [("Member, before (dict)", LegacyMember, members),
+             ("Member, slotted", Member, members),
+             ("LazyMember, unread", LazyMember, members),
+             ("CompleteMember, slotted", CompleteMember, complete)]
+
+    print(f"{args.count} objects each")
+    for name, build, payloads in cases:
+        print(f"{name:<26} {bytes_per_object(build, payloads):>8.0f} bytes/object")
+
+
+if __name__ == "__main__":
+    main()
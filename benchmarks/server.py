@@ -0,0 +1,236 @@
+"""Local stand-in for the PW API, serving generated data for load tests
+
+Serves the nation, nations, war and alliance-members endpoints with the payload shapes of tests/stubs.py, and can
+inject latency, 5xx errors, the malformed JSON fix_json and repair_json handle, and the API error messages checked by
+validate_api_data: invalid or missing keys, exhausted daily quotas, and missing nations, wars and alliances.
+
+Run standalone from the repository root:
+
+    python -m benchmarks.server --port 8000 --latency 0.05 --malformed 0.1
+
+or start one in process:
+
+    with StandInServer(latency=0.02) as server:
+        call_api(f"{server.api_url}/nation/id=1&key=abc")
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.data import garbage, make_members, make_nations
+from tests.stubs import nation_stub, war_stub
+
+# comma separating two object members, which is where the API doubles commas
+_member_separator = re.compile(r', (?="[^"]*": )')
+
+
+class StandInServer:
+    """Threaded HTTP server imitating the PW API
+
+    Nations have IDs 1 to `nations`, in alliances 1 to `alliances`. Wars exist for IDs 1 to `wars`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, nations: int = 15000, alliances: int = 500,
+                 wars: int = 100000, latency: float = 0.0, jitter: float = 0.0, malformed: float = 0.0,
+                 error_rate: float = 0.0, keys=None, daily_limit: int = 2000, seed: int = 0):
+        """
+        :param port: port to listen on, 0 picks a free one
+        :param latency: seconds added to every response
+        :param jitter: mean of an exponentially distributed delay added on top of latency, giving a long tail
+        :param malformed: fraction of responses sent as malformed JSON, either with doubled commas or with trailing
+            garbage
+        :param error_rate: fraction of requests answered with a 503
+        :param keys: accepted API keys. None accepts any key
+        :param daily_limit: requests allowed per key before the quota message is returned. The message names the
+            2000 or 5000 call limit of the real API, whichever is closest"""
+        self.nations = nations
+        self.alliances = alliances
+        self.wars = wars
+        self.latency = latency
+        self.jitter = jitter
+        self.malformed = malformed
+        self.error_rate = error_rate
+        self.keys = set(keys) if keys is not None else None
+        self.daily_limit = daily_limit
+        self.usage = {}
+        self.requests = 0
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._nations_body = None
+        self._members_bodies = {}
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are written separately, which without TCP_NODELAY stalls on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body = server.respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """Equivalent of pwapi.api.pw_api for this server"""
+        return f"{self.url}/api"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves in the calling thread until stopped"""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, path: str) -> tuple:
+        """Builds the (status, body) answering a request path"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.expovariate(1 / self.jitter) if self.jitter else 0)
+            failed = self._rng.random() < self.error_rate
+            malformation = self._rng.choice(("doubled commas", "trailing garbage")) \
+                if self._rng.random() < self.malformed else None
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return 503, b"Service Unavailable"
+
+        data = self._check_key(path)
+        if data is None:
+            data = self._route(path)
+        if isinstance(data, dict):
+            text = json.dumps(data)
+        else:
+            # large payloads are encoded once and reused
+            text = data
+        if malformation == "doubled commas":
+            text = _member_separator.sub(",, ", text)
+        elif malformation == "trailing garbage":
+            text += garbage
+        return 200, text.encode()
+
+    def _check_key(self, path: str):
+        """Returns the API error for the request's key, or None if the key may be used"""
+        match = re.search(r"[?&]key=([^&]*)", path)
+        key = match.group(1) if match else ""
+        if not key:
+            return {"success": False, "general_message": "No API key was provided."}
+        if self.keys is not None and key not in self.keys:
+            return {"success": False, "general_message": "Invalid API key."}
+        with self._lock:
+            used = self.usage.get(key, 0)
+            if used >= self.daily_limit:
+                limit = 5000 if self.daily_limit > 3500 else 2000
+                return {"success": False,
+                        "general_message": f"Exceeded max request limit of {limit} for today."}
+            self.usage[key] = used + 1
+        return None
+
+    def _route(self, path: str):
+        match = re.match(r"/api/nation/id=(\d+)", path)
+        if match:
+            return self._nation(int(match.group(1)))
+        match = re.match(r"/api/war/(\d+)", path)
+        if match:
+            war_id = int(match.group(1))
+            if not 1 <= war_id <= self.wars:
+                return {"success": False, "general_message": "War does not exist."}
+            return {"success": True, "war": [dict(war_stub["war"][0], war_id=war_id)]}
+        match = re.match(r"/api/alliance-members/\?.*allianceid=(\d+)", path)
+        if match:
+            return self._members(int(match.group(1)))
+        if path.startswith("/api/nations"):
+            if self._nations_body is None:
+                self._nations_body = json.dumps(make_nations(self.nations, self.alliances, self._seed))
+            return self._nations_body
+        return {"success": False, "general_message": "Nation doesn't exist."}
+
+    def _nation(self, nation_id: int) -> dict:
+        if not 1 <= nation_id <= self.nations:
+            return {"success": False, "general_message": "Nation doesn't exist."}
+        rng = random.Random(nation_id)
+        cities = rng.randint(1, 40)
+        alliance_id = nation_id % self.alliances + 1
+        return dict(nation_stub,
+                    nationid=str(nation_id),
+                    name=f"Nation {nation_id}",
+                    leadername=f"Leader {nation_id}",
+                    allianceid=str(alliance_id),
+                    alliance=f"Alliance {alliance_id}",
+                    cities=cities,
+                    cityids=[str(nation_id * 100 + city) for city in range(cities)],
+                    score=f"{cities * rng.uniform(20, 150):.2f}",
+                    totalinfrastructure=round(cities * rng.uniform(100, 2500), 2),
+                    offensivewar_ids=[rng.randint(1, self.wars) for _ in range(rng.choice([0, 0, 1, 2]))],
+                    defensivewar_ids=[rng.randint(1, self.wars) for _ in range(rng.choice([0, 0, 1]))])
+
+    def _members(self, alliance_id: int):
+        if not 1 <= alliance_id <= self.alliances:
+            return {"success": False, "general_message": "Alliance doesn't exist."}
+        body = self._members_bodies.get(alliance_id)
+        if body is None:
+            # nation n is in alliance n % alliances + 1, as served by nation/id=n
+            nation_ids = range(alliance_id - 1 or self.alliances, self.nations + 1, self.alliances)
+            data = make_members(len(nation_ids), alliance_id, alliance_id)
+            for nation_id, row in zip(nation_ids, data["nations"]):
+                row["nationid"] = nation_id
+            body = self._members_bodies[alliance_id] = json.dumps(data)
+        return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--nations", type=int, default=15000)
+    parser.add_argument("--alliances", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--malformed", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--daily-limit", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, args.nations, args.alliances, latency=args.latency,
+                           jitter=args.jitter, malformed=args.malformed, error_rate=args.error_rate,
+                           daily_limit=args.daily_limit)
+    print(f"Serving the PW API at {server.api_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Times model construction, JSON repair and validation, and the formulas on synthetic payloads
+
+Each case is run several times and the best time kept. Results can be written as JSON and compared with the output of
+an earlier run, e.g. on another commit:
+
+    python -m benchmarks.suite --output before.json
+    git checkout feature-branch
+    python -m benchmarks.suite --compare before.json
+
+With --compare, the exit status is 1 if any case got slower by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmarks.data import make_members, make_nation_details, make_nations, malformations
+from pwapi import formulas
+from pwapi.models import CompleteMember, Member, Nation, NationStub
+from pwapi.requests import fix_json, repair_json, validate_api_data
+
+
+def cases(nations: int, members: int):
+    """Yields (name, function, items) for every benchmark, where items is the number of objects one call handles"""
+    nations_data = make_nations(nations)
+    members_data = make_members(members)
+    details = make_nation_details(members)
+    rows = nations_data["nations"]
+    member_rows = members_data["nations"]
+
+    yield "models.NationStub", lambda: [NationStub(row) for row in rows], len(rows)
+    yield "models.Nation", lambda: [Nation(data) for data in details], len(details)
+    yield "models.Member", lambda: [Member(row) for row in member_rows], len(member_rows)
+    yield ("models.CompleteMember", lambda: [CompleteMember(row, data) for row, data in zip(member_rows, details)],
+           len(member_rows))
+
+    text = json.dumps(nations_data)
+    for name, bad in malformations(text):
+        key = name.replace(" ", "_")
+        # call_api decoded the output of fix_json once more, so that parse is part of its cost
+        yield f"json.fix_json.{key}", lambda bad=bad: json.loads(fix_json(bad)), len(rows)
+        yield f"json.repair_json.{key}", lambda bad=bad: repair_json(bad), len(rows)
+    yield "json.validate_api_data", lambda: validate_api_data(nations_data), 1
+
+    stubs = [NationStub(row) for row in rows]
+    military = [Member(row) for row in member_rows]
+    scores = np.array([stub.score for stub in stubs])
+    columns = [np.array([getattr(member, name) for member in military], dtype=np.float64)
+               for name in ("city_count", "soldiers", "tanks", "aircraft", "ships")]
+    yield "formulas.war_range", lambda: [formulas.war_range(score) for score in scores.tolist()], len(stubs)
+    yield "formulas.war_range_batch", lambda: formulas.war_range_batch(scores), len(stubs)
+    yield "formulas.militarization", lambda: [member.militarization() for member in military], len(military)
+    yield "formulas.militarization_batch", lambda: formulas.militarization_batch(*columns), len(military)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(nations: int, members: int, repeat: int, only: str = None) -> dict:
+    results = {}
+    for name, fn, items in cases(nations, members):
+        if only and only not in name:
+            continue
+        seconds = best_of(fn, repeat)
+        results[name] = {"seconds": seconds, "items": items, "us_per_item": seconds / items * 1e6}
+    return {"commit": commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "nations": nations,
+            "members": members,
+            "repeat": repeat,
+            "results": results}
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Prints each case against the baseline
+
+    return: True if no case is slower than the baseline by more than threshold"""
+    ok = True
+    print(f"{'case':<36} {'before':>10} {'after':>10} {'ratio':>7}")
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<36} {'-':>10} {result['us_per_item']:>8.2f}us")
+            continue
+        ratio = result["us_per_item"] / before["us_per_item"]
+        flag = ""
+        if ratio > threshold:
+            flag = " slower"
+            ok = False
+        print(f"{name:<36} {before['us_per_item']:>8.2f}us {result['us_per_item']:>8.2f}us {ratio:>6.2f}x{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nations", type=int, default=15000, help="size of the Nations payload")
+    parser.add_argument("--members", type=int, default=500, help="size of the alliance")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="only run the cases whose name contains this")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio counted as a regression by --compare")
+    args = parser.parse_args()
+
+    report = run(args.nations, args.members, args.repeat, args.only)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare(report, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        print(f"{'case':<36} {'items':>6} {'total':>10} {'per item':>10}")
+        for name, result in report["results"].items():
+            print(f"{name:<36} {result['items']:>6} {result['seconds'] * 1000:>8.2f}ms "
+                  f"{result['us_per_item']:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Alliance totals computed from raw Alliance_Members rows, without building Member objects
+
+Each member's share of the totals is kept, so a poll only has to touch the members whose data changed, and a partial
+refresh of a few members is merged into the existing totals:
+
+    aggregates = alliance_aggregates(615, key)
+    aggregates.total("steel"), aggregates.mean("militarization"), aggregates.quantile("score", 0.9)
+
+Classes
+--------
+
+QuantileSketch - mergeable quantile estimates with bounded relative error, supporting removal of values
+AllianceAggregates - sums, means and score and militarization quantiles of an alliance, updated member by member
+
+Functions
+--------
+
+alliance_aggregates - streams an Alliance_Members response into an AllianceAggregates
+"""
+import math
+import operator
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.formulas import max_aircraft_per_city, max_ships_per_city, max_soldiers_per_city, max_tanks_per_city
+from pwapi.models import Stockpile
+from pwapi.stream import iter_nations, stream_nations
+
+# Summed fields, in the order of each member's contribution. militarization is the overall level given by
+# BaseNation.militarization, and vacation_mode sums to the number of members in vacation mode
+military_fields = ("soldiers", "tanks", "aircraft", "ships", "missiles", "nukes")
+fields = ("score", "cities", "infrastructure") + military_fields + tuple(Stockpile.__slots__) + \
+         ("spies", "militarization", "vacation_mode")
+_positions = {name: position for position, name in enumerate(fields)}
+# Row keys of the fields read straight from the row, all numbers or numeric strings
+_row_values = operator.itemgetter("score", "cities", "infrastructure", *military_fields, *Stockpile.__slots__, "spies")
+
+# Fields whose quantiles are estimated
+sketched_fields = ("score", "militarization")
+
+
+class QuantileSketch:
+    """Quantile estimates of a stream of values, after DDSketch
+
+    Values are counted in logarithmic buckets, so every estimate is within relative_accuracy of a value at the requested
+    rank. Sketches with the same accuracy merge exactly, and values can be removed again, which a running alliance
+    score distribution needs when members are refreshed or leave."""
+
+    __slots__ = ["relative_accuracy", "count", "_gamma", "_log_gamma", "_positive", "_negative", "_zeros"]
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive = {}
+        self._negative = {}
+        self._zeros = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Adds a value count times. A negative count removes a value added before, and raises ValueError if the sketch
+        holds fewer such values"""
+        if value > 0:
+            self._count(self._positive, math.ceil(math.log(value) / self._log_gamma), count)
+        elif value < 0:
+            self._count(self._negative, math.ceil(math.log(-value) / self._log_gamma), count)
+        else:
+            if self._zeros + count < 0:
+                raise ValueError(f"Cannot remove {value}, it was not added")
+            self._zeros += count
+        self.count += count
+
+    def remove(self, value: float) -> None:
+        self.add(value, -1)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Adds every value of another sketch with the same relative accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for index, count in other._positive.items():
+            self._count(self._positive, index, count)
+        for index, count in other._negative.items():
+            self._count(self._negative, index, count)
+        self._zeros += other._zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """:param q: quantile between 0 and 1, e.g. 0.5 for the median
+        return: estimated value at that quantile, or None if the sketch is empty"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self._negative, reverse=True):
+            seen += self._negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self._zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self._positive):
+            seen += self._positive[index]
+            if seen > rank:
+                return self._value(index)
+        # only reached through rounding of the rank, which lands on the largest value
+        return self._value(max(self._positive)) if self._positive else None
+
+    def _value(self, index):
+        # bucket index holds values in (gamma ** (index - 1), gamma ** index]
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    @staticmethod
+    def _count(buckets, index, count):
+        total = buckets.get(index, 0) + count
+        if total < 0:
+            raise ValueError("Cannot remove a value that was not added")
+        if total:
+            buckets[index] = total
+        else:
+            del buckets[index]
+
+
+def contribution(row: dict) -> tuple:
+    """A member's values of each of fields, from its raw Alliance_Members row"""
+    values = tuple(map(float, _row_values(row)))
+    _, cities, _, soldiers, tanks, aircraft, ships = values[:7]
+    militarization = (soldiers / max_soldiers_per_city + tanks / max_tanks_per_city +
+                      aircraft / max_aircraft_per_city + ships / max_ships_per_city) / (4 * cities)
+    vacation = row["vacmode"] if "vacmode" in row else row["vmode"]
+    return values + (militarization, 1.0 if int(vacation) else 0.0)
+
+
+class AllianceAggregates:
+    """Running totals of an alliance's members, updated from raw Alliance_Members rows
+
+    Keeps one tuple of values per member, so updating a member only replaces its share of the sums and sketches,
+    and members whose values did not change since the last poll cost a tuple comparison. Totals from several alliances
+    can be merged for coalition-wide figures."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """:param relative_accuracy: relative error of the quantile estimates"""
+        self._members = {}
+        self._sums = [0.0] * len(fields)
+        self._sketches = {name: QuantileSketch(relative_accuracy) for name in sketched_fields}
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, nation_id):
+        return nation_id in self._members
+
+    def update(self, rows, complete: bool = False) -> None:
+        """Adds or refreshes members in a single pass over their rows
+
+        :param rows: iterable of raw Alliance_Members rows, e.g. from iter_nations(chunks, None)
+        :param complete: whether the rows are the whole alliance, in which case members missing from them are removed.
+            Otherwise only the given members are refreshed"""
+        seen = set()
+        for row in rows:
+            nation_id = int(row["nationid"])
+            seen.add(nation_id)
+            self._put(nation_id, contribution(row))
+        if complete:
+            for nation_id in self._members.keys() - seen:
+                self.remove(nation_id)
+
+    def consume(self, chunks) -> None:
+        """Updates from a complete Alliance_Members response body, decoded incrementally as the chunks arrive"""
+        self.update(iter_nations(chunks, None), complete=True)
+
+    def remove(self, nation_id: int) -> None:
+        """Removes a member that left the alliance. Unknown nation IDs are ignored"""
+        values = self._members.pop(nation_id, None)
+        if values is not None:
+            self._apply(values, -1)
+
+    def merge(self, other: "AllianceAggregates") -> None:
+        """Adds the members of another AllianceAggregates, replacing any members both have"""
+        for nation_id, values in other._members.items():
+            self._put(nation_id, values)
+
+    def total(self, name: str) -> float:
+        """return: sum of a field over every member, e.g. total("money")"""
+        return self._sums[_positions[name]]
+
+    def mean(self, name: str) -> float:
+        """return: mean of a field over every member, or None if there are none"""
+        if not self._members:
+            return None
+        return self._sums[_positions[name]] / len(self._members)
+
+    def quantile(self, name: str, q: float) -> float:
+        """return: estimated quantile of score or militarization, see QuantileSketch.quantile"""
+        return self._sketches[name].quantile(q)
+
+    def summary(self, quantiles=(0.1, 0.5, 0.9)) -> dict:
+        """return: dictionary with the member count, vacation mode count, totals of every field, and the mean and
+        quantiles of score and militarization"""
+        summary = {"members": len(self._members),
+                   "vacation_mode": int(self.total("vacation_mode")),
+                   "totals": dict(zip(fields, self._sums))}
+        for name in sketched_fields:
+            summary[name] = dict({"mean": self.mean(name)},
+                                 **{f"p{round(q * 100)}": self.quantile(name, q) for q in quantiles})
+        return summary
+
+    def _put(self, nation_id, values):
+        previous = self._members.get(nation_id)
+        if previous == values:
+            return
+        if previous is not None:
+            self._apply(previous, -1)
+        self._members[nation_id] = values
+        self._apply(values, 1)
+
+    def _apply(self, values, sign):
+        self._sums = list(map(operator.add if sign > 0 else operator.sub, self._sums, values))
+        for name, sketch in self._sketches.items():
+            sketch.add(values[_positions[name]], sign)
+
+
+def alliance_aggregates(alliance_id: int, key: str, client: APIClient = None,
+                        aggregates: AllianceAggregates = None) -> AllianceAggregates:
+    """Calls the Alliance_Members API and streams the response into aggregates, building no Member objects
+
+    :param aggregates: AllianceAggregates of the alliance from an earlier poll, to update in place. Defaults to a new
+        one
+    return: the updated AllianceAggregates"""
+    if aggregates is None:
+        aggregates = AllianceAggregates()
+    url = f"{api.pw_api}/alliance-members/?allianceid={alliance_id}&key={key}"
+    aggregates.update(stream_nations(url, None, client), complete=True)
+    return aggregates
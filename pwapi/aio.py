@@ -0,0 +1,106 @@
+"""asyncio interface to the PW API
+
+The blocking calls are run on a thread pool sharing one pooled APIClient, so the same fix_json recovery and
+validate_api_data exception mapping apply to every call made here."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.models import Nation
+from pwapi.requests import call_api as _call_api
+import pwapi.requests
+
+
+class AsyncAPIClient:
+    """Async counterpart of APIClient, running at most `concurrency` requests at once"""
+
+    def __init__(self, client: APIClient = None, concurrency: int = 10):
+        """
+        :param client: APIClient whose connection pool is shared by all requests. Defaults to the shared client used
+            by pwapi.requests.call_api
+        :param concurrency: maximum number of requests in flight"""
+        self.client = client if client is not None else pwapi.requests.default_client
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pwapi-aio")
+
+    async def call_api(self, url: str) -> dict:
+        """Calls a given PW API endpoint"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _call_api, url, self.client)
+
+    async def get_nation(self, nation_id: int, key: str = None) -> Nation:
+        """Creates a nation object for a given ID. Without a key, one is drawn from pwapi.api.key_pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, api.get_nation, nation_id, key, self.client)
+
+    async def gather_nations(self, nation_ids, key: str = None, concurrency: int = None):
+        """Fetches many nations, yielding each one as soon as it arrives
+
+        Errors are returned per nation rather than raised, so one bad ID does not end the sweep.
+
+        :param nation_ids: iterable of nation IDs
+        :param concurrency: maximum requests in flight for this sweep. Defaults to the client's concurrency. A sweep
+            wider than the client's thread pool runs on a pool of its own
+        :return: async generator of (nation_id, result) tuples, in completion order. result is a Nation, or the
+            exception raised while fetching it (InvalidKey, KeyLimited, InvalidRequest, HTTPError...)"""
+        concurrency = concurrency or self.concurrency
+        executor = self._executor
+        if concurrency > self.concurrency:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pwapi-aio")
+        limit = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def fetch(nation_id):
+            async with limit:
+                try:
+                    return nation_id, await loop.run_in_executor(executor, api.get_nation, nation_id, key,
+                                                                 self.client)
+                except Exception as e:
+                    return nation_id, e
+
+        tasks = [asyncio.ensure_future(fetch(nation_id)) for nation_id in nation_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumers breaking out early should not leave requests queued
+            for task in tasks:
+                task.cancel()
+            if executor is not self._executor:
+                executor.shutdown(wait=False)
+
+    def close(self) -> None:
+        """Shuts down the worker threads. The wrapped APIClient is left open."""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+_default = None
+
+
+def _default_client() -> AsyncAPIClient:
+    global _default
+    if _default is None:
+        _default = AsyncAPIClient()
+    return _default
+
+
+async def call_api(url: str) -> dict:
+    """Async call_api, using a shared AsyncAPIClient"""
+    return await _default_client().call_api(url)
+
+
+async def get_nation(nation_id: int, key: str = None) -> Nation:
+    """Async get_nation, using a shared AsyncAPIClient"""
+    return await _default_client().get_nation(nation_id, key)
+
+
+async def gather_nations(nation_ids, key: str = None, concurrency: int = 10):
+    """Async generator of (nation_id, Nation or exception) tuples, as they finish. See AsyncAPIClient.gather_nations"""
+    async for result in _default_client().gather_nations(nation_ids, key, concurrency):
+        yield result
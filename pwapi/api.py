@@ -1,16 +1,131 @@
 """Implements the pwapi API"""
+from concurrent.futures import ThreadPoolExecutor
 from .models import *
+from pwapi import metrics
+from pwapi.client import APIClient
+from pwapi.lazy import LazyCompleteMember, LazyMember, LazyNation
 from pwapi.requests import call_api
+import pwapi.requests
+from pwapi.scheduler import KeyPool
 
-# optional default key for all API call, to be set by end user as necessary
-default_key = None
+# keys used by every call made without an explicit key, to be filled by end user as necessary with key_pool.add
+key_pool = KeyPool()
 pw_url = "http://politicsandwar.com"
 pw_api = f"{pw_url}/api"
 
 
-def get_nation(nation_id: int, key=default_key) -> object:
-    """Creates a nation object for a given ID"""
-    url = f"{pw_api}/nation/id={nation_id}&key={key}"
-    data = call_api(url)
-    new_nation = Nation(data)
-    return new_nation
+def call_endpoint(path: str, key: str = None, client: APIClient = None) -> dict:
+    """Calls an endpoint under pw_api, using the given key or else one from key_pool
+
+    Keys from key_pool that hit their daily limit are retired and the call is repeated with the next key.
+
+    :param path: endpoint path and parameters, e.g. nation/id=31191"""
+    if key is not None:
+        return call_api(f"{pw_api}/{path}&key={key}", client)
+    return key_pool.call(lambda pool_key: call_api(f"{pw_api}/{path}&key={pool_key}", client))
+
+
+def _hooks(client: APIClient) -> list:
+    """Instrumentation hooks of the client a call is made with"""
+    return (client or pwapi.requests.default_client).hooks
+
+
+def get_nation(nation_id: int, key: str = None, client: APIClient = None, lazy: bool = False) -> object:
+    """Creates a nation object for a given ID
+
+    :param client: optional APIClient to make the call with. Defaults to the shared pwapi.requests.default_client
+    :param lazy: return a LazyNation, which decodes each attribute the first time it is read"""
+    data = call_endpoint(f"nation/id={nation_id}", key, client)
+    return metrics.build(LazyNation if lazy else Nation, _hooks(client), data)
+
+
+def get_alliance_members(alliance_id: int, key: str = None, client: APIClient = None, lazy: bool = False) -> list:
+    """Creates a member object for every nation in an alliance, in the order the Alliance_Members API returns them
+
+    :param lazy: return LazyMember objects, which decode each attribute the first time it is read"""
+    data = call_endpoint(f"alliance-members/?allianceid={alliance_id}", key, client)
+    cls = LazyMember if lazy else Member
+    hooks = _hooks(client)
+    return [metrics.build(cls, hooks, row) for row in data["nations"]]
+
+
+def get_complete_alliance(alliance_id: int, key: str = None, client: APIClient = None, workers: int = 8,
+                          lazy: bool = False) -> list:
+    """Creates a CompleteMember for every nation in an alliance
+
+    The members list is fetched once, then the Nation data of every member concurrently, and the two are joined on
+    nation ID. A member whose Nation data cannot be fetched or built does not stop the others; its exception is returned
+    in place of its CompleteMember. Errors fetching the members list itself are raised.
+
+    :param workers: maximum number of Nation requests in flight
+    :param lazy: build LazyCompleteMember objects, which decode each attribute the first time it is read
+    return: list of (nation_id, result) tuples, in the order the Alliance_Members API returns the members, with each
+        nation listed once. result is a CompleteMember, or the exception raised while fetching or building it"""
+    rows = {}
+    for row in call_endpoint(f"alliance-members/?allianceid={alliance_id}", key, client)["nations"]:
+        rows.setdefault(int(row["nationid"]), row)
+    if not rows:
+        return []
+
+    def fetch(nation_id):
+        try:
+            return call_endpoint(f"nation/id={nation_id}", key, client)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(rows))) as pool:
+        nation_data = dict(zip(rows, pool.map(fetch, rows)))
+
+    cls = LazyCompleteMember if lazy else CompleteMember
+    hooks = _hooks(client)
+    members = []
+    for nation_id, row in rows.items():
+        data = nation_data[nation_id]
+        if not isinstance(data, Exception):
+            try:
+                data = metrics.build(cls, hooks, row, data)
+            except Exception as e:
+                data = e
+        members.append((nation_id, data))
+    return members
+
+
+def get_war(war_id: int, key: str = None, client: APIClient = None) -> War:
+    """Creates a war object for a given ID"""
+    data = call_endpoint(f"war/{war_id}", key, client)
+    # The War API returns the war as the only item of a list
+    return metrics.build(War, _hooks(client), data["war"][0], war_id)
+
+
+def get_wars(war_ids, key: str = None, client: APIClient = None, workers: int = 8) -> dict:
+    """Fetches many wars concurrently, making a single request for each unique war ID
+
+    :param war_ids: iterable of war IDs, which may contain duplicates
+    :param workers: maximum number of requests in flight
+    return: dictionary of War objects keyed by war ID"""
+    unique_ids = list(dict.fromkeys(int(war_id) for war_id in war_ids))
+    if not unique_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(unique_ids))) as pool:
+        wars = pool.map(lambda war_id: get_war(war_id, key, client), unique_ids)
+        return dict(zip(unique_ids, wars))
+
+
+def load_nation_wars(nations, key: str = None, client: APIClient = None, workers: int = 8) -> dict:
+    """Fills the wars attribute of many nations in one pass
+
+    A war between two of the given nations is only fetched once, and the same War object is shared by both.
+
+    :param nations: iterable of Nation objects
+    :param workers: maximum number of requests in flight
+    return: dictionary of every War fetched, keyed by war ID"""
+    nations = list(nations)
+    war_ids = []
+    for nation in nations:
+        war_ids.extend(nation.offensive_war_ids)
+        war_ids.extend(nation.defensive_war_ids)
+    wars = get_wars(war_ids, key, client, workers)
+    for nation in nations:
+        nation.wars = {"offensive": [wars[war_id] for war_id in nation.offensive_war_ids],
+                       "defensive": [wars[war_id] for war_id in nation.defensive_war_ids]}
+    return wars
@@ -0,0 +1,239 @@
+"""On-disk history of nation pulls
+
+Classes
+--------
+
+SnapshotWriter - appends each pull of NationStub/Member objects to an archive file as one columnar block
+SnapshotArchive - memory-maps an archive file, reading single columns or single nations without loading the rest
+Snapshot - one block of an archive
+
+File format
+--------
+
+The file starts with a magic line, followed by blocks appended one after the other. Each block is a little endian
+uint32 header length, a JSON header (timestamp, row count, base nation ID and the dtype, offset and length of each
+column), then the column data, 8-byte aligned. Rows are sorted by nation ID, and the nation IDs are delta encoded:
+the header holds the first ID and the column holds the difference from the previous ID, in the smallest unsigned type
+that fits. All other columns are stored as typed arrays, so reading one is a zero-copy view of the mapped file, and
+reading one nation's value is a single lookup once its position is known.
+"""
+import json
+import mmap
+import struct
+import time
+import numpy as np
+
+magic = b"PWSNAP1\n"
+_length = struct.Struct("<I")
+
+# Numeric attributes archived when the pulled objects have them, and their stored types. Covers NationStub,
+# BaseNation and the Member stockpile.
+archive_fields = {"score": "<f8",
+                  "city_count": "<i4",
+                  "infrastructure": "<f8",
+                  "alliance_id": "<i4",
+                  "alliance_position": "<i1",
+                  "offensive_war_count": "<i1",
+                  "defensive_war_count": "<i1",
+                  "vacation_mode": "|b1",
+                  "minutes_inactive": "<i8",
+                  "soldiers": "<i4",
+                  "tanks": "<i4",
+                  "aircraft": "<i4",
+                  "ships": "<i4",
+                  "missiles": "<i4",
+                  "nukes": "<i4",
+                  "project_flags": "<i4",
+                  "money": "<f8",
+                  "food": "<f8",
+                  "uranium": "<f8",
+                  "coal": "<f8",
+                  "oil": "<f8",
+                  "bauxite": "<f8",
+                  "lead": "<f8",
+                  "iron": "<f8",
+                  "gasoline": "<f8",
+                  "munitions": "<f8",
+                  "aluminum": "<f8",
+                  "steel": "<f8",
+                  "credits": "<f8",
+                  "spies": "<f8"}
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+class SnapshotWriter:
+    """Appends pulls to an archive file, creating it if needed"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(magic)
+            self._file.write(_padding(len(magic)))
+            self._file.flush()
+
+    def append(self, nations, timestamp: float = None) -> None:
+        """Writes one pull as a block
+
+        :param nations: iterable of NationStub objects or subclasses, such as Member. All must be of the same type
+        :param timestamp: time of the pull in seconds since the epoch. Defaults to now"""
+        nations = list(nations)
+        fields = [name for name in archive_fields if nations and hasattr(nations[0], name)]
+        nation_ids = np.fromiter((nation.nation_id for nation in nations), np.int64, len(nations))
+        order = np.argsort(nation_ids, kind="stable")
+        nation_ids = nation_ids[order]
+        deltas = np.diff(nation_ids, prepend=nation_ids[:1])
+        delta_type = "<u8"
+        for candidate in ("|u1", "<u2", "<u4"):
+            if not len(deltas) or deltas.max() <= np.iinfo(candidate).max:
+                delta_type = candidate
+                break
+
+        arrays = [("nation_id", deltas.astype(delta_type))]
+        for name in fields:
+            values = np.array([getattr(nation, name) for nation in nations], dtype=archive_fields[name])
+            arrays.append((name, values[order]))
+
+        columns = []
+        body = []
+        offset = 0
+        for name, values in arrays:
+            data = values.tobytes()
+            columns.append([name, values.dtype.str, offset, len(data)])
+            body.append(data + _padding(len(data)))
+            offset += len(data) + len(_padding(len(data)))
+        header = json.dumps({"timestamp": time.time() if timestamp is None else timestamp,
+                             "rows": len(nations),
+                             "base": int(nation_ids[0]) if len(nations) else 0,
+                             "size": offset,
+                             "columns": columns}).encode()
+        header += b" " * (-(len(header) + _length.size) % 8)
+        self._file.write(_length.pack(len(header)) + header + b"".join(body))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Snapshot:
+    """One pull read from an archive. Columns are views of the mapped file, decoded only when asked for
+
+    The nation IDs are decoded once and kept, so looking nations up is a binary search."""
+
+    __slots__ = ["timestamp", "rows", "_buffer", "_base", "_columns", "_nation_ids"]
+
+    def __init__(self, buffer, header: dict, data_offset: int):
+        self.timestamp = header["timestamp"]
+        self.rows = header["rows"]
+        self._buffer = buffer
+        self._base = header["base"]
+        self._columns = {name: (dtype, data_offset + offset, length)
+                         for name, dtype, offset, length in header["columns"]}
+        self._nation_ids = None
+
+    @property
+    def fields(self) -> list:
+        return [name for name in self._columns if name != "nation_id"]
+
+    def nation_ids(self) -> np.ndarray:
+        """Returns the sorted nation IDs of the snapshot, as a read-only array decoded on the first call"""
+        if self._nation_ids is None:
+            nation_ids = np.cumsum(self._view("nation_id"), dtype=np.int64)
+            nation_ids += self._base
+            nation_ids.flags.writeable = False
+            self._nation_ids = nation_ids
+        return self._nation_ids
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a column, in the same order as nation_ids"""
+        if name == "nation_id":
+            return self.nation_ids()
+        return self._view(name)
+
+    def get(self, nation_id: int, name: str):
+        """Returns one nation's value of a column, or None if the nation is not in the snapshot"""
+        nation_ids = self.nation_ids()
+        position = np.searchsorted(nation_ids, nation_id)
+        if position == len(nation_ids) or nation_ids[position] != nation_id:
+            return None
+        return self._view(name)[position].item()
+
+    def _view(self, name):
+        dtype, offset, length = self._columns[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._buffer, dtype, length // dtype.itemsize, offset)
+
+
+class SnapshotArchive:
+    """Read-only, memory-mapped archive written by SnapshotWriter
+
+    Only block headers are read on opening. Snapshots appended after opening are not seen until the archive is
+    opened again."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(magic)] != magic:
+            raise ValueError(f"{path} is not a snapshot archive")
+        self.snapshots = []
+        position = len(magic) + len(_padding(len(magic)))
+        while position + _length.size <= len(self._map):
+            (header_length,) = _length.unpack_from(self._map, position)
+            header_start = position + _length.size
+            data_offset = header_start + header_length
+            # stop at a block cut short by an interrupted write
+            if data_offset > len(self._map):
+                break
+            header = json.loads(self._map[header_start:data_offset])
+            if data_offset + header["size"] > len(self._map):
+                break
+            self.snapshots.append(Snapshot(self._map, header, data_offset))
+            position = data_offset + header["size"]
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __getitem__(self, i) -> Snapshot:
+        return self.snapshots[i]
+
+    def timestamps(self) -> np.ndarray:
+        return np.array([snapshot.timestamp for snapshot in self.snapshots])
+
+    def series(self, nation_id: int, name: str) -> tuple:
+        """Time series of one column for one nation
+
+        return: (timestamps, values) arrays, covering the snapshots the nation appears in"""
+        timestamps = []
+        values = []
+        for snapshot in self.snapshots:
+            value = snapshot.get(nation_id, name)
+            if value is not None:
+                timestamps.append(snapshot.timestamp)
+                values.append(value)
+        return np.array(timestamps), np.array(values)
+
+    def column_history(self, name: str):
+        """Generator of (timestamp, nation_ids, values) for every snapshot holding the column"""
+        for snapshot in self.snapshots:
+            if name in snapshot.fields:
+                yield snapshot.timestamp, snapshot.nation_ids(), snapshot.column(name)
+
+    def close(self) -> None:
+        """Unmaps the file. Fails while column arrays read from it are still referenced"""
+        self.snapshots = []
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,157 @@
+"""Response cache for decoded API data
+
+Classes
+--------
+
+ResponseCache - in-memory TTL + LRU cache consulted by call_api, with an optional persistent tier
+SqliteStore - persistent tier keeping responses in a sqlite database, so they survive process restarts
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a response stays fresh, by endpoint type. Wars rarely change once loaded, nation data changes every turn.
+default_ttls = {"nation": 300,
+                "nations": 300,
+                "alliance-members": 300,
+                "war": 600}
+default_ttl = 300
+
+
+def normalize_url(url: str) -> str:
+    """Strips the key parameter from an endpoint URL, so the same request made with different keys shares a key"""
+    url = re.sub(r"&key=[^&]*", "", url)
+    url = re.sub(r"\?key=[^&]*&?", "?", url)
+    return url.rstrip("?")
+
+
+def endpoint_type(url: str) -> str:
+    """Returns the endpoint name of a PW API URL, e.g. nation, war, alliance-members"""
+    match = re.search(r"/api/([^/?&=]+)", url)
+    return match.group(1) if match else ""
+
+
+class SqliteStore:
+    """Persistent cache tier storing JSON response bodies in a sqlite database"""
+
+    def __init__(self, path: str):
+        """:param path: database file path. Created if it does not exist"""
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, expires REAL, body TEXT)")
+
+    def get(self, url: str):
+        """Returns (expires, body) for a fresh entry, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT expires, body FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is not None and row[0] <= time.time():
+                with self._db:
+                    self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                return None
+        return row
+
+    def put(self, url: str, expires: float, body: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (url, expires, body))
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class ResponseCache:
+    """In-memory cache of decoded API responses with per-endpoint TTLs and LRU eviction
+
+    Entries are keyed by the URL with its key parameter removed. Cached dicts are shared between callers, so they
+    must be treated as read only, as the model classes do.
+
+    Attributes
+    -------------
+
+    hits, misses, evictions: counters since the cache was created. A hit from the persistent tier counts as a hit."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 ** 2, ttls: dict = None, store: SqliteStore = None):
+        """
+        :param max_bytes: memory cap, measured as the total size of the cached response bodies
+        :param ttls: seconds each endpoint type stays fresh. Merged over default_ttls
+        :param store: optional persistent tier, such as a SqliteStore"""
+        self.max_bytes = max_bytes
+        self.ttls = dict(default_ttls, **(ttls or {}))
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        # url -> (expires, size, data), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        """Returns cached data for the URL, or None if there is no fresh entry"""
+        url = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(url)
+                    self.hits += 1
+                    return entry[2]
+                self._remove(url)
+        if self.store is not None:
+            stored = self.store.get(url)
+            if stored is not None:
+                expires, body = stored
+                data = json.loads(body)
+                with self._lock:
+                    self._insert(url, expires, len(body), data)
+                    self.hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, url: str, data: dict, size: int = None) -> None:
+        """Caches validated data for the URL
+
+        :param size: size of the response body in bytes. Measured from the data if not given"""
+        url = normalize_url(url)
+        ttl = self.ttls.get(endpoint_type(url), default_ttl)
+        expires = time.time() + ttl
+        body = None
+        if size is None or self.store is not None:
+            body = json.dumps(data)
+            size = len(body) if size is None else size
+        with self._lock:
+            self._insert(url, expires, size, data)
+        if self.store is not None:
+            self.store.put(url, expires, body)
+
+    def stats(self) -> dict:
+        """return: dictionary with keys hits, misses, evictions, entries, bytes"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries), "bytes": self.size}
+
+    def clear(self) -> None:
+        """Empties the in-memory tier. The persistent tier is left as is."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _insert(self, url, expires, size, data):
+        if url in self._entries:
+            self._remove(url)
+        if size > self.max_bytes:
+            return
+        self._entries[url] = (expires, size, data)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, url):
+        self.size -= self._entries.pop(url)[1]
@@ -0,0 +1,223 @@
+"""Change detection between successive Nations or Alliance_Members pulls
+
+Classes
+--------
+
+ChangeFeed - keeps the latest model of every nation, rebuilding only changed rows and publishing change events
+Change - base class of the change events:
+    NationAdded, NationRemoved, ScoreChanged, AllianceChanged, ColorChanged, VacationEntered, VacationLeft,
+    CitiesChanged, OffensiveWarDeclared, DefensiveWarDeclared
+
+Functions
+--------
+
+diff - change events between two decoded payloads
+"""
+from operator import itemgetter
+from pwapi.models import NationStub
+
+# Raw keys of the NationStub attributes compared between pulls. Changes to any other attribute, such as
+# minutes_inactive, do not make a row count as changed.
+tracked_keys = ("score", "allianceid", "color", "cities", "offensivewars", "defensivewars")
+
+
+class Change:
+    """A change to one nation between two pulls
+
+    :ivar nation_id: ID of the changed nation
+    :ivar old: model of the nation from the previous pull, None for an added nation
+    :ivar new: model of the nation from the current pull, None for a removed nation"""
+
+    __slots__ = ["nation_id", "old", "new"]
+
+    def __init__(self, nation_id: int, old: NationStub, new: NationStub):
+        self.nation_id = nation_id
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"{type(self).__name__}(nation_id={self.nation_id})"
+
+
+class NationAdded(Change):
+    __slots__ = []
+
+
+class NationRemoved(Change):
+    """The nation is no longer in the payload, having been deleted or, for Alliance_Members, left the alliance"""
+    __slots__ = []
+
+
+class ScoreChanged(Change):
+    __slots__ = []
+
+    @property
+    def delta(self) -> float:
+        return self.new.score - self.old.score
+
+
+class AllianceChanged(Change):
+    __slots__ = []
+
+    @property
+    def old_alliance_id(self) -> int:
+        return self.old.alliance_id
+
+    @property
+    def new_alliance_id(self) -> int:
+        return self.new.alliance_id
+
+
+class ColorChanged(Change):
+    __slots__ = []
+
+
+class VacationEntered(Change):
+    __slots__ = []
+
+
+class VacationLeft(Change):
+    __slots__ = []
+
+
+class CitiesChanged(Change):
+    __slots__ = []
+
+
+class OffensiveWarDeclared(Change):
+    """The nation's offensive war count went up. Several wars declared between pulls give a single event"""
+    __slots__ = []
+
+    @property
+    def count(self) -> int:
+        """Number of new offensive wars, net of wars that ended between the pulls"""
+        return self.new.offensive_war_count - self.old.offensive_war_count
+
+
+class DefensiveWarDeclared(Change):
+    """The nation's defensive war count went up. Several wars declared between pulls give a single event"""
+    __slots__ = []
+
+    @property
+    def count(self) -> int:
+        return self.new.defensive_war_count - self.old.defensive_war_count
+
+
+def _signature(rows: list):
+    """Returns a function picking the raw values of the tracked attributes out of a row
+
+    Raw values are compared rather than decoded ones, which is much faster and equivalent as long as both pulls come
+    from the same endpoint."""
+    vacation_key = "vacmode" if rows and "vacmode" in rows[0] else "vmode"
+    return itemgetter(*tracked_keys, vacation_key)
+
+
+def _events(nation_id: int, old: NationStub, new: NationStub) -> list:
+    """Change events between two models of the same nation"""
+    events = []
+    if new.score != old.score:
+        events.append(ScoreChanged(nation_id, old, new))
+    if new.alliance_id != old.alliance_id:
+        events.append(AllianceChanged(nation_id, old, new))
+    if new.color != old.color:
+        events.append(ColorChanged(nation_id, old, new))
+    if new.vacation_mode != old.vacation_mode:
+        events.append((VacationEntered if new.vacation_mode else VacationLeft)(nation_id, old, new))
+    if new.city_count != old.city_count:
+        events.append(CitiesChanged(nation_id, old, new))
+    if new.offensive_war_count > old.offensive_war_count:
+        events.append(OffensiveWarDeclared(nation_id, old, new))
+    if new.defensive_war_count > old.defensive_war_count:
+        events.append(DefensiveWarDeclared(nation_id, old, new))
+    return events
+
+
+def diff(previous: dict, current: dict, cls=NationStub) -> list:
+    """Compares two decoded Nations or Alliance_Members payloads
+
+    Models are only built for the rows whose tracked attributes differ, and for added and removed nations.
+
+    :param cls: model class built for changed rows, e.g. NationStub or Member
+    return: list of Change events, in the order of the current payload, followed by removals"""
+    old_rows = {int(row["nationid"]): row for row in previous["nations"]}
+    signature = _signature(current["nations"])
+    events = []
+    for row in current["nations"]:
+        nation_id = int(row["nationid"])
+        old_row = old_rows.pop(nation_id, None)
+        if old_row is None:
+            events.append(NationAdded(nation_id, None, cls(row)))
+        elif signature(row) != signature(old_row):
+            events.extend(_events(nation_id, cls(old_row), cls(row)))
+    events.extend(NationRemoved(nation_id, cls(row), None) for nation_id, row in old_rows.items())
+    return events
+
+
+class ChangeFeed:
+    """Latest state of a set of nations, updated from successive pulls
+
+    Each update compares the tracked attributes of every row with those of the previous pull, and only builds models
+    for the rows that changed. Unchanged nations keep the model built on an earlier pull, so their untracked
+    attributes (minutes_inactive, names, war policy) are as of the last tracked change.
+
+    Once an update has been applied, subscribers are called with each of its events:
+
+        feed = ChangeFeed()
+        feed.subscribe(alert, AllianceChanged, VacationLeft)
+        feed.update(api.call_api(url))"""
+
+    def __init__(self, cls=NationStub):
+        """:param cls: model class built from each row, e.g. NationStub or Member"""
+        self.cls = cls
+        self.nations = {}
+        self._signatures = {}
+        self._subscribers = []
+
+    def __len__(self):
+        return len(self.nations)
+
+    def get(self, nation_id: int) -> NationStub:
+        return self.nations.get(nation_id)
+
+    def subscribe(self, callback, *event_types) -> None:
+        """Calls callback(event) for every event of the given types, or of any type if none are given"""
+        self._subscribers.append((callback, event_types or (Change,)))
+
+    def unsubscribe(self, callback) -> None:
+        self._subscribers = [subscriber for subscriber in self._subscribers if subscriber[0] != callback]
+
+    def update(self, data: dict) -> list:
+        """Applies a new pull
+
+        The first update reports every nation as added.
+
+        :param data: decoded Nations or Alliance_Members API data
+        return: list of the Change events found"""
+        signatures = {}
+        events = []
+        get_signature = _signature(data["nations"])
+        for row in data["nations"]:
+            nation_id = int(row["nationid"])
+            signature = get_signature(row)
+            signatures[nation_id] = signature
+            old_signature = self._signatures.get(nation_id)
+            if signature == old_signature:
+                continue
+            new = self.cls(row)
+            old = self.nations.get(nation_id)
+            self.nations[nation_id] = new
+            if old_signature is None:
+                events.append(NationAdded(nation_id, None, new))
+            else:
+                events.extend(_events(nation_id, old, new))
+        for nation_id in self._signatures.keys() - signatures.keys():
+            events.append(NationRemoved(nation_id, self.nations.pop(nation_id), None))
+        self._signatures = signatures
+        for event in events:
+            self._publish(event)
+        return events
+
+    def _publish(self, event: Change) -> None:
+        for callback, event_types in self._subscribers:
+            if isinstance(event, event_types):
+                callback(event)
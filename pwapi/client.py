@@ -0,0 +1,88 @@
+"""HTTP client holding the pooled, keep-alive session used for all calls to the PW servers"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pwapi.cache import ResponseCache
+from pwapi.coalesce import Coalescer
+from pwapi.decoders import Decoder, get_decoder
+from pwapi.resilience import Resilience
+
+# Transient server side failures worth retrying. Anything else is returned to call_api as is.
+retry_statuses = (500, 502, 503, 504)
+
+
+class APIClient:
+    """Owns a pooled requests.Session, so repeated calls reuse open connections instead of opening a new one each time
+
+    Attributes
+    -------------
+
+    session: the underlying requests.Session
+    timeout: (connect, read) timeout in seconds passed to every request
+    cache: optional ResponseCache consulted by call_api before sending a request
+    hooks: list of callables passed a record of each call and model build, see pwapi.metrics
+    coalescer: optional Coalescer sharing one request between identical concurrent calls
+    decoder: Decoder used by call_api for response bodies
+    resilience: optional Resilience adding deadlines, retries, hedging and a circuit breaker to call_api"""
+
+    def __init__(self, pool_size: int = 10, timeout: tuple = (5, 30), retries: int = 3, backoff: float = 0.5,
+                 cache: ResponseCache = None, hooks: list = None, coalescer: Coalescer = None,
+                 decoder: Decoder = None, resilience: Resilience = None):
+        """Init the client and its connection pool
+
+        :param pool_size: maximum number of open connections kept per host
+        :param timeout: (connect, read) timeout in seconds, or a single number used for both
+        :param retries: number of retries for connection errors and 5xx responses
+        :param backoff: backoff factor in seconds between retries, doubled after each retry
+        :param cache: optional ResponseCache for responses fetched through this client
+        :param hooks: optional instrumentation hooks, e.g. a pwapi.metrics.Metrics
+        :param coalescer: optional Coalescer, making concurrent calls to the same endpoint wait for one request
+        :param decoder: JSON decoder for response bodies. Defaults to the fastest installed backend
+        :param resilience: optional Resilience policy for the requests call_api sends"""
+
+        self.timeout = timeout
+        self.cache = cache
+        self.hooks = list(hooks) if hooks else []
+        self.coalescer = coalescer
+        self.decoder = decoder or get_decoder()
+        self.resilience = resilience
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=retry_statuses,
+                      allowed_methods=frozenset(["GET"]),
+                      # Once retries are exhausted the last response is handed back, so call_api still raises an
+                      # HTTPError for it rather than a RetryError
+                      raise_on_status=False)
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def get(self, url: str, stream: bool = False) -> requests.Response:
+        """Sends a GET request through the pooled session
+
+        :param stream: defer downloading the body until it is read, e.g. with Response.iter_content"""
+        return self.session.get(url, timeout=self.timeout, stream=stream)
+
+    def connection_stats(self) -> dict:
+        """Counts connections opened and reused by the pool so far
+
+        return: a dictionary with keys opened, reused, and requests. Retried attempts count as separate requests."""
+        opened = 0
+        sent = 0
+        pools = self._adapter.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            sent += pool.num_requests
+        return {"opened": opened, "reused": sent - opened, "requests": sent}
+
+    def close(self) -> None:
+        """Closes all pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
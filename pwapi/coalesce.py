@@ -0,0 +1,116 @@
+"""Single-flight coalescing of identical concurrent calls
+
+While a call for a key is in flight, further calls for the same key wait for it and share its result or exception
+instead of making their own. Results are shared, not copied, so callers must not modify them.
+
+An APIClient created with a Coalescer coalesces call_api calls by normalized URL, so calls differing only by API key
+share one request. An InvalidKey or KeyLimited error is only shared with callers using the same key, and the others
+send their own request. This covers AsyncAPIClient too, whose calls run through call_api on threads. AsyncCoalescer does
+the same for coroutines, for clients making requests on the event loop itself.
+
+Classes
+--------
+
+Coalescer - thread-safe single-flight for blocking callables
+AsyncCoalescer - single-flight for coroutine functions, within one event loop
+"""
+import asyncio
+import threading
+
+
+class _Flight:
+    __slots__ = ["done", "result", "error"]
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Coalescer:
+    """Lets one thread at a time make the call for a key, the others waiting for its outcome
+
+    :ivar calls: calls made through the coalescer
+    :ivar coalesced: calls answered by another caller's in-flight call"""
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def call(self, key, fn):
+        """Returns fn(), or the result of the in-flight call for the same key
+
+        Exceptions raised by the in-flight call are raised in every caller waiting on it."""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self) -> int:
+        """return: number of keys with a call in flight"""
+        with self._lock:
+            return len(self._flights)
+
+
+class AsyncCoalescer:
+    """Coroutine counterpart of Coalescer. Not thread-safe: use one per event loop
+
+    :ivar calls: calls made through the coalescer
+    :ivar coalesced: calls answered by another caller's in-flight call"""
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+
+    async def call(self, key, fn):
+        """Returns await fn(), or the result of the in-flight call for the same key
+
+        A waiting caller being cancelled does not cancel the in-flight call. The caller making the call being
+        cancelled cancels it for every waiting caller."""
+        self.calls += 1
+        future = self._flights.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # mark the exception as retrieved, so no warning is logged when nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,57 @@
+"""Pluggable JSON decoders working directly on response bytes
+
+orjson and ujson are used when installed, falling back to the standard library. All backends take the raw bytes of
+a response body, so there is no separate step decoding the body to str.
+
+Classes
+--------
+
+Decoder - a named JSON backend. call_api repairs malformed JSON with the same backend, see repair_json
+
+Functions
+--------
+
+available - names of the installed backends, fastest first
+get_decoder - returns the decoder for a backend name, or the fastest installed one
+"""
+import json
+
+_backends = {}
+try:
+    import orjson
+    _backends["orjson"] = orjson.loads
+except ImportError:
+    pass
+try:
+    import ujson
+    _backends["ujson"] = ujson.loads
+except ImportError:
+    pass
+_backends["json"] = json.loads
+
+
+class Decoder:
+    """JSON backend used by call_api for response bodies
+
+    :ivar name: backend name, one of orjson, ujson or json
+    :ivar loads: the backend's function decoding bytes. Raises a ValueError subclass for malformed JSON"""
+
+    __slots__ = ["name", "loads"]
+
+    def __init__(self, name: str):
+        if name not in _backends:
+            raise ValueError(f"JSON backend {name} is not installed. Available: {', '.join(_backends)}")
+        self.name = name
+        self.loads = _backends[name]
+
+    def __repr__(self):
+        return f"Decoder({self.name!r})"
+
+
+def available() -> list:
+    return list(_backends)
+
+
+def get_decoder(name: str = None) -> Decoder:
+    """:param name: backend name. Defaults to the fastest installed backend"""
+    return Decoder(name or next(iter(_backends)))
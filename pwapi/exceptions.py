@@ -19,3 +19,15 @@ class InvalidPermissions(APIKeyError):
 
 class InvalidRequest(Exception):
     """Raised on invalid API calls"""
+
+
+class MalformedJSON(RuntimeError):
+    """Raised when a response body is not JSON, or malformed beyond repair"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call did not complete within its deadline, see pwapi.resilience"""
+
+
+class CircuitOpen(Exception):
+    """Raised without sending a request while a circuit breaker considers the servers unhealthy"""
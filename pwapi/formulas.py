@@ -1,19 +1,31 @@
+import numpy as np
+
+soldiers_per_barracks = 3000
+barracks_per_city = 5
+tanks_per_factory = 250
+factories_per_city = 5
+aircraft_per_hanger = 18
+hangers_per_city = 5
+ships_per_dock = 5
+docks_per_city = 3
+
+# Unit capacity per city with every military improvement slot filled
+max_soldiers_per_city = soldiers_per_barracks * barracks_per_city
+max_tanks_per_city = tanks_per_factory * factories_per_city
+max_aircraft_per_city = aircraft_per_hanger * hangers_per_city
+max_ships_per_city = ships_per_dock * docks_per_city
+
+# A nation can declare on nations with a score between these multiples of its own
+offensive_max = 1.75
+offensive_min = .75
+
 
 def militarization(city_count, soldiers, tanks, aircraft, ships):
     """Calculates militarization levels of each unit type, and for all units in total"""
-    soldiers_per_barracks = 3000
-    barracks_per_city = 5
-    tanks_per_factory = 250
-    factories_per_city = 5
-    aircraft_per_hanger = 18
-    hangers_per_city = 5
-    ships_per_dock = 5
-    docks_per_city = 3
-
-    max_soldiers = soldiers_per_barracks * barracks_per_city * city_count
-    max_tanks = tanks_per_factory * factories_per_city * city_count
-    max_aircraft = aircraft_per_hanger * hangers_per_city * city_count
-    max_ships = ships_per_dock * docks_per_city * city_count
+    max_soldiers = max_soldiers_per_city * city_count
+    max_tanks = max_tanks_per_city * city_count
+    max_aircraft = max_aircraft_per_city * city_count
+    max_ships = max_ships_per_city * city_count
 
     ratio = {"total": None,
                 "soldiers": soldiers / max_soldiers,
@@ -27,9 +39,35 @@ def militarization(city_count, soldiers, tanks, aircraft, ships):
 
 
 def war_range(score):
-    offensive = {"max": score * 1.75,
-                 "min": score * .75}
-    defensive = {"max": score / .75,
-                 "min": score / 1.75}
+    offensive = {"max": score * offensive_max,
+                 "min": score * offensive_min}
+    defensive = {"max": score / offensive_min,
+                 "min": score / offensive_max}
 
     return {"offensive": offensive, "defensive": defensive}
+
+
+def militarization_batch(city_count, soldiers, tanks, aircraft, ships) -> np.recarray:
+    """Calculates militarization for many nations at once
+
+    Takes equal length arrays (or anything np.asarray accepts) and gives the same values as militarization.
+
+    return: record array with fields total, soldiers, tanks, aircraft, ships"""
+    city_count = np.asarray(city_count)
+    ratio_soldiers = np.asarray(soldiers) / (max_soldiers_per_city * city_count)
+    ratio_tanks = np.asarray(tanks) / (max_tanks_per_city * city_count)
+    ratio_aircraft = np.asarray(aircraft) / (max_aircraft_per_city * city_count)
+    ratio_ships = np.asarray(ships) / (max_ships_per_city * city_count)
+    total = (ratio_soldiers + ratio_tanks + ratio_aircraft + ratio_ships) / 4
+    return np.rec.fromarrays([total, ratio_soldiers, ratio_tanks, ratio_aircraft, ratio_ships],
+                             names="total,soldiers,tanks,aircraft,ships")
+
+
+def war_range_batch(score) -> np.recarray:
+    """Calculates war ranges for many scores at once, giving the same values as war_range
+
+    return: record array with fields offensive_max, offensive_min, defensive_max, defensive_min"""
+    score = np.asarray(score, dtype=np.float64)
+    return np.rec.fromarrays([score * offensive_max, score * offensive_min, score / offensive_min,
+                              score / offensive_max],
+                             names="offensive_max,offensive_min,defensive_max,defensive_min")
@@ -0,0 +1,101 @@
+"""Lazily decoded versions of the nation models
+
+Classes
+--------
+
+LazyNation - Nation decoding each attribute from the raw Nation API data the first time it is read
+LazyMember - Member decoding each attribute from the raw Alliance_Members API data the first time it is read
+LazyCompleteMember - CompleteMember decoding each attribute from its raw data the first time it is read
+
+Construction only keeps a reference to the raw data, so jobs reading a handful of attributes skip the conversion of
+all the others. Each attribute is decoded from the same field table of pwapi.models as the eager model and cached once
+read, and the lazy classes subclass their eager counterparts, so the two can be used interchangeably.
+"""
+from pwapi.models import CompleteMember, Member, Nation, base_fields, field_decoder, member_fields, nation_fields, \
+    stub_fields
+
+
+class _LazyField:
+    """Data descriptor decoding an attribute on first read and caching it where the eager model stores it
+
+    That is the slot defined by the parent class, or the instance dictionary for models without slots."""
+
+    def __init__(self, decode, source: str):
+        """
+        :param decode: function taking the raw data and returning the attribute value
+        :param source: name of the instance attribute holding the raw data"""
+        self.decode = decode
+        self.source = source
+        self.name = None
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        for klass in owner.__mro__[1:]:
+            if name in vars(klass).get("__slots__", ()):
+                self.slot = vars(klass)[name]
+                break
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if self.slot is not None:
+            try:
+                return self.slot.__get__(obj, owner)
+            except AttributeError:
+                pass
+        elif self.name in obj.__dict__:
+            return obj.__dict__[self.name]
+        value = self.decode(getattr(obj, self.source))
+        self.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        if self.slot is not None:
+            self.slot.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+
+
+def _install(cls, fields: dict, source: str = "_data") -> None:
+    """Adds a _LazyField to cls for each attribute of a field table of pwapi.models"""
+    for name, (key, convert) in fields.items():
+        field = _LazyField(field_decoder(key, convert), source)
+        setattr(cls, name, field)
+        field.__set_name__(cls, name)
+
+
+class LazyNation(Nation):
+    """Nation decoding its attributes from the raw Nation API data on first read"""
+
+    __slots__ = ["_data"]
+
+    def __init__(self, data: dict):
+        self._data = data
+
+
+class LazyMember(Member):
+    """Member decoding its attributes from the raw Alliance_Members API data on first read"""
+
+    __slots__ = ["_data"]
+
+    def __init__(self, data: dict):
+        self._data = data
+
+
+class LazyCompleteMember(CompleteMember):
+    """CompleteMember decoding its attributes on first read
+
+    As with CompleteMember, the Alliance_Members data is only used for the attributes the Nation API lacks."""
+
+    __slots__ = ["_data", "_member_data"]
+
+    def __init__(self, member_data: dict, nation_data: dict):
+        self._data = nation_data
+        self._member_data = member_data
+
+
+_install(LazyNation, {**stub_fields, **base_fields, **nation_fields})
+_install(LazyMember, {**stub_fields, **base_fields, **member_fields})
+_install(LazyCompleteMember, {**stub_fields, **base_fields, **nation_fields})
+_install(LazyCompleteMember, member_fields, "_member_data")
@@ -0,0 +1,180 @@
+"""Instrumentation of API calls and model construction
+
+Hooks are callables added to APIClient.hooks. call_api passes each of them a CallRecord for every call made through the
+client, and the functions of pwapi.api pass them a BuildRecord for every model they build from the response:
+
+    metrics = Metrics()
+    client = APIClient(hooks=[metrics])
+    api.get_nation(31191, key, client)
+    metrics.report()
+
+Calls through a client without hooks are not timed at all. API keys are never recorded, only a masked form of them.
+
+Classes
+--------
+
+CallRecord - timings and outcome of one call_api call
+BuildRecord - time taken to build one model
+Metrics - thread-safe hook aggregating records into counts and latency percentiles
+
+Functions
+--------
+
+mask_key - the form an API key is recorded under
+"""
+import hashlib
+import re
+import threading
+import time
+import numpy as np
+from pwapi.cache import endpoint_type, normalize_url
+
+percentiles = (50, 90, 99)
+
+
+def mask_key(key: str) -> str:
+    """Masks an API key, so that records and reports can be logged without leaking it
+
+    return: the first 8 hex digits of the key's SHA-256 digest"""
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+class CallRecord:
+    """One call_api call
+
+    :ivar url: endpoint URL without the key
+    :ivar endpoint: endpoint name, e.g. nation
+    :ivar key: masked API key the call was made with, see mask_key. None if the URL has none
+    :ivar started: wall clock time the call started, in seconds since the epoch
+    :ivar latency: seconds from sending the request until the body was read, 0 for cached responses
+    :ivar size: bytes in the response body
+    :ivar decode_time: seconds spent decoding the body, including any repair
+    :ivar repaired: whether the body was malformed JSON that had to be repaired
+    :ivar cached: whether the response came from the client's cache, without using any quota
+    :ivar coalesced: whether the response was shared by an identical call in flight, without using any quota
+    :ivar retries: requests sent besides the first, by the client's connection pool or its Resilience
+    :ivar status: HTTP status code
+    :ivar error: class name of the exception the call raised, e.g. KeyLimited or HTTPError, or None
+    :ivar duration: total seconds spent in call_api"""
+
+    __slots__ = ["url", "endpoint", "key", "started", "latency", "size", "decode_time", "repaired", "cached",
+                 "coalesced", "retries", "status", "error", "duration"]
+
+    def __init__(self, url: str):
+        self.url = normalize_url(url)
+        self.endpoint = endpoint_type(url)
+        match = re.search(r"[?&]key=([^&]*)", url)
+        self.key = mask_key(match.group(1)) if match else None
+        self.started = time.time()
+        self.latency = 0.0
+        self.size = 0
+        self.decode_time = 0.0
+        self.repaired = False
+        self.cached = False
+        self.coalesced = False
+        self.retries = 0
+        self.status = None
+        self.error = None
+        self.duration = 0.0
+
+
+class BuildRecord:
+    """Construction of one model object
+
+    :ivar model: class name of the model, e.g. Nation
+    :ivar duration: seconds spent building it"""
+
+    __slots__ = ["model", "duration"]
+
+    def __init__(self, model: str, duration: float):
+        self.model = model
+        self.duration = duration
+
+
+def emit(hooks, record) -> None:
+    """Passes a record to each hook"""
+    for hook in hooks:
+        hook(record)
+
+
+def build(cls, hooks, *args):
+    """Builds cls(*args), passing a BuildRecord to the hooks if there are any"""
+    if not hooks:
+        return cls(*args)
+    start = time.perf_counter()
+    model = cls(*args)
+    emit(hooks, BuildRecord(cls.__name__, time.perf_counter() - start))
+    return model
+
+
+def _summary(values: list) -> dict:
+    summary = {"count": len(values)}
+    if values:
+        for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+            summary[f"p{percentile}"] = float(value)
+        summary["max"] = max(values)
+    return summary
+
+
+class Metrics:
+    """In-process aggregator of CallRecords and BuildRecords, to be added to APIClient.hooks
+
+    Keeps every latency sample until reset, which is fine for sweeps of a few hundred thousand calls. Long running
+    processes should report and reset periodically."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency = {}
+            self._decode = {}
+            self._endpoints = {}
+            self._builds = {}
+            self._keys = {}
+
+    def __call__(self, record) -> None:
+        with self._lock:
+            if isinstance(record, BuildRecord):
+                self._builds.setdefault(record.model, []).append(record.duration)
+                return
+            counts = self._endpoints.get(record.endpoint)
+            if counts is None:
+                counts = self._endpoints[record.endpoint] = {"calls": 0, "cached": 0, "coalesced": 0, "repaired": 0,
+                                                             "retries": 0, "bytes": 0, "errors": {}}
+            counts["calls"] += 1
+            counts["retries"] += record.retries
+            if record.error is not None:
+                counts["errors"][record.error] = counts["errors"].get(record.error, 0) + 1
+            if record.cached or record.coalesced:
+                counts["cached" if record.cached else "coalesced"] += 1
+                return
+            # every request that reached the server counts against the key's daily quota
+            self._keys[record.key] = self._keys.get(record.key, 0) + 1 + record.retries
+            if record.status is None:
+                return
+            counts["bytes"] += record.size
+            counts["repaired"] += record.repaired
+            self._latency.setdefault(record.endpoint, []).append(record.latency)
+            self._decode.setdefault(record.endpoint, []).append(record.decode_time)
+
+    def quota_used(self) -> dict:
+        """return: requests sent with each API key since the last reset, keyed by masked key, see mask_key"""
+        with self._lock:
+            return dict(self._keys)
+
+    def report(self) -> dict:
+        """Summarizes the records received since the last reset
+
+        return: dictionary with keys endpoints, builds and keys. Each endpoint has its call counts, total bytes,
+        errors by exception name, and p50/p90/p99/max of latency and decode time in seconds. Each model has the same
+        percentiles of its build time, and keys holds the requests sent per masked key, as quota_used."""
+        with self._lock:
+            endpoints = {}
+            for endpoint, counts in self._endpoints.items():
+                endpoints[endpoint] = dict(counts, errors=dict(counts["errors"]),
+                                           latency=_summary(self._latency.get(endpoint, [])),
+                                           decode_time=_summary(self._decode.get(endpoint, [])))
+            builds = {model: _summary(durations) for model, durations in self._builds.items()}
+            return {"endpoints": endpoints, "builds": builds, "keys": dict(self._keys)}
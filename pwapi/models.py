@@ -7,12 +7,197 @@ NationsStub - individual nation data from Nations API
 BaseNation - Parent class for Nation and Member
 Nation - represents in-game nation from Nation API Data
 Member - represents a member nation from the Alliance_Member API
-CompleteMember - Combines Nation and Member class to provide all accessible nation data
+CompleteMember - Combines Nation and Member data to provide all accessible nation data
+Stockpile - resource stockpile of a member nation, held by Member and CompleteMember
+Project - flags for the national projects a nation has built
 """
-
+import enum
+import operator
 from pwapi import formulas
 
 
+class Project(enum.IntFlag):
+    """National projects, as bit flags of BaseNation.project_flags. Names match the keys of BaseNation.projects"""
+    BW = 1 << 0
+    IW = 1 << 1
+    AS = 1 << 2
+    EGR = 1 << 3
+    MI = 1 << 4
+    ITC = 1 << 5
+    MLP = 1 << 6
+    NRF = 1 << 7
+    ID = 1 << 8
+    VDS = 1 << 9
+    UEP = 1 << 10
+    IA = 1 << 11
+    PB = 1 << 12
+    CCE = 1 << 13
+
+
+# API key of each project flag
+_project_keys = ((Project.BW, "bauxiteworks"), (Project.IW, "ironworks"), (Project.AS, "armsstockpile"),
+                 (Project.EGR, "emgasreserve"), (Project.MI, "massirrigation"), (Project.ITC, "inttradecenter"),
+                 (Project.NRF, "nuclearresfac"), (Project.ID, "irondome"), (Project.VDS, "vitaldefsys"),
+                 (Project.UEP, "uraniumenrich"), (Project.IA, "intagncy"), (Project.PB, "propbureau"),
+                 (Project.CCE, "cenciveng"))
+
+
+def decode_projects(data: dict) -> int:
+    """Decodes the project booleans shared by Nation and Alliance_Members API data
+
+    return: bitmask of Project flags"""
+    # Nation API bizarrely returns project booleans as strings of ints, and names one project differently
+    if "missilelpad" in data:
+        missile_pad = data["missilelpad"]
+    else:
+        missile_pad = data["missilepad"]
+    flags = Project.MLP if int(missile_pad) else 0
+    for flag, key in _project_keys:
+        if int(data[key]):
+            flags |= flag
+    return int(flags)
+
+
+def _flag(value) -> bool:
+    return bool(int(value))
+
+
+def _int_list(values) -> list:
+    return [int(value) for value in values]
+
+
+# Attributes decoded from the API data by each model, shared with the lazy models of pwapi.lazy. Each attribute maps to
+# the API key of its value and a converter, which may be None. The key is a tuple of two names for values the APIs
+# return under either name, and None for converters taking the whole data.
+
+# The Nation API returns several shared attributes with different types, and sometimes different names, than are
+# used in Nations or Alliance_Members. Hence the retyping and alternative keys
+stub_fields = {"nation_id": ("nationid", int),
+               "nation_name": (("nation", "name"), None),
+               "leader_name": (("leadername", "leader"), None),
+               "war_policy": ("war_policy", None),
+               "color": ("color", None),
+               "alliance_name": ("alliance", None),
+               "alliance_id": ("allianceid", int),
+               "alliance_position": ("allianceposition", int),
+               "city_count": ("cities", None),
+               "infrastructure": (("infrastructure", "totalinfrastructure"), float),
+               "offensive_war_count": ("offensivewars", None),
+               "defensive_war_count": ("defensivewars", None),
+               "score": ("score", float),
+               "vacation_mode": (("vacmode", "vmode"), _flag),
+               "minutes_inactive": ("minutessinceactive", None)}
+
+# Nation API returns military values as strings. One int of Project flags rather than a dict of bools per nation
+base_fields = {"soldiers": ("soldiers", int),
+               "tanks": ("tanks", int),
+               "aircraft": ("aircraft", int),
+               "ships": ("ships", int),
+               "missiles": ("missiles", int),
+               "nukes": ("nukes", int),
+               "project_flags": (None, decode_projects)}
+
+# cities stores related city objects that may be created, keyed by city name, and wars lists of war objects. The
+# numeric attributes from latitude on are returned by the API as strings
+nation_fields = {"nation_title": ("prename", None),
+                 "continent": ("continent", None),
+                 "social_policy": ("socialpolicy", None),
+                 "unique_id": ("uniqueid", None),
+                 "government": ("government", None),
+                 "domestic_policy": ("domestic_policy", None),
+                 "date_created": ("founded", None),
+                 "days_old": ("daysold", None),
+                 "flag_url": ("flagurl", None),
+                 "ruler_title": ("title", None),
+                 "economic_policy": ("ecopolicy", None),
+                 "approval_rating": ("approvalrating", None),
+                 "nation_rank": ("nationrank", None),
+                 "city_ids": ("cityids", _int_list),
+                 "cities": (None, lambda data: {}),
+                 "wars": (None, lambda data: {"offensive": [], "defensive": []}),
+                 "land": ("landarea", None),
+                 "latitude": ("latitude", float),
+                 "longitude": ("longitude", float),
+                 "population": ("population", int),
+                 "gdp": ("gdp", float),
+                 "soldiers_lost": ("soldiercasualties", int),
+                 "soldiers_killed": ("soldierskilled", int),
+                 "tanks_lost": ("tankcasualties", int),
+                 "tanks_killed": ("tankskilled", int),
+                 "aircraft_lost": ("aircraftcasualties", int),
+                 "aircraft_killed": ("aircraftkilled", int),
+                 "ships_lost": ("shipcasualties", int),
+                 "ships_killed": ("shipskilled", int),
+                 "missiles_launched": ("missilelaunched", int),
+                 "missiles_eaten": ("missileseaten", int),
+                 "nukes_launched": ("nukeslaunched", int),
+                 "nukes_eaten": ("nukeseaten", int),
+                 "infrastructure_destroyed": ("infdesttot", float),
+                 "infrastructure_lost": ("infraLost", float),
+                 "money_looted": ("moneyLooted", float),
+                 "offensive_war_ids": ("offensivewar_ids", _int_list),
+                 "defensive_war_ids": ("defensivewar_ids", _int_list),
+                 "beige_turns": ("beige_turns_left", None),
+                 "radiation": ("radiation_index", None),
+                 "season": ("season", None),
+                 "espionage_available": ("espionage_available", None)}
+
+def field_decoder(key, convert=None):
+    """Function decoding one attribute from API data, as given by a field table
+
+    :param key: API key of the value, a tuple of two keys for values the APIs return under either name, or None to
+        pass the whole data to convert
+    :param convert: optional function converting the value"""
+    if key is None:
+        return convert
+    if isinstance(key, tuple):
+        first, second = key
+        if convert is None:
+            return lambda data: data[first] if first in data else data[second]
+        return lambda data: convert(data[first] if first in data else data[second])
+    if convert is None:
+        return operator.itemgetter(key)
+    return lambda data: convert(data[key])
+
+
+def _getter(keys):
+    """Function returning the tuple of the values of keys"""
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda data: (data[key],)
+    return operator.itemgetter(*keys)
+
+
+class _Decoder:
+    """Sets the slots of a class from API data, as given by a field table
+
+    Values under a single key are fetched and converted in batches sharing a converter, which keeps the eager models
+    about as fast to build as with one assignment per attribute."""
+
+    __slots__ = ["batches", "others"]
+
+    def __init__(self, cls, fields: dict):
+        batches = {}
+        self.others = []
+        for name, (key, convert) in fields.items():
+            setter = vars(cls)[name].__set__
+            if isinstance(key, str):
+                keys, setters = batches.setdefault(convert, ([], []))
+                keys.append(key)
+                setters.append(setter)
+            else:
+                self.others.append((setter, field_decoder(key, convert)))
+        self.batches = [(_getter(keys), convert, setters) for convert, (keys, setters) in batches.items()]
+
+    def __call__(self, model, data: dict) -> None:
+        for getter, convert, setters in self.batches:
+            values = getter(data) if convert is None else map(convert, getter(data))
+            for setter, value in zip(setters, values):
+                setter(model, value)
+        for setter, decode in self.others:
+            setter(model, decode(data))
+
+
 class NationStub:
     """Representation of Nations API data
 
@@ -34,47 +219,17 @@ class NationStub:
         Args:
             :param data (dict): Dictionary containing nation data from the Nations, Nation, or Alliance_Members API"""
 
-        # The Nation API returns several shared attributes with different types, and sometimes different names,
-        # than are used in Nations or Alliance_Members. Hence retyping or logic looking for specific keys
-        self.nation_id = int(data['nationid'])
-        if "nation" in data:
-            self.nation_name = data["nation"]
-        else:
-            self.nation_name = data["name"]
-        if "leadername" in data:
-            self.leader_name = data["leadername"]
-        else:
-            self.leader_name = data["leader"]
-        self.war_policy = data["war_policy"]
-        self.color = data["color"]
-        self.alliance_name = data["alliance"]
-        self.alliance_id = int(data["allianceid"])
-        self.alliance_position = int(data["allianceposition"])
-        self.city_count = data["cities"]
-        if "infrastructure" in data:
-            self.infrastructure = float(data["infrastructure"])
-        else:
-            self.infrastructure = float(data["totalinfrastructure"])
-        self.offensive_war_count = data["offensivewars"]
-        self.defensive_war_count = data["defensivewars"]
-        self.score = float(data["score"])
-        if "vacmode" in data:
-            self.vacation_mode = bool(int(data["vacmode"]))
-        else:
-            self.vacation_mode = bool(int(data["vmode"]))
-        self.minutes_inactive = data["minutessinceactive"]
+        _decode_stub(self, data)
 
     def war_range(self):
         """Returns the war range for this nation
 
         return: A dictionary of war ranges. Keys: offensive, defensive. Each is its own dict with keys max, min
         representing the war range"""
-        offensive = {"max": self.score * 1.75,
-                     "min": self.score * .75}
-        defensive = {"max": self.score / .75,
-                     "min": self.score / 1.75}
+        return formulas.war_range(self.score)
 
-        return {"offensive": offensive, "defensive": defensive}
+
+_decode_stub = _Decoder(NationStub, stub_fields)
 
 
 class BaseNation(NationStub):
@@ -83,7 +238,7 @@ class BaseNation(NationStub):
     BaseNation extends NationsStub with more attributes shared between Nation and Alliance_Members API endpoints, but
     which are not included in Nations."""
 
-    __slots__ = ["soldiers", "tanks", "aircraft", "ships", "missiles", "nukes", "projects"]
+    __slots__ = ["soldiers", "tanks", "aircraft", "ships", "missiles", "nukes", "project_flags"]
 
     def __init__(self, data: dict):
         """Init with API data
@@ -93,31 +248,20 @@ class BaseNation(NationStub):
         Methods
         ------------------
 
-        militarization - returns a dictionary of militarization levels"""
+        militarization - returns a dictionary of militarization levels
+        has_project - returns whether the nation has built a project"""
 
         super(BaseNation, self).__init__(data)
-        # Nation API returns military values as strings
-        self.soldiers = int(data["soldiers"])
-        self.tanks = int(data["tanks"])
-        self.aircraft = int(data["aircraft"])
-        self.ships = int(data["ships"])
-        self.missiles = int(data["missiles"])
-        self.nukes = int(data["nukes"])
-        # Nation API bizarrely returns project booleans as strings of ints
-        self.projects = {"bw": bool(int(data["bauxiteworks"])),
-                         "iw": bool(int(data["ironworks"])),
-                         "as": bool(int(data["armsstockpile"])),
-                         "egr": bool(int(data["emgasreserve"])),
-                         "mi": bool(int(data["massirrigation"])),
-                         "itc": bool(int(data["inttradecenter"])),
-                         "mlp": bool(int(data["missilelpad"])),
-                         "nrf": bool(int(data["nuclearresfac"])),
-                         "id": bool(int(data["irondome"])),
-                         "vds": bool(int(data["vitaldefsys"])),
-                         "uep": bool(int(data["uraniumenrich"])),
-                         "ia": bool(int(data["intagncy"])),
-                         "pb": bool(int(data["propbureau"])),
-                         "cce": bool(int(data["cenciveng"]))}
+        _decode_base(self, data)
+
+    @property
+    def projects(self) -> dict:
+        """Dictionary of bools keyed by project abbreviation (bw, iw, as...), built from project_flags"""
+        return {flag.name.lower(): bool(self.project_flags & flag) for flag in Project}
+
+    def has_project(self, project: Project) -> bool:
+        """Returns whether the nation has built the given project, e.g. has_project(Project.IW)"""
+        return bool(self.project_flags & project)
 
     def militarization(self):
         """ Calculates the nation's militarization levels
@@ -127,6 +271,9 @@ class BaseNation(NationStub):
         return formulas.militarization(self.city_count, self.soldiers, self.tanks, self.aircraft, self.ships)
 
 
+_decode_base = _Decoder(BaseNation, base_fields)
+
+
 class Nation(BaseNation):
     """ Object representing a PW Nation as given by the Nation API"""
 
@@ -141,78 +288,30 @@ class Nation(BaseNation):
 
     def __init__(self, data: dict):
         super(Nation, self).__init__(data)
-        self.nation_title = data["prename"]
-        self.continent = data["continent"]
-        self.social_policy = data["socialpolicy"]
-        self.unique_id = data["uniqueid"]
-        self.government = data["government"]
-        self.domestic_policy = data["domestic_policy"]
-        self.date_created = data["founded"]
-        self.days_old = data["daysold"]
-        self.flag_url = data["flagurl"]
-        self.ruler_title = data["title"]
-        self.economic_policy = data["ecopolicy"]
-        self.approval_rating = data["approvalrating"]
-        self.nation_rank = data["nationrank"]
-        self.city_ids = [int(city_id) for city_id in data["cityids"]]
-        # Dict to store related city objects that may be created. Key = city name.
-        self.cities = {}
-        # Dict to store list of war objects
-        self.wars = {"offensive": [], "defensive": []}
-        self.land = data["landarea"]
-        # All of the following numeric attributes are returned by the API as strings
-        self.latitude = float(data["latitude"])
-        self.longitude = float(data["longitude"])
-        self.population = int(data["population"])
-        self.gdp = float(data["gdp"])
-        self.soldiers_lost = int(data["soldiercasualties"])
-        self.soldiers_killed = int(data["soldierskilled"])
-        self.tanks_lost = int(data["tankcasualties"])
-        self.tanks_killed = int(data["tankskilled"])
-        self.aircraft_lost = int(data["aircraftcasualties"])
-        self.aircraft_killed = int(data["aircraftkilled"])
-        self.ships_lost = int(data["shipcasualties"])
-        self.ships_killed = int(data["shipskilled"])
-        self.missiles_launched = int(data["missilelaunched"])
-        self.missiles_eaten = int(data["missileseaten"])
-        self.nukes_launched = int(data["nukeslaunched"])
-        self.nukes_eaten = int(data["nukeseaten"])
-        self.infrastructure_destroyed = float(data["infdesttot"])
-        self.infrastructure_lost = float(data["infraLost"])
-        self.money_looted = float(data["moneyLooted"])
-        self.offensive_war_ids = [int(war_id) for war_id in data["offensivewar_ids"]]
-        self.defensive_war_ids = [int(war_id) for war_id in data["defensivewar_ids"]]
-        self.beige_turns = data["beige_turns_left"]
-        self.radiation = data["radiation_index"]
-        self.season = data["season"]
-        self.espionage_available = data["espionage_available"]
-
-    def get_wars(self):
-        offensive = []
-        for war_id in self.offensive_war_ids:
-            war = get_war(war_id)
-            offensive.append(war)
-        defensive = []
-        for war_id in self.defensive_war_ids:
-            war = get_war(war_id)
-            defensive.append(war)
-
-
-class Member(BaseNation):
-    """ Object representing a member nation, as given by the alliance_members API """
+        _decode_nation(self, data)
+
+    def get_wars(self, key=None, workers: int = 8) -> dict:
+        """Fetches the nation's wars and stores them in self.wars
 
-    # Due to multiple inheritence issues with subclass CompleteMember, this class cannot use slots.
-
-    # *args represents the optional dict for nation API data, passed into Nation class as part of the multiple
-    # inheritence chain of CompleteMember
-    def __init__(self, data, *args: dict):
-        # Different data is sent to different parent classes depending on if this is being instantiated, or called as
-        # a super class
-        if args:
-            super(Member, self).__init__(*args)
-        else:
-            super(Member, self).__init__(data)
-        self.city_cooldown = data['cityprojecttimerturns']
+        :param key: API key. Defaults to a key from pwapi.api.key_pool
+        :param workers: maximum number of wars fetched concurrently
+        return: the wars dictionary. Keys: offensive, defensive. Each is a list of War objects"""
+        # imported here as pwapi.api imports this module
+        from pwapi import api
+        api.load_nation_wars([self], key, workers=workers)
+        return self.wars
+
+
+_decode_nation = _Decoder(Nation, nation_fields)
+
+
+class Stockpile:
+    """Resources held by a member nation, as given by the Alliance_Members API"""
+
+    __slots__ = ["money", "food", "uranium", "coal", "oil", "bauxite", "lead", "iron", "gasoline", "munitions",
+                 "aluminum", "steel", "credits"]
+
+    def __init__(self, data: dict):
         # all numerical values are returned by the API as strings
         self.money = float(data["money"])
         self.food = float(data["food"])
@@ -227,14 +326,60 @@ class Member(BaseNation):
         self.aluminum = float(data["aluminum"])
         self.steel = float(data["steel"])
         self.credits = float(data["credits"])
-        self.spies = float(data["spies"])
 
 
-class CompleteMember(Member, Nation):
-    """ Representation of all available data about a nation, combining Nation API and members API data."""
+member_fields = {"city_cooldown": ("cityprojecttimerturns", None),
+                 "stockpile": (None, Stockpile),
+                 "spies": ("spies", float)}
+
+def _stockpile_property(name):
+    def get(self):
+        return getattr(self.stockpile, name)
+
+    def set(self, value):
+        setattr(self.stockpile, name, value)
+
+    return property(get, set, doc=f"Member's {name}, held by its stockpile")
+
+
+class _MemberData:
+    """Attributes only given by the Alliance_Members API, shared by Member and CompleteMember
+
+    Has no slots of its own, so that it can be mixed into both slotted classes. Each resource of the member's
+    Stockpile is also readable as an attribute of the member, e.g. member.money."""
+
+    __slots__ = []
+
+
+for _name in Stockpile.__slots__:
+    setattr(_MemberData, _name, _stockpile_property(_name))
+del _name
+
+
+class Member(_MemberData, BaseNation):
+    """ Object representing a member nation, as given by the alliance_members API """
+
+    __slots__ = ["city_cooldown", "stockpile", "spies"]
+
+    def __init__(self, data: dict):
+        super(Member, self).__init__(data)
+        _decode_member(self, data)
+
+
+class CompleteMember(_MemberData, Nation):
+    """ Representation of all available data about a nation, combining Nation API and members API data.
+
+    Nation API data is used for every attribute it has, and members API data for the rest."""
+
+    __slots__ = ["city_cooldown", "stockpile", "spies"]
 
     def __init__(self, member_data, nation_data):
-        super(CompleteMember, self).__init__(member_data, nation_data)
+        super(CompleteMember, self).__init__(nation_data)
+        _decode_complete_member(self, member_data)
+
+
+_decode_member = _Decoder(Member, member_fields)
+_decode_complete_member = _Decoder(CompleteMember, member_fields)
 
 
 class War:
@@ -247,11 +392,14 @@ class War:
     def __init__(self, data, war_id):
         # The War API is bugged to always return war_id as 0, so it gets passed in by the get_war function instead
         self.war_id: int = war_id
-        self.ongoing = data["war_ended"]
+        self.ongoing = not data["war_ended"]
         self.start_date = data["date"]
-        self.attacker_id = data["aggressor_id"]
+        self.attacker_id = int(data["aggressor_id"])
         self.attacker_alliance = data["aggressor_alliance"]
         self.attacker_is_applicant = data["aggressor_is_applicant"]
-        self.defender_id = data["defender_id"]
+        self.defender_id = int(data["defender_id"])
+        self.defender_alliance = data["defender_alliance"]
+        self.defender_is_applicant = data["defender_is_applicant"]
         self.attacker_offering_peace = data["aggressor_offering_peace"]
+        self.war_reason = data["war_reason"]
         self.ground_control = data["ground_control"]
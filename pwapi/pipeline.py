@@ -0,0 +1,196 @@
+"""Parallel sweeps fetching on a thread pool and decoding on a process pool
+
+Fetching is I/O bound and runs on threads, while decoding, repairing and validating the JSON and building the models is
+CPU bound and runs in worker processes, so a sweep over many alliances or nations uses every core. Only the raw
+response bytes are sent to the workers, and the models come back packed as one tuple per model, which pickles far
+smaller and faster than the objects themselves:
+
+    with Pipeline(io_workers=16) as pipeline:
+        for alliance_id, result in pipeline.alliances(alliance_ids):
+            if isinstance(result, Exception):
+                ...
+            for member in result:
+                ...
+
+Classes
+--------
+
+PackedModels - picklable, compact list of models of one class, unpacked on access
+Pipeline - thread pool for requests feeding a process pool for parsing, yielding results in order
+
+Functions
+--------
+
+fetch_bytes - calls an endpoint under pwapi.api.pw_api, returning the raw response body
+parse - decodes, validates and builds models from a raw response body
+"""
+import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.decoders import get_decoder
+from pwapi.models import Member, Nation
+from pwapi.requests import call_api_bytes, repair_json, validate_api_data
+
+
+def _slots(cls) -> tuple:
+    """Names of every slot of a class, base classes first"""
+    names = []
+    for klass in reversed(cls.__mro__):
+        names.extend(name for name in vars(klass).get("__slots__", ()) if name not in names)
+    return tuple(names)
+
+
+class PackedModels:
+    """Models of one slotted class, held as one tuple of attribute values per model
+
+    Iterating or indexing builds the model objects, without repeating any decoding."""
+
+    __slots__ = ["cls", "fields", "rows"]
+
+    def __init__(self, cls, fields: tuple, rows: list):
+        self.cls = cls
+        self.fields = fields
+        self.rows = rows
+
+    @classmethod
+    def pack(cls, models, model_cls) -> "PackedModels":
+        fields = _slots(model_cls)
+        return cls(model_cls, fields, [tuple(getattr(model, name) for name in fields) for model in models])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return self._unpack(self.rows[i], self._setters())
+
+    def __iter__(self):
+        setters = self._setters()
+        for row in self.rows:
+            yield self._unpack(row, setters)
+
+    def column(self, name: str) -> list:
+        """Values of one attribute for every model, without building the models"""
+        position = self.fields.index(name)
+        return [row[position] for row in self.rows]
+
+    def _setters(self):
+        return [getattr(self.cls, name).__set__ for name in self.fields]
+
+    def _unpack(self, row, setters):
+        model = self.cls.__new__(self.cls)
+        for setter, value in zip(setters, row):
+            setter(model, value)
+        return model
+
+
+_decoder = get_decoder()
+
+
+def _decode(body: bytes) -> dict:
+    try:
+        return _decoder.loads(body)
+    except ValueError:
+        return repair_json(body, _decoder.loads)
+
+
+def parse(body: bytes, cls, many: bool) -> PackedModels:
+    """Decodes a raw response body and builds its models, as call_api and the pwapi.api functions would
+
+    Runs in the worker processes.
+
+    :param cls: slotted model class, e.g. Member or Nation
+    :param many: build one model per item of the nations array, as for Alliance_Members, rather than one model from
+        the whole payload, as for Nation"""
+    data = _decode(body)
+    validate_api_data(data)
+    models = [cls(row) for row in data["nations"]] if many else [cls(data)]
+    return PackedModels.pack(models, cls)
+
+
+def fetch_bytes(path: str, key: str = None, client: APIClient = None) -> bytes:
+    """Calls an endpoint under pwapi.api.pw_api, like pwapi.api.call_endpoint, without decoding the response
+
+    The call goes through the client's cache, hooks, coalescer and Resilience as with call_api_bytes, which raises API
+    errors, so a key from pwapi.api.key_pool that hit its limit is retired and the call repeated with the next key."""
+    if key is not None:
+        return call_api_bytes(f"{api.pw_api}/{path}&key={key}", client)
+    return api.key_pool.call(lambda pool_key: call_api_bytes(f"{api.pw_api}/{path}&key={pool_key}", client))
+
+
+class Pipeline:
+    """Fetches endpoints on a thread pool and parses the responses on a process pool
+
+    Results are yielded in the order of the input, each as soon as it and every earlier one is ready. An error
+    fetching or parsing one item is yielded in place of its result rather than raised."""
+
+    def __init__(self, client: APIClient = None, io_workers: int = 8, processes: int = None, window: int = None):
+        """
+        :param client: APIClient for the requests. Defaults to pwapi.requests.default_client
+        :param io_workers: maximum number of requests in flight
+        :param processes: number of worker processes. Defaults to the number of CPUs
+        :param window: maximum number of items fetched ahead of the consumer. Defaults to 4 * io_workers"""
+        self.client = client
+        self.window = window or 4 * io_workers
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="pwapi-pipeline")
+        self._processes = ProcessPoolExecutor(max_workers=processes)
+
+    def run(self, paths, cls, many: bool, key: str = None):
+        """Fetches and parses many endpoints
+
+        :param paths: iterable of (item_id, endpoint path) tuples, e.g. (615, "alliance-members/?allianceid=615")
+        :param cls: model class to build
+        :param many: whether each response holds a nations array of models, see parse
+        return: generator of (item_id, result) tuples in input order. result is a PackedModels, or the exception
+            raised fetching or parsing the item"""
+        pending = collections.deque()
+        paths = iter(paths)
+
+        def fetch_and_submit(path):
+            # parsing is submitted from the fetching thread, so fetching carries on while the consumer waits
+            body = fetch_bytes(path, key, self.client)
+            return self._processes.submit(parse, body, cls, many)
+
+        def fill():
+            while len(pending) < self.window:
+                item = next(paths, None)
+                if item is None:
+                    return
+                item_id, path = item
+                pending.append((item_id, self._io.submit(fetch_and_submit, path)))
+
+        fill()
+        while pending:
+            item_id, fetched = pending.popleft()
+            try:
+                result = fetched.result().result()
+            except Exception as e:
+                result = e
+            fill()
+            yield item_id, result
+
+    def alliances(self, alliance_ids, key: str = None, cls=Member):
+        """Fetches the members of many alliances
+
+        return: generator of (alliance_id, PackedModels of Member objects or exception) tuples, in input order"""
+        paths = ((alliance_id, f"alliance-members/?allianceid={alliance_id}") for alliance_id in alliance_ids)
+        return self.run(paths, cls, True, key)
+
+    def nations(self, nation_ids, key: str = None, cls=Nation):
+        """Fetches many nations
+
+        return: generator of (nation_id, result) tuples, in input order. result is the Nation, or the exception
+            raised fetching it"""
+        paths = ((nation_id, f"nation/id={nation_id}") for nation_id in nation_ids)
+        for nation_id, result in self.run(paths, cls, False, key):
+            yield nation_id, result if isinstance(result, Exception) else result[0]
+
+    def close(self) -> None:
+        self._io.shutdown()
+        self._processes.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
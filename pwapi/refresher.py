@@ -0,0 +1,240 @@
+"""Background refreshing of an in-memory store of nations
+
+Classes
+--------
+
+NationStore - thread-safe store of the latest model of each nation, read without ever touching the network
+Refresher - keeps a NationStore current, refreshing busy nations more often than dormant ones, within a quota budget
+
+Functions
+--------
+
+refresh_interval - default policy deciding how often a nation is refreshed
+"""
+import heapq
+import itertools
+import threading
+import time
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.exceptions import InvalidRequest
+from pwapi.models import NationStub
+from pwapi.scheduler import KeyPool, Scheduler
+
+# Seconds between refreshes of each kind of nation, most urgent first. A game turn is two hours.
+default_intervals = {"war": 120,
+                     "beige": 120,
+                     "active": 600,
+                     "idle": 3600,
+                     "dormant": 6 * 3600}
+
+# Seconds before retrying a nation whose refresh failed
+retry_interval = 60
+
+
+def refresh_interval(nation: NationStub, intervals: dict = None) -> float:
+    """Decides how long a nation's data stays fresh enough
+
+    Nations at war or leaving beige within a turn change the most, then recently active nations, then idle ones.
+
+    :param nation: NationStub, Nation or Member
+    :param intervals: dictionary like default_intervals
+    return: seconds until the nation should be refreshed"""
+    intervals = intervals or default_intervals
+    if nation.offensive_war_count or nation.defensive_war_count:
+        return intervals["war"]
+    # beige_turns is only known for Nation objects
+    if 0 < getattr(nation, "beige_turns", 0) <= 1:
+        return intervals["beige"]
+    if nation.vacation_mode or nation.minutes_inactive > 7 * 24 * 60:
+        return intervals["dormant"]
+    if nation.minutes_inactive > 24 * 60:
+        return intervals["idle"]
+    return intervals["active"]
+
+
+class NationStore:
+    """Latest model of each nation and when it was fetched, safe to read from any thread"""
+
+    def __init__(self):
+        self._nations = {}
+        self._refreshed = {}
+        self._lock = threading.Lock()
+
+    def get(self, nation_id: int) -> NationStub:
+        """return: the stored model, or None if the nation has not been loaded yet"""
+        with self._lock:
+            return self._nations.get(nation_id)
+
+    def put(self, nation: NationStub, refreshed: float = None) -> None:
+        """:param refreshed: time the data was fetched, in seconds since the epoch. Defaults to now"""
+        with self._lock:
+            self._nations[nation.nation_id] = nation
+            self._refreshed[nation.nation_id] = time.time() if refreshed is None else refreshed
+
+    def remove(self, nation_id: int) -> None:
+        with self._lock:
+            self._nations.pop(nation_id, None)
+            self._refreshed.pop(nation_id, None)
+
+    def age(self, nation_id: int) -> float:
+        """return: seconds since the nation was fetched, or None if it has not been loaded yet"""
+        with self._lock:
+            refreshed = self._refreshed.get(nation_id)
+        return None if refreshed is None else time.time() - refreshed
+
+    def snapshot(self) -> dict:
+        """return: a copy of the stored models, keyed by nation ID"""
+        with self._lock:
+            return dict(self._nations)
+
+    def __contains__(self, nation_id):
+        with self._lock:
+            return nation_id in self._nations
+
+    def __len__(self):
+        with self._lock:
+            return len(self._nations)
+
+
+class Refresher:
+    """Refreshes tracked nations in the background, so reads from its store never wait for the network
+
+    Each nation is refreshed again after the interval the policy gives for its latest data. Due refreshes are queued
+    on a Scheduler with the interval as priority, so when the quota budget cannot keep up, nations with the shortest
+    intervals are refreshed first and dormant nations fall behind. A failed refresh keeps the previous data and is
+    retried after retry_interval; nations that no longer exist are dropped.
+
+        refresher = Refresher(KeyPool([key]), daily_budget=1500)
+        refresher.track([31191, 33841])
+        refresher.start()
+        nation = refresher.store.get(31191)"""
+
+    def __init__(self, keys: KeyPool, daily_budget: int = None, workers: int = 4, client: APIClient = None,
+                 fetch=None, policy=refresh_interval, store: NationStore = None):
+        """
+        :param keys: KeyPool supplying the keys
+        :param daily_budget: maximum calls per day, spread evenly. Defaults to the pool's remaining calls for today
+        :param workers: number of refreshes in flight
+        :param client: APIClient for the requests
+        :param fetch: function(nation_id, key, client) returning a fresh model. Defaults to pwapi.api.get_nation
+        :param policy: function(model) returning seconds until the nation should be refreshed
+        :param store: NationStore to keep current. Defaults to a new store"""
+        budget = daily_budget if daily_budget is not None else keys.remaining()
+        self.scheduler = Scheduler(keys, rate=max(budget, 1) / 86400, burst=workers, workers=workers)
+        self.client = client
+        self.fetch = fetch or api.get_nation
+        self.policy = policy
+        self.store = store or NationStore()
+        self.errors = {}
+        self._due = {}
+        self._queue = []
+        self._queued = set()
+        self._order = itertools.count()
+        self._changed = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def track(self, nation_ids) -> None:
+        """Starts refreshing nations. Nations not in the store yet are loaded as soon as possible"""
+        with self._changed:
+            for nation_id in nation_ids:
+                if nation_id not in self._due:
+                    self._schedule(nation_id, 0)
+            self._changed.notify()
+
+    def load(self, nations) -> None:
+        """Adds already fetched models to the store and tracks them, e.g. the result of get_alliance_members"""
+        with self._changed:
+            for nation in nations:
+                self.store.put(nation)
+                self._schedule(nation.nation_id, self.policy(nation))
+            self._changed.notify()
+
+    def untrack(self, nation_id: int) -> None:
+        """Stops refreshing a nation. Its last data stays in the store"""
+        with self._changed:
+            self._due.pop(nation_id, None)
+
+    def refresh_now(self, nation_id: int) -> None:
+        """Moves a tracked nation's next refresh to now"""
+        with self._changed:
+            if nation_id in self._due:
+                self._schedule(nation_id, 0)
+                self._changed.notify()
+
+    def get(self, nation_id: int) -> NationStub:
+        """Latest data of a nation, or None if it has not been loaded yet. Never blocks on the network"""
+        return self.store.get(nation_id)
+
+    def failures(self) -> dict:
+        """return: a copy of the error of each nation whose last refresh failed, keyed by nation ID"""
+        with self._changed:
+            return dict(self.errors)
+
+    def start(self) -> "Refresher":
+        self._thread = threading.Thread(target=self._dispatch, name="pwapi-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Stops scheduling refreshes. Refreshes already queued are still made, and waited for if wait is True"""
+        with self._changed:
+            self._stopped = True
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.scheduler.shutdown(wait)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _schedule(self, nation_id, delay):
+        due = time.monotonic() + delay
+        self._due[nation_id] = due
+        heapq.heappush(self._queue, (due, next(self._order), nation_id))
+
+    def _dispatch(self):
+        with self._changed:
+            while not self._stopped:
+                now = time.monotonic()
+                while self._queue and self._queue[0][0] <= now:
+                    due, _, nation_id = heapq.heappop(self._queue)
+                    # skip entries superseded by a later _schedule, and nations already queued or untracked
+                    if self._due.get(nation_id) != due or nation_id in self._queued:
+                        continue
+                    self._queued.add(nation_id)
+                    nation = self.store.get(nation_id)
+                    priority = self.policy(nation) if nation is not None else 0
+                    future = self.scheduler.submit(self._refresh, nation_id, priority=priority)
+                    future.add_done_callback(lambda future, nation_id=nation_id: self._done(nation_id, future))
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._changed.wait(timeout)
+
+    def _refresh(self, nation_id, key):
+        return self.fetch(nation_id, key, self.client)
+
+    def _done(self, nation_id, future):
+        error = future.exception()
+        if error is None:
+            nation = future.result()
+            self.store.put(nation)
+        with self._changed:
+            if error is None:
+                self.errors.pop(nation_id, None)
+            else:
+                self.errors[nation_id] = error
+            self._queued.discard(nation_id)
+            if nation_id not in self._due:
+                return
+            if error is None:
+                self._schedule(nation_id, self.policy(nation))
+            elif isinstance(error, InvalidRequest):
+                del self._due[nation_id]
+                self.store.remove(nation_id)
+            else:
+                self._schedule(nation_id, retry_interval)
+            self._changed.notify()
@@ -1,27 +1,168 @@
 """ Functions that make http requests to the PW servers"""
-import requests
 import json
+import re
+import time
+from pwapi import metrics
+from pwapi.cache import normalize_url
+from pwapi.client import APIClient
 from pwapi.exceptions import *
 
+# client used by call_api when none is passed in, shared so that every call reuses the same connection pool
+default_client = APIClient()
 
-def call_api(url: str) -> dict:
-    """Calls a given PW API endpoint"""
+_decoder = json.JSONDecoder()
+# Tokens of the repair scan: a run of anything but brackets, strings included, then {, [, a closing bracket, or a comma
+# directly followed by another one. Strings are matched whole, so brackets and commas inside them are never tokens
+_token = re.compile(r'(?:[^"{}\[\],]+|"[^"\\]*(?:\\.[^"\\]*)*"|,(?!\s*,))+|(\{)|(\[)|([}\]])|(,)')
+_token_bytes = re.compile(_token.pattern.encode())
+# Bodies without any doubled comma, even inside strings, only need their trailing garbage cut, which the decoder does
+_doubled_comma = re.compile(r",\s*,")
+# Keys of the API error messages, see validate_api_data. Raw bodies holding neither are not decoded by call_api_bytes
+_error_keys = (b'"general_message"', b'"error"')
 
-    r = requests.get(url)
+
+def call_api(url: str, client: APIClient = None) -> dict:
+    """Calls a given PW API endpoint
+
+    :param url: full endpoint URL, including the key
+    :param client: optional APIClient to send the request through. Defaults to default_client"""
+    return _instrumented(url, client, False)
+
+
+def call_api_bytes(url: str, client: APIClient = None) -> bytes:
+    """Calls a given PW API endpoint like call_api, returning the response body without decoding it
+
+    Bodies that may hold an API error message are decoded and validated, raising the same exceptions as call_api.
+    Responses are taken from the client's cache, re-encoded, but not added to it, as the cache holds decoded data.
+
+    :param url: full endpoint URL, including the key
+    :param client: optional APIClient to send the request through. Defaults to default_client"""
+    return _instrumented(url, client, True)
+
+
+def _instrumented(url, client, raw):
+    """Body of call_api and call_api_bytes, recording the call for the client's hooks if it has any"""
+    if client is None:
+        client = default_client
+    if not client.hooks:
+        return _call(url, client, None, raw)
+    record = metrics.CallRecord(url)
+    start = time.perf_counter()
+    try:
+        return _call(url, client, record, raw)
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.duration = time.perf_counter() - start
+        metrics.emit(client.hooks, record)
+
+
+def _call(url: str, client: APIClient, record, raw: bool = False):
+    """Sends the call through the client's cache and coalescer, filling in record as it goes when there is one"""
+    if client.cache is not None:
+        data = client.cache.get(url)
+        if data is not None:
+            if record is not None:
+                record.cached = True
+            return json.dumps(data).encode() if raw else data
+    if client.coalescer is None:
+        return _send(url, client, record, raw)
+    sent = []
+
+    def fetch():
+        # key errors are handed to the waiting calls along with the URL they were raised for, rather than raised
+        sent.append(True)
+        try:
+            return url, _send(url, client, record, raw), None
+        except APIKeyError as e:
+            return url, None, e
+
+    # raw bodies and decoded data are never shared with each other
+    sent_url, data, error = client.coalescer.call((normalize_url(url), raw), fetch)
+    if error is not None:
+        # calls are grouped without their keys, so an error with the leading call's key says nothing about ours
+        if sent or sent_url == url:
+            raise error
+        return _send(url, client, record, raw)
+    if record is not None and not sent:
+        record.coalesced = True
+    return data
+
+
+def _send(url: str, client: APIClient, record, raw: bool = False):
+    """_fetch, through the client's Resilience if it has one"""
+    if client.resilience is None:
+        return _fetch(url, client, record, raw)
+    if record is None:
+        return client.resilience.call(lambda: _fetch(url, client, None, raw))
+    # each request gets a record of its own, as abandoned attempts and hedged requests may still be running when the
+    # call returns
+    attempts = []
+
+    def attempt():
+        attempt_record = metrics.CallRecord(url)
+        attempts.append(attempt_record)
+        return _fetch(url, client, attempt_record, raw), attempt_record
+
+    sent = None
+    try:
+        data, sent = client.resilience.call(attempt)
+        return data
+    finally:
+        if attempts:
+            _copy_attempt(sent or attempts[-1], record)
+            record.retries = len(attempts) - 1 + sum(attempt_record.retries for attempt_record in attempts)
+
+
+def _copy_attempt(attempt_record, record) -> None:
+    """Fills in a call's record from the request whose response was used, or the last one sent if all failed"""
+    record.latency = attempt_record.latency
+    record.size = attempt_record.size
+    record.decode_time = attempt_record.decode_time
+    record.repaired = attempt_record.repaired
+    record.status = attempt_record.status
+
+
+def _fetch(url: str, client: APIClient, record, raw: bool = False):
+    """Sends the request and decodes and validates the response. A raw body is only decoded if it may be an error"""
+    if record is None:
+        r = client.get(url)
+    else:
+        start = time.perf_counter()
+        r = client.get(url)
+        record.latency = time.perf_counter() - start
+        record.status = r.status_code
+        record.size = len(r.content)
+        retries = getattr(r.raw, "retries", None)
+        record.retries += len(retries.history) if retries is not None else 0
     if not r.ok:
         r.raise_for_status()
+    body = r.content
+    if raw and not any(error_key in body for error_key in _error_keys):
+        return body
+    start = time.perf_counter()
     try:
-        data = r.json()
-    except json.JSONDecodeError:
-        fixed = fix_json(r.text)
-        data = json.loads(fixed)
+        data = client.decoder.loads(body)
+    except ValueError:
+        data = repair_json(body, client.decoder.loads)
+        if record is not None:
+            record.repaired = True
+    if record is not None:
+        record.decode_time = time.perf_counter() - start
     validate_api_data(data)
+    if raw:
+        return body
+    if client.cache is not None:
+        client.cache.put(url, data, len(body))
     return data
 
 
 def fix_json(text: str) -> str:
     """Fixes malformed JSON
 
+    Kept for callers that need the fixed text. call_api uses repair_json, which is faster and leaves strings intact.
+
     :param text: JSON string
     :return a fixed JSON string"""
 
@@ -30,7 +171,7 @@ def fix_json(text: str) -> str:
     fixed = False
     while not fixed:
         if attempts == 0:
-            raise RuntimeError(f"Couldn't fix bad JSON. Last error was: {current_error}")
+            raise MalformedJSON(f"Couldn't fix bad JSON. Last error was: {current_error}")
         attempts -= 1
         try:
             json.loads(text)
@@ -44,10 +185,70 @@ def fix_json(text: str) -> str:
             elif e.msg == "Expecting property name enclosed in double quotes":
                 text = text.replace(",,", ",")
             else:
-                raise RuntimeError(f"Unexpected error in returned JSON: {e}")
+                raise MalformedJSON(f"Unexpected error in returned JSON: {e}")
     return text
 
 
+def repair_json(text, loads=None):
+    """Decodes malformed JSON with at most one scan of the text and a single decode
+
+    The scan drops commas doubled between object members, leaving strings and arrays alone, and cuts off anything after
+    the top level object or array, so trailing garbage is never parsed. Text without doubled commas is decoded by the
+    standard library without a scan, as it stops at the end of the value.
+
+    With a loads function from another backend (see pwapi.decoders), the repaired bytes are decoded by that backend.
+
+    :param text: JSON string or bytes
+    :param loads: function decoding bytes, raising a ValueError for malformed JSON. Defaults to the standard library
+        decoder
+    :return the decoded object"""
+    if loads is not None and loads is not json.loads:
+        data = text if isinstance(text, bytes) else text.encode()
+        # other backends do not stop at the end of the value, so the trailing garbage has to be cut by the scan
+        fixed, dropped = _drop_commas(data, _token_bytes)
+        try:
+            return loads(fixed)
+        except ValueError as e:
+            error = e
+    else:
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+        fixed, dropped = _drop_commas(text, _token) if _doubled_comma.search(text) else (text, False)
+        try:
+            return _decoder.raw_decode(fixed, len(fixed) - len(fixed.lstrip()))[0]
+        except json.JSONDecodeError as e:
+            error = e
+    if dropped:
+        raise MalformedJSON(f"Couldn't fix bad JSON. Last error was: {error}")
+    raise MalformedJSON(f"Unexpected error in returned JSON: {error}")
+
+
+def _drop_commas(text, token):
+    """Scans JSON text once, keeping track of the open objects and arrays
+
+    return: the text without commas doubled between object members and without anything after the top level object or
+        array, and whether any comma was dropped"""
+    pieces = []
+    copied = 0
+    # whether each open bracket is an object
+    objects = []
+    for match in token.finditer(text):
+        kind = match.lastindex
+        if kind == 1 or kind == 2:
+            objects.append(kind == 1)
+        elif kind == 3:
+            if objects:
+                objects.pop()
+                if not objects:
+                    pieces.append(text[copied:match.end()])
+                    return text[:0].join(pieces), copied > 0
+        elif kind == 4 and objects and objects[-1]:
+            pieces.append(text[copied:match.start()])
+            copied = match.end()
+    pieces.append(text[copied:])
+    return text[:0].join(pieces), copied > 0
+
+
 def validate_api_data(data: dict) -> None:
     """Validates data, raising matching exceptions for any API error messages"""
 
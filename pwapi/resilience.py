@@ -0,0 +1,275 @@
+"""Deadlines, retries, hedged requests and circuit breaking for call_api
+
+An APIClient created with a Resilience sends every request call_api makes through it:
+
+    client = APIClient(retries=0, resilience=Resilience(deadline=20, keys=api.key_pool))
+
+Each call then
+- fails with DeadlineExceeded once its deadline has passed, even if a request is still hanging
+- is retried after a jittered exponential backoff when it fails in a way worth retrying, see retriable
+- sends a second, hedged request when the first is slower than most recent requests, within a budget of extra calls
+- fails fast with CircuitOpen while requests keep failing, rather than waiting on servers that are down
+
+API errors such as InvalidKey, KeyLimited and InvalidRequest mean the servers are answering, and are never retried.
+The client's own retries of connection errors and 5xx responses happen within each attempt, which is why clients with
+a Resilience are best created with retries=0.
+
+Classes
+--------
+
+CircuitBreaker - opens after consecutive failures, letting a trial call through once it has cooled down
+Resilience - runs calls with a deadline, retries, hedging and a circuit breaker
+
+Functions
+--------
+
+retriable - whether a failed attempt is worth retrying
+"""
+import collections
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from pwapi.exceptions import *
+from pwapi.scheduler import KeyPool
+
+# HTTP statuses of transient failures, including rate limiting by the web server
+retry_statuses = (429, 500, 502, 503, 504)
+
+
+def retriable(error: Exception) -> bool:
+    """Whether a failed attempt may succeed if repeated
+
+    Connection errors, timeouts, transient HTTP statuses and bodies that are not JSON at all, such as HTML error
+    pages, are retried. API errors, other client errors and any other exception are not."""
+    if isinstance(error, (APIKeyError, InvalidRequest, DeadlineExceeded, CircuitOpen)):
+        return False
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in retry_statuses
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, MalformedJSON))
+
+
+class CircuitBreaker:
+    """Stops sending requests to servers that keep failing
+
+    After failure_threshold consecutive failures the circuit opens, and calls fail with CircuitOpen without sending
+    anything. Once reset_timeout seconds have passed a single trial call is let through: its success closes the circuit,
+    and its failure opens it for another reset_timeout.
+
+    :ivar state: one of closed, open or half-open"""
+
+    closed = "closed"
+    open = "open"
+    half_open = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        :param failure_threshold: consecutive failures opening the circuit
+        :param reset_timeout: seconds the circuit stays open before a trial call"""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.closed
+        self.failures = 0
+        self._opened = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before(self) -> None:
+        """Raises CircuitOpen unless a request may be sent now"""
+        with self._lock:
+            if self.state == self.closed:
+                return
+            if self.state == self.open:
+                if time.monotonic() - self._opened < self.reset_timeout:
+                    raise CircuitOpen("The PW servers are failing, not sending the request.")
+                self.state = self.half_open
+            if self._trial:
+                raise CircuitOpen("The PW servers are failing, waiting for a trial request.")
+            self._trial = True
+
+    def cancel(self) -> None:
+        """Gives back a trial call let through by before() that was never sent"""
+        with self._lock:
+            self._trial = False
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = self.closed
+            self.failures = 0
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.half_open or self.failures >= self.failure_threshold:
+                self.state = self.open
+                self._opened = time.monotonic()
+            self._trial = False
+
+
+class Resilience:
+    """Policy for the requests of an APIClient, see the module docstring
+
+    Requests run on a pool of worker threads, so that the caller can stop waiting at the deadline or when a hedged
+    request answers first. Requests that are given up on are not cancelled, and still use quota.
+
+    Hedging is quota aware: hedged requests are sent only while they are fewer than hedge_budget of all calls, the
+    circuit is closed, and, given a KeyPool, while the pool has more than reserve calls left today.
+
+    :ivar breaker: the CircuitBreaker
+    :ivar calls: calls made through the policy
+    :ivar retries: attempts repeated after a retriable failure
+    :ivar hedges: hedged requests sent"""
+
+    def __init__(self, deadline: float = 30, retries: int = 3, backoff: float = 0.5, max_backoff: float = 10,
+                 hedge_percentile: float = 95, hedge_budget: float = 0.05, min_samples: int = 20, window: int = 200,
+                 keys: KeyPool = None, reserve: int = 100, breaker: CircuitBreaker = None, workers: int = 16):
+        """
+        :param deadline: seconds a call may take in total, over every attempt and backoff
+        :param retries: maximum attempts repeated after retriable failures
+        :param backoff: maximum delay before the first retry in seconds, doubled after each retry. The delay is drawn
+            uniformly between zero and that maximum
+        :param max_backoff: cap on the maximum delay in seconds
+        :param hedge_percentile: latency percentile of recent successful requests after which a hedged request is
+            sent. None disables hedging
+        :param hedge_budget: maximum hedged requests as a fraction of calls
+        :param min_samples: successful requests to observe before hedging
+        :param window: number of recent latencies the percentile is taken over
+        :param keys: optional KeyPool. No hedged requests are sent once it has reserve calls or fewer left today
+        :param reserve: calls kept back from hedging
+        :param breaker: CircuitBreaker to use. Defaults to a new one
+        :param workers: maximum requests in flight through this policy"""
+        self.deadline = deadline
+        self.max_retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget
+        self.min_samples = min_samples
+        self.keys = keys
+        self.reserve = reserve
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwapi-resilience")
+        self._closed = False
+
+    def call(self, fn):
+        """Returns fn(), repeating and hedging it according to the policy
+
+        fn may run several times, possibly at once on different threads.
+
+        Raises DeadlineExceeded if no attempt succeeded within the deadline, CircuitOpen while the circuit is open, and
+        otherwise the error of the last attempt. Raises RuntimeError once the policy is closed."""
+        if self._closed:
+            raise RuntimeError("The Resilience policy is closed.")
+        deadline = time.monotonic() + self.deadline
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            self.breaker.before()
+            try:
+                return self._attempt(fn, deadline)
+            except Exception as e:
+                if not retriable(e) or attempt >= self.max_retries or self._closed:
+                    raise
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    raise
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def hedge_delay(self) -> float:
+        """return: seconds after which a hedged request is sent, or None while not hedging"""
+        with self._lock:
+            if self.hedge_percentile is None or len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[round(self.hedge_percentile / 100 * (len(latencies) - 1))]
+
+    def close(self) -> None:
+        """Stops the worker threads once the requests in flight are done"""
+        self._closed = True
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _attempt(self, fn, deadline):
+        """One attempt, sending a hedged request if the first is slow, until one succeeds or both fail"""
+        started = []
+        try:
+            pending = {self._executor.submit(self._send, fn, started)}
+        except RuntimeError:
+            # the executor was shut down, so a trial call let through by the breaker was never sent
+            self.breaker.cancel()
+            raise
+        delay = self.hedge_delay()
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                raise DeadlineExceeded(f"No response within the {self.deadline} second deadline.") from error
+            # the hedge delay counts from when the request starts running, as the latencies it is taken from do. Time
+            # spent queued behind other requests does not count, and a hedge would queue behind them too
+            hedge_at = None
+            wake = deadline
+            if delay is not None:
+                hedge_at = started[0] + delay if started else None
+                wake = min(deadline, now + delay if hedge_at is None else hedge_at)
+            done, pending = wait(pending, wake - now, FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if pending and hedge_at is not None and time.monotonic() >= hedge_at:
+                delay = None
+                if self._may_hedge():
+                    try:
+                        pending.add(self._executor.submit(self._send, fn))
+                    except RuntimeError:
+                        # closed while waiting, the first request carries on alone
+                        pass
+        raise error
+
+    def _may_hedge(self):
+        if self.breaker.state != CircuitBreaker.closed:
+            return False
+        if self.keys is not None and self.keys.remaining() <= self.reserve:
+            return False
+        with self._lock:
+            if self.hedges + 1 > self.hedge_budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def _send(self, fn, started=None):
+        """Runs one request on a worker thread, recording its outcome with the breaker and its latency
+
+        :param started: optional list the start time is appended to"""
+        start = time.monotonic()
+        if started is not None:
+            started.append(start)
+        try:
+            result = fn()
+        except Exception as e:
+            # errors that are not retriable came from servers that are answering
+            if retriable(e):
+                self.breaker.failure()
+            else:
+                self.breaker.success()
+            raise
+        self.breaker.success()
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return result
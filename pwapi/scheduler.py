@@ -0,0 +1,216 @@
+"""Quota-aware scheduling of API calls across a pool of keys
+
+Classes
+--------
+
+TokenBucket - thread-safe token bucket rate limiter
+KeyPool - tracks the daily usage of several API keys, rotating calls between them and retiring limited keys
+Scheduler - worker pool running queued calls by priority, rate limited and drawing keys from a KeyPool
+"""
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from pwapi.exceptions import InvalidKey, KeyLimited
+
+
+class TokenBucket:
+    """Rate limiter allowing bursts of up to `capacity` calls, refilled at `rate` calls per second"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Takes tokens if available, without waiting"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Takes tokens, sleeping until enough have accumulated"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class KeyPool:
+    """Pool of API keys with per-key daily usage tracking
+
+    Calls are given the active key with the most calls left today. A key that raises KeyLimited is retired until the
+    next day, which starts at midnight UTC."""
+
+    def __init__(self, keys=(), daily_limit: int = 2000):
+        """
+        :param keys: initial API keys
+        :param daily_limit: default calls allowed per key per day. The PW API allows 2000, or 5000 for some keys"""
+        self.daily_limit = daily_limit
+        self._limits = {}
+        self._usage = {}
+        self._retired = set()
+        self._day = self._today()
+        self._lock = threading.Lock()
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str, daily_limit: int = None) -> None:
+        """Adds a key to the pool, optionally with its own daily limit"""
+        with self._lock:
+            self._limits[key] = daily_limit or self.daily_limit
+            self._usage.setdefault(key, 0)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._limits.pop(key, None)
+            self._usage.pop(key, None)
+            self._retired.discard(key)
+
+    def acquire(self) -> str:
+        """Returns the key to use for the next call and counts the call against it
+
+        Raises InvalidKey if the pool is empty, and KeyLimited if every key is used up for the day."""
+        with self._lock:
+            self._roll_day()
+            if not self._limits:
+                raise InvalidKey("No API key was provided.")
+            best = None
+            best_left = 0
+            for key, limit in self._limits.items():
+                left = limit - self._usage[key]
+                if key not in self._retired and left > best_left:
+                    best, best_left = key, left
+            if best is None:
+                raise KeyLimited("Exceeded daily call limit on every key.")
+            self._usage[best] += 1
+            return best
+
+    def retire(self, key: str) -> None:
+        """Stops using a key until the next day"""
+        with self._lock:
+            self._retired.add(key)
+
+    def call(self, fn):
+        """Calls fn(key) with a key from the pool
+
+        If the key turns out to be limited it is retired and the call is repeated with the next key, so the request is
+        not lost while any key has calls left."""
+        while True:
+            key = self.acquire()
+            try:
+                return fn(key)
+            except KeyLimited:
+                self.retire(key)
+
+    def usage(self) -> dict:
+        """return: dictionary of calls made today, keyed by API key"""
+        with self._lock:
+            self._roll_day()
+            return dict(self._usage)
+
+    def remaining(self) -> int:
+        """return: calls left today across all active keys"""
+        with self._lock:
+            self._roll_day()
+            return sum(limit - self._usage[key] for key, limit in self._limits.items() if key not in self._retired)
+
+    def __len__(self):
+        return len(self._limits)
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(datetime.timezone.utc).date()
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._usage = dict.fromkeys(self._usage, 0)
+            self._retired.clear()
+
+
+class Scheduler:
+    """Runs API calls on a pool of worker threads, highest priority first, within a rate limit
+
+    Submitted functions must accept a `key` keyword argument, as all the functions in pwapi.api do. Each call is made
+    with a key drawn from the scheduler's KeyPool."""
+
+    def __init__(self, keys: KeyPool, rate: float = 5, burst: float = None, workers: int = 4):
+        """
+        :param keys: KeyPool supplying the keys
+        :param rate: maximum calls per second, across all workers
+        :param burst: maximum calls made at once after an idle period. Defaults to rate
+        :param workers: number of worker threads"""
+        self.keys = keys
+        self.bucket = TokenBucket(rate, burst)
+        self._queue = []
+        self._order = itertools.count()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, name=f"pwapi-scheduler-{n}", daemon=True)
+                         for n in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, fn, *args, priority: int = 0, **kwargs) -> Future:
+        """Queues fn(*args, key=..., **kwargs)
+
+        :param priority: lower numbers run first. Calls of equal priority run in submission order
+        return: a Future for the call's result"""
+        future = Future()
+        with self._ready:
+            if self._closed:
+                raise RuntimeError("Scheduler has been shut down")
+            heapq.heappush(self._queue, (priority, next(self._order), future, fn, args, kwargs))
+            self._ready.notify()
+        return future
+
+    def pending(self) -> int:
+        with self._ready:
+            return len(self._queue)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the workers once the queue is empty"""
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _work(self):
+        while True:
+            with self._ready:
+                while not self._queue and not self._closed:
+                    self._ready.wait()
+                if not self._queue:
+                    return
+                _, _, future, fn, args, kwargs = heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            def attempt(key):
+                self.bucket.acquire()
+                return fn(*args, key=key, **kwargs)
+
+            try:
+                future.set_result(self.keys.call(attempt))
+            except Exception as e:
+                future.set_exception(e)
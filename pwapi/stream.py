@@ -0,0 +1,126 @@
+"""Streaming decoding of the large Nations and Alliance_Members responses
+
+Rather than decoding the whole response and then building every model, the body is read in chunks and the objects of
+the nations array are decoded and yielded one at a time, so only one chunk and one nation are held at once.
+
+Like repair_json, the parser tolerates the trailing garbage and doubled commas some API responses contain, both between
+nations and between the members of each nation."""
+import codecs
+import json
+from pwapi.client import APIClient
+from pwapi.exceptions import MalformedJSON
+from pwapi.models import NationStub
+from pwapi.requests import validate_api_data
+import pwapi.requests
+
+_decoder = json.JSONDecoder()
+_skipped = " \t\n\r"
+_skipped_with_commas = _skipped + ","
+
+
+class _Reader:
+    """Text buffer filled from an iterable of byte chunks as parsing needs it"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> None:
+        """Drops the parsed text and appends the next chunk"""
+        text = ""
+        for chunk in self._chunks:
+            text = self._decode(chunk)
+            if text:
+                break
+        else:
+            text = self._decode(b"", final=True)
+            self.eof = True
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+
+    def peek(self, skipped: str = _skipped) -> str:
+        """Skips over the given characters and returns the next one, or an empty string at the end of the stream"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in skipped:
+                self.pos += 1
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise MalformedJSON(f"Unexpected error in returned JSON: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decodes the JSON value at the current position"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if e.msg == "Expecting property name enclosed in double quotes" and self.text[e.pos:e.pos + 1] == ",":
+                    # a comma doubled between object members, dropped from the buffer as repair_json would
+                    self.text = self.text[:e.pos] + self.text[e.pos + 1:]
+                    continue
+                if self.eof:
+                    raise MalformedJSON(f"Unexpected error in returned JSON: {e}")
+                self.fill()
+                continue
+            # A number or literal ending exactly at the end of the buffer may continue in the next chunk
+            if end == len(self.text) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_nations(chunks, cls=NationStub):
+    """Decodes a Nations or Alliance_Members response body incrementally
+
+    API error messages (general_message or error) raise the same exceptions as validate_api_data. Messages before the
+    nations array are raised before any nation is yielded, and messages after it once the whole array was yielded, so
+    consumers that act on the nations as they arrive should only commit to them once the generator is exhausted.
+
+    :param chunks: iterable of bytes making up the response body
+    :param cls: model class built from each nation, e.g. NationStub or Member. None yields the raw dictionaries
+    return: generator of cls objects, in the order of the nations array"""
+    reader = _Reader(chunks)
+    reader.expect("{")
+    while True:
+        if reader.peek(_skipped_with_commas) == "}":
+            # anything after the closing brace is garbage, and is never read
+            return
+        key = reader.value()
+        reader.expect(":")
+        if key == "nations":
+            reader.expect("[")
+            while reader.peek(_skipped_with_commas) != "]":
+                data = reader.value()
+                yield data if cls is None else cls(data)
+            reader.pos += 1
+        else:
+            value = reader.value()
+            if key in ("general_message", "error"):
+                validate_api_data({key: value})
+
+
+def stream_nations(url: str, cls=NationStub, client: APIClient = None, chunk_size: int = 64 * 1024):
+    """Calls a Nations or Alliance_Members endpoint, yielding nations as the response body arrives
+
+    The request is sent when the generator is first advanced.
+
+    :param url: full endpoint URL, including the key
+    :param cls: model class built from each nation. None yields the raw dictionaries
+    :param client: optional APIClient. Defaults to pwapi.requests.default_client
+    :param chunk_size: bytes read from the connection at a time"""
+    if client is None:
+        client = pwapi.requests.default_client
+    with client.get(url, stream=True) as r:
+        if not r.ok:
+            r.raise_for_status()
+        yield from iter_nations(r.iter_content(chunk_size), cls)
@@ -0,0 +1,145 @@
+"""Columnar storage for bulk nation data
+
+Classes
+--------
+
+NationTable - struct-of-arrays view of Nations or Alliance_Members API data, one typed NumPy array per field
+"""
+import numpy as np
+from pwapi import formulas
+from pwapi.models import NationStub
+
+# Numeric NationStub fields kept as columns, and their types
+column_types = {"nation_id": np.int64,
+                "alliance_id": np.int64,
+                "alliance_position": np.int8,
+                "city_count": np.int32,
+                "infrastructure": np.float64,
+                "score": np.float64,
+                "offensive_war_count": np.int8,
+                "defensive_war_count": np.int8,
+                "vacation_mode": np.bool_,
+                "minutes_inactive": np.int64}
+
+
+class NationTable:
+    """Nations held as one NumPy array per field rather than one object per nation
+
+    Columns are named after the matching NationStub attributes, plus color. Indexing with a column name returns that
+    column, while indexing with a boolean mask, index array or slice returns a new table of the selected rows:
+
+        table = NationTable.from_payload(data)
+        targets = table[(table["score"] > 1000) & ~table["vacation_mode"]]
+
+    NationStub objects are only built when a row is asked for, with row() or by iterating over the table."""
+
+    __slots__ = ["columns", "_rows", "_index"]
+
+    def __init__(self, columns: dict, rows: list, index: np.ndarray):
+        """
+        :param columns: dictionary of equal length arrays, keyed by field name
+        :param rows: the raw API rows the table was built from
+        :param index: position in rows of each row of the table"""
+        self.columns = columns
+        self._rows = rows
+        self._index = index
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "NationTable":
+        """Builds a table from decoded Nations or Alliance_Members API data"""
+        rows = data["nations"]
+        count = len(rows)
+        if count:
+            infra_key = "infrastructure" if "infrastructure" in rows[0] else "totalinfrastructure"
+            vacation_key = "vacmode" if "vacmode" in rows[0] else "vmode"
+        else:
+            infra_key = vacation_key = None
+
+        def column(name, key, convert):
+            return np.fromiter((convert(row[key]) for row in rows), column_types[name], count)
+
+        # Nations returns numbers, Alliance_Members returns several of them as strings
+        columns = {"nation_id": column("nation_id", "nationid", int),
+                   "alliance_id": column("alliance_id", "allianceid", int),
+                   "alliance_position": column("alliance_position", "allianceposition", int),
+                   "city_count": column("city_count", "cities", int),
+                   "infrastructure": column("infrastructure", infra_key, float),
+                   "score": column("score", "score", float),
+                   "offensive_war_count": column("offensive_war_count", "offensivewars", int),
+                   "defensive_war_count": column("defensive_war_count", "defensivewars", int),
+                   "vacation_mode": column("vacation_mode", vacation_key, lambda turns: bool(int(turns))),
+                   "minutes_inactive": column("minutes_inactive", "minutessinceactive", int),
+                   "color": np.array([row["color"] for row in rows], dtype=str)}
+        return cls(columns, rows, np.arange(count))
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, selector):
+        if isinstance(selector, str):
+            return self.columns[selector]
+        return NationTable({name: values[selector] for name, values in self.columns.items()}, self._rows,
+                           self._index[selector])
+
+    def __iter__(self):
+        for position in self._index:
+            yield NationStub(self._rows[position])
+
+    def row(self, i: int) -> NationStub:
+        """Builds a NationStub for the i-th row of the table"""
+        return NationStub(self._rows[self._index[i]])
+
+    def war_range(self) -> np.recarray:
+        """Returns the war ranges of every row. See formulas.war_range_batch"""
+        return formulas.war_range_batch(self.columns["score"])
+
+    def where(self, **conditions) -> "NationTable":
+        """Selects the rows whose columns equal the given values, e.g. where(alliance_id=615, vacation_mode=False)"""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in conditions.items():
+            mask &= self.columns[name] == value
+        return self[mask]
+
+    def sort(self, column: str, descending: bool = False) -> "NationTable":
+        """Returns a copy of the table sorted by a column. Ties keep their current order."""
+        values = self.columns[column]
+        if not descending:
+            return self[np.argsort(values, kind="stable")]
+        # reversing a stable sort of the reversed column keeps ties in their current order, for any column type
+        order = np.argsort(values[::-1], kind="stable")[::-1]
+        return self[len(values) - 1 - order]
+
+    def group_by(self, column: str) -> dict:
+        """Splits the table by the values of a column
+
+        return: dictionary of NationTables keyed by column value"""
+        order = np.argsort(self.columns[column], kind="stable")
+        keys, starts = np.unique(self.columns[column][order], return_index=True)
+        groups = np.split(order, starts[1:])
+        return {key.item(): self[group] for key, group in zip(keys, groups)}
+
+    def aggregate(self, by: str, column: str, how: str = "sum") -> dict:
+        """Reduces a column within each group of another column
+
+        :param by: column to group on
+        :param column: column to reduce
+        :param how: one of sum, mean, min, max, count
+        return: dictionary of reduced values keyed by group value"""
+        keys, inverse = np.unique(self.columns[by], return_inverse=True)
+        values = self.columns[column].astype(np.float64)
+        if how in ("sum", "mean", "count"):
+            counts = np.bincount(inverse, minlength=len(keys))
+            if how == "count":
+                result = counts
+            else:
+                result = np.bincount(inverse, weights=values, minlength=len(keys))
+                if how == "mean":
+                    result = result / counts
+        elif how in ("min", "max"):
+            order = np.argsort(inverse, kind="stable")
+            starts = np.searchsorted(inverse[order], np.arange(len(keys)))
+            reducer = np.minimum if how == "min" else np.maximum
+            result = reducer.reduceat(values[order], starts) if len(values) else values
+        else:
+            raise ValueError(f"Unknown aggregation: {how}")
+        return {key.item(): value.item() for key, value in zip(keys, result)}
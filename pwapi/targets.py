@@ -0,0 +1,149 @@
+"""Score-sorted index answering war range queries
+
+Classes
+--------
+
+TargetIndex - nations sorted by score, answering "who can I hit" and "who can hit me" with binary search
+"""
+import numbers
+import numpy as np
+from pwapi import formulas
+from pwapi.models import NationStub
+
+# War slots available to every nation
+max_offensive_wars = 5
+max_defensive_wars = 3
+
+# Attributes kept as score-sorted columns, and their types
+_columns = {"score": np.float64,
+            "nation_id": np.int64,
+            "alliance_id": np.int64,
+            "vacation_mode": np.bool_,
+            "offensive_war_count": np.int64,
+            "defensive_war_count": np.int64,
+            "color": object}
+
+
+class TargetIndex:
+    """Nations indexed by score for war range queries
+
+    The filterable attributes of every nation are kept in arrays sorted by score. A range query binary searches the
+    score array, then filters only the slice inside the range with vectorized comparisons.
+
+    Scores must be changed through update_score (or add), not by setting score on an indexed nation, so the index
+    stays sorted."""
+
+    def __init__(self, nations=()):
+        """:param nations: iterable of NationStub objects, or subclasses such as Member"""
+        self._nations = {nation.nation_id: nation for nation in nations}
+        nations = list(self._nations.values())
+        columns = {name: np.array([getattr(nation, name) for nation in nations], dtype=dtype)
+                   for name, dtype in _columns.items()}
+        order = np.argsort(columns["score"], kind="stable")
+        self._columns = {name: values[order] for name, values in columns.items()}
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "TargetIndex":
+        """Builds an index from decoded Nations or Alliance_Members API data"""
+        return cls(NationStub(row) for row in data["nations"])
+
+    def __len__(self):
+        return len(self._nations)
+
+    def __contains__(self, nation_id):
+        return nation_id in self._nations
+
+    def get(self, nation_id: int) -> NationStub:
+        return self._nations.get(nation_id)
+
+    def add(self, nation: NationStub) -> None:
+        """Adds a nation, replacing any indexed nation with the same ID"""
+        self.remove(nation.nation_id)
+        self._nations[nation.nation_id] = nation
+        position = np.searchsorted(self._columns["score"], nation.score, side="right")
+        for name, values in self._columns.items():
+            self._columns[name] = np.insert(values, position, getattr(nation, name))
+
+    def remove(self, nation_id: int) -> None:
+        nation = self._nations.pop(nation_id, None)
+        if nation is not None:
+            position = self._position(nation)
+            for name, values in self._columns.items():
+                self._columns[name] = np.delete(values, position)
+
+    def update_score(self, nation_id: int, score: float) -> None:
+        """Moves an indexed nation to a new score, updating the nation object's score as well"""
+        nation = self._nations[nation_id]
+        old = self._position(nation)
+        new = np.searchsorted(self._columns["score"], score, side="right")
+        # Removing the nation from its old position shifts everything after it down by one
+        if new > old:
+            new -= 1
+        # Shift the rows between the two positions in place rather than reallocating every column
+        for values in self._columns.values():
+            row = values[old]
+            if new > old:
+                values[old:new] = values[old + 1:new + 1]
+            elif new < old:
+                values[new + 1:old + 1] = values[new:old]
+            values[new] = row
+        self._columns["score"][new] = score
+        nation.score = score
+
+    def in_range(self, low: float, high: float) -> list:
+        """return: every nation with low <= score <= high, in ascending score order"""
+        return self._select(low, high, None, None, None, None, False)
+
+    def offensive(self, score: float, alliance_id=None, color: str = None, vacation_mode: bool = None,
+                  open_slots: bool = False, ids: bool = False) -> list:
+        """Finds the nations a nation with the given score can declare war on
+
+        :param alliance_id: only include nations in this alliance, or in any of a collection of alliances
+        :param color: only include nations of this color
+        :param vacation_mode: only include nations in (True) or out of (False) vacation mode. None includes both
+        :param open_slots: only include nations with a free defensive war slot
+        :param ids: return an array of nation IDs instead of nation objects, which is much faster for large ranges
+        return: list of matching nations, in ascending score order"""
+        ranges = formulas.war_range(score)["offensive"]
+        slots = ("defensive_war_count", max_defensive_wars) if open_slots else None
+        return self._select(ranges["min"], ranges["max"], alliance_id, color, vacation_mode, slots, ids)
+
+    def defensive(self, score: float, alliance_id=None, color: str = None, vacation_mode: bool = None,
+                  open_slots: bool = False, ids: bool = False) -> list:
+        """Finds the nations that can declare war on a nation with the given score
+
+        Takes the same filters as offensive, except open_slots which checks for a free offensive war slot."""
+        ranges = formulas.war_range(score)["defensive"]
+        slots = ("offensive_war_count", max_offensive_wars) if open_slots else None
+        return self._select(ranges["min"], ranges["max"], alliance_id, color, vacation_mode, slots, ids)
+
+    def _select(self, low, high, alliance_id, color, vacation_mode, slots, ids):
+        columns = self._columns
+        start = np.searchsorted(columns["score"], low, side="left")
+        end = np.searchsorted(columns["score"], high, side="right")
+        mask = np.ones(end - start, dtype=bool)
+        if alliance_id is not None:
+            # NumPy integers, e.g. from NationTable columns, are single IDs too
+            alliances = [alliance_id] if isinstance(alliance_id, numbers.Integral) else list(alliance_id)
+            mask &= np.isin(columns["alliance_id"][start:end], alliances)
+        if color is not None:
+            mask &= columns["color"][start:end] == color
+        if vacation_mode is not None:
+            mask &= columns["vacation_mode"][start:end] == vacation_mode
+        if slots is not None:
+            mask &= columns[slots[0]][start:end] < slots[1]
+        nation_ids = columns["nation_id"][start:end][mask]
+        if ids:
+            return nation_ids
+        return [self._nations[nation_id] for nation_id in nation_ids.tolist()]
+
+    def _position(self, nation):
+        # Nations with equal scores sit next to each other, so step through any ties to find this one
+        nation_ids = self._columns["nation_id"]
+        position = np.searchsorted(self._columns["score"], nation.score, side="left")
+        while position < len(nation_ids) and nation_ids[position] != nation.nation_id:
+            position += 1
+        if position == len(nation_ids):
+            # the nation's score was changed without update_score, so it is not where its score says
+            position = int(np.flatnonzero(nation_ids == nation.nation_id)[0])
+        return position
@@ -0,0 +1,149 @@
+"""Graph of ongoing wars between nations and between alliances
+
+Classes
+--------
+
+WarGraph - adjacency index of nations and alliances connected by wars, updated as wars start and end
+"""
+import collections
+from pwapi.models import War
+
+# Alliance names the War API gives nations without an alliance
+_no_alliance = {None, "", "None"}
+
+
+class WarGraph:
+    """Ongoing wars indexed as edges between nations, and between the alliances the two sides belonged to
+
+    Alliances are identified by name, as War objects give them. The alliance edges use the alliances of each side when
+    the war was declared, as the War API reports them.
+
+    Neighbor and alliance-vs-alliance queries are dictionary lookups. Component and coalition queries are a breadth
+    first search, linear in the size of the component."""
+
+    def __init__(self, wars=()):
+        """:param wars: iterable of War objects. Wars that have ended are ignored"""
+        self._wars = {}
+        self._nations = collections.defaultdict(dict)
+        self._alliances = collections.defaultdict(lambda: collections.defaultdict(set))
+        for war in wars:
+            self.add_war(war)
+
+    @classmethod
+    def from_nations(cls, nations) -> "WarGraph":
+        """Builds a graph from the wars of Nation objects whose wars have been loaded, e.g. with api.load_nation_wars
+
+        Wars shared by two of the nations are only added once."""
+        graph = cls()
+        for nation in nations:
+            for war in nation.wars["offensive"] + nation.wars["defensive"]:
+                graph.add_war(war)
+        return graph
+
+    def __len__(self):
+        return len(self._wars)
+
+    def __contains__(self, war_id):
+        return war_id in self._wars
+
+    def add_war(self, war: War) -> None:
+        """Adds an ongoing war, or ends it if it is over. Adding a war again replaces it"""
+        if not war.ongoing:
+            self.end_war(war.war_id)
+            return
+        self.end_war(war.war_id)
+        self._wars[war.war_id] = war
+        self._nations[war.attacker_id][war.war_id] = war.defender_id
+        self._nations[war.defender_id][war.war_id] = war.attacker_id
+        attacker, defender = war.attacker_alliance, war.defender_alliance
+        if attacker not in _no_alliance and defender not in _no_alliance and attacker != defender:
+            self._alliances[attacker][defender].add(war.war_id)
+            self._alliances[defender][attacker].add(war.war_id)
+
+    def end_war(self, war_id: int) -> None:
+        """Removes a war. Unknown war IDs are ignored"""
+        war = self._wars.pop(war_id, None)
+        if war is None:
+            return
+        for nation_id in (war.attacker_id, war.defender_id):
+            wars = self._nations[nation_id]
+            wars.pop(war_id, None)
+            if not wars:
+                del self._nations[nation_id]
+        for alliance, other in ((war.attacker_alliance, war.defender_alliance),
+                                (war.defender_alliance, war.attacker_alliance)):
+            edges = self._alliances.get(alliance)
+            if edges is None or other not in edges:
+                continue
+            edges[other].discard(war_id)
+            if not edges[other]:
+                del edges[other]
+            if not edges:
+                del self._alliances[alliance]
+
+    def get(self, war_id: int) -> War:
+        return self._wars.get(war_id)
+
+    def wars_of(self, nation_id: int) -> list:
+        """return: the ongoing War objects a nation is part of, on either side"""
+        return [self._wars[war_id] for war_id in self._nations.get(nation_id, ())]
+
+    def opponents(self, nation_id: int) -> set:
+        """return: IDs of the nations at war with a nation"""
+        return set(self._nations.get(nation_id, {}).values())
+
+    def alliance_opponents(self, alliance: str) -> dict:
+        """return: number of ongoing wars with each alliance fighting the given one, keyed by alliance name"""
+        return {other: len(wars) for other, wars in self._alliances.get(alliance, {}).items()}
+
+    def wars_between(self, alliance: str, other: str) -> list:
+        """return: the ongoing wars between members of two alliances, declared by either side"""
+        edges = self._alliances.get(alliance)
+        if edges is None:
+            return []
+        return [self._wars[war_id] for war_id in edges.get(other, ())]
+
+    def fronts(self) -> list:
+        """return: (alliance, alliance, war count) for every pair of alliances at war, most wars first"""
+        pairs = [(alliance, other, len(wars)) for alliance, edges in self._alliances.items()
+                 for other, wars in edges.items() if alliance < other]
+        return sorted(pairs, key=lambda pair: pair[2], reverse=True)
+
+    def component(self, nation_id: int) -> set:
+        """return: IDs of every nation connected to a nation through a chain of wars, including itself"""
+        return self._search(nation_id, lambda node: self._nations.get(node, {}).values())[0]
+
+    def components(self) -> list:
+        """return: sets of nation IDs connected through wars, largest first"""
+        seen = set()
+        found = []
+        for nation_id in self._nations:
+            if nation_id not in seen:
+                component = self.component(nation_id)
+                seen |= component
+                found.append(component)
+        return sorted(found, key=len, reverse=True)
+
+    def coalition(self, alliance: str) -> tuple:
+        """Splits the alliances connected to an alliance through wars into two sides
+
+        Alliances an even number of war edges away from the given alliance are counted on its side, and the others
+        on the opposing side. An alliance fighting alliances on both sides is placed by the first path found to it.
+
+        return: (allies, enemies) sets of alliance names. allies includes the given alliance"""
+        _, sides = self._search(alliance, lambda node: self._alliances.get(node, {}).keys())
+        allies = {node for node, side in sides.items() if side == 0}
+        return allies, set(sides) - allies
+
+    def _search(self, start, neighbors) -> tuple:
+        """Breadth first search, returning the nodes reached and the parity of their distance from start"""
+        sides = {start: 0}
+        queue = collections.deque([start])
+        while queue:
+            node = queue.popleft()
+            side = 1 - sides[node]
+            for neighbor in neighbors(node):
+                if neighbor not in sides:
+                    sides[neighbor] = side
+                    queue.append(neighbor)
+        return set(sides), sides
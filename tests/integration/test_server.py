@@ -0,0 +1,63 @@
+import json
+import pytest
+from benchmarks.loadtest import run
+from benchmarks.server import StandInServer
+from pwapi import api
+from pwapi.client import APIClient
+from pwapi.exceptions import *
+from pwapi.requests import call_api, repair_json, validate_api_data
+
+
+def _respond(server, path):
+    status, body = server.respond(path)
+    return status, repair_json(body) if status == 200 else body
+
+
+class TestStandInServer:
+    def test_endpoints(self):
+        server = StandInServer(nations=100, alliances=10, wars=50)
+        status, nation = _respond(server, "/api/nation/id=42&key=key")
+        assert status == 200 and nation["nationid"] == "42" and nation["allianceid"] == "3"
+        members = _respond(server, "/api/alliance-members/?allianceid=3&key=key")[1]["nations"]
+        assert 42 in [row["nationid"] for row in members]
+        assert _respond(server, "/api/war/7&key=key")[1]["war"][0]["war_id"] == 7
+        assert len(_respond(server, "/api/nations/?key=key")[1]["nations"]) == 100
+        assert server.requests == 4
+
+    @pytest.mark.parametrize("path, error", [("/api/nation/id=101&key=key", InvalidRequest),
+                                             ("/api/war/51&key=key", InvalidRequest),
+                                             ("/api/alliance-members/?allianceid=11&key=key", InvalidRequest),
+                                             ("/api/nation/id=1&key=", InvalidKey),
+                                             ("/api/nation/id=1&key=other", InvalidKey)])
+    def test_api_errors(self, path, error):
+        server = StandInServer(nations=100, alliances=10, wars=50, keys=["key"])
+        with pytest.raises(error):
+            validate_api_data(_respond(server, path)[1])
+
+    def test_daily_limit(self):
+        server = StandInServer(nations=10, daily_limit=2)
+        for _ in range(2):
+            validate_api_data(_respond(server, "/api/nation/id=1&key=key")[1])
+        with pytest.raises(KeyLimited):
+            validate_api_data(_respond(server, "/api/nation/id=1&key=key")[1])
+        assert server.usage == {"key": 2}
+
+    def test_error_injection(self):
+        server = StandInServer(nations=10, error_rate=1)
+        assert server.respond("/api/nation/id=1&key=key")[0] == 503
+        server = StandInServer(nations=10, malformed=1)
+        for _ in range(10):
+            status, body = server.respond("/api/nation/id=1&key=key")
+            with pytest.raises(ValueError):
+                json.loads(body)
+            assert repair_json(body)["nationid"] == "1"
+
+    def test_serves_call_api(self):
+        with StandInServer(nations=10) as server, APIClient(retries=0) as client:
+            assert call_api(f"{server.api_url}/nation/id=5&key=key", client)["nationid"] == "5"
+
+    def test_loadtest_restores_pw_api(self):
+        pw_api = api.pw_api
+        with StandInServer(nations=10) as server:
+            report = run(server.api_url, "get_nation", 2, 10, 10, ["key"])
+        assert report["errors"] == {} and api.pw_api == pw_api
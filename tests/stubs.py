@@ -61,3 +61,9 @@ members_stub = {'nations': [
      'lead': '11.00', 'gasoline': '188.50', 'munitions': '303.72', 'aluminum': '49.64', 'steel': '229.16',
      'credits': '0', 'soldiers': '0', 'tanks': '0', 'aircraft': '0', 'ships': '0', 'missiles': '0', 'nukes': '0',
      'spies': '3'}]}
+
+war_stub = {'success': True, 'war': [
+    {'war_ended': False, 'date': '2020-02-20 18:05:59', 'aggressor_id': '31191', 'aggressor_alliance': 'Seven Kingdoms',
+     'aggressor_is_applicant': False, 'defender_id': '33841', 'defender_alliance': 'Rose',
+     'defender_is_applicant': False, 'aggressor_offering_peace': False, 'war_reason': 'Raid', 'ground_control': '0',
+     'war_id': 0}]}
@@ -0,0 +1,104 @@
+import json
+import random
+import pytest
+import requests_mock
+from pwapi import api
+from pwapi.aggregates import AllianceAggregates, QuantileSketch, alliance_aggregates
+from pwapi.models import Member
+from tests.stubs import members_stub
+
+
+def _rows(changes=None):
+    changes = changes or {}
+    return [dict(row, **changes.get(row["nationid"], {})) for row in members_stub["nations"]]
+
+
+class TestQuantileSketch:
+    def test_relative_accuracy(self):
+        values = [random.Random(0).lognormvariate(7, 1) for _ in range(5000)]
+        sketch = QuantileSketch(0.01)
+        for value in values:
+            sketch.add(value)
+        values.sort()
+        for q in (0, 0.1, 0.5, 0.9, 0.99, 1):
+            assert sketch.quantile(q) == pytest.approx(values[int(q * (len(values) - 1))], rel=0.01)
+
+    def test_merge_and_remove(self):
+        first, second, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in (-5, 0, 1, 2, 3):
+            first.add(value)
+            both.add(value)
+        for value in (10, 20):
+            second.add(value)
+            both.add(value)
+        first.merge(second)
+        assert [first.quantile(q) for q in (0, 0.5, 1)] == [both.quantile(q) for q in (0, 0.5, 1)]
+        assert first.quantile(0) == pytest.approx(-5, rel=0.01)
+        first.remove(20)
+        first.remove(-5)
+        assert len(first) == 5 and first.quantile(1) == pytest.approx(10, rel=0.01)
+        assert first.quantile(0) == 0
+
+    def test_removing_values_never_added(self):
+        sketch = QuantileSketch()
+        sketch.add(5)
+        for value in (7, 0, -1):
+            with pytest.raises(ValueError):
+                sketch.remove(value)
+        assert len(sketch) == 1 and sketch.quantile(0.5) == pytest.approx(5, rel=0.01)
+
+    def test_empty_and_invalid(self):
+        assert QuantileSketch().quantile(0.5) is None
+        with pytest.raises(ValueError):
+            QuantileSketch().merge(QuantileSketch(0.05))
+        with pytest.raises(ValueError):
+            QuantileSketch().quantile(2)
+
+
+class TestAllianceAggregates:
+    def test_matches_member_objects(self):
+        aggregates = AllianceAggregates()
+        aggregates.update(_rows({4834: {"soldiers": "30000", "tanks": "1500"}}))
+        members = [Member(row) for row in _rows({4834: {"soldiers": "30000", "tanks": "1500"}})]
+        assert len(aggregates) == 2
+        assert aggregates.total("money") == pytest.approx(sum(member.money for member in members))
+        assert aggregates.total("steel") == pytest.approx(sum(member.steel for member in members))
+        assert aggregates.total("vacation_mode") == 1
+        assert aggregates.mean("militarization") == pytest.approx(
+            sum(member.militarization()["total"] for member in members) / 2)
+        assert aggregates.quantile("score", 1) == pytest.approx(1674.18, rel=0.01)
+
+    def test_partial_and_complete_updates(self):
+        aggregates = AllianceAggregates()
+        aggregates.update(_rows())
+        aggregates.update([dict(members_stub["nations"][1], steel="1229.16", vacmode="3")])
+        assert aggregates.total("steel") == pytest.approx(2012.97 + 1229.16)
+        assert aggregates.total("vacation_mode") == 2
+        aggregates.update(members_stub["nations"][:1], complete=True)
+        assert 4834 not in aggregates and aggregates.total("steel") == pytest.approx(2012.97)
+        assert len(aggregates._sketches["score"]) == 1
+        aggregates.remove(582)
+        assert aggregates.mean("score") is None and aggregates.quantile("score", 0.5) is None
+
+    def test_merge(self):
+        first, second = AllianceAggregates(), AllianceAggregates()
+        first.update(members_stub["nations"][:1])
+        second.update(_rows({582: {"money": "1.00"}}))
+        first.merge(second)
+        assert len(first) == 2 and first.total("money") == pytest.approx(1)
+
+    def test_summary(self):
+        aggregates = AllianceAggregates()
+        aggregates.consume([json.dumps(members_stub).encode()])
+        summary = aggregates.summary()
+        assert summary["members"] == 2 and summary["vacation_mode"] == 1
+        assert summary["totals"]["spies"] == 15
+        assert summary["score"]["mean"] == pytest.approx((1674.18 + 1248.13) / 2)
+        assert set(summary["militarization"]) == {"mean", "p10", "p50", "p90"}
+
+    def test_alliance_aggregates(self):
+        with requests_mock.Mocker() as m:
+            m.get(f"{api.pw_api}/alliance-members/?allianceid=615&key=key", text=json.dumps(members_stub))
+            aggregates = alliance_aggregates(615, "key")
+            assert alliance_aggregates(615, "key", aggregates=aggregates) is aggregates
+        assert len(aggregates) == 2 and aggregates.total("money") == pytest.approx(169067412.65)
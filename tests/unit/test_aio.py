@@ -0,0 +1,60 @@
+import asyncio
+import json
+import threading
+import pytest
+import requests_mock
+from pwapi import aio
+from pwapi.aio import AsyncAPIClient
+from pwapi.api import pw_api
+from pwapi.exceptions import *
+from tests.stubs import nation_stub
+
+
+@pytest.fixture
+def client():
+    client = AsyncAPIClient(concurrency=2)
+    yield client
+    client.close()
+
+
+def _collect(client, ids, **kwargs):
+    async def run():
+        return [result async for result in client.gather_nations(ids, **kwargs)]
+    return asyncio.run(run())
+
+
+class TestAsyncAPIClient:
+    def test_call_api_fixes_json(self, client):
+        with requests_mock.Mocker() as m:
+            m.get("http://doublecomma", text='{"key1": "val",, "key2": "val"}>SERVERERROR')
+            assert asyncio.run(client.call_api("http://doublecomma")) == {"key1": "val", "key2": "val"}
+
+    def test_get_nation_creates_nation(self, client):
+        with requests_mock.Mocker() as m:
+            m.get(f"{pw_api}/nation/id=31191&key=key", text=json.dumps(nation_stub))
+            nation = asyncio.run(client.get_nation(31191, "key"))
+            assert nation.nation_id == 31191
+
+    def test_gather_nations_reports_errors_per_item(self, client):
+        with requests_mock.Mocker() as m:
+            m.get(f"{pw_api}/nation/id=31191&key=key", text=json.dumps(nation_stub))
+            m.get(f"{pw_api}/nation/id=1&key=key", text='{"error": "Nation doesn\'t exist."}')
+            m.get(f"{pw_api}/nation/id=2&key=key", text='{"general_message": "Invalid API key."}')
+            results = dict(_collect(client, [31191, 1, 2], key="key"))
+            assert results[31191].nation_id == 31191
+            assert isinstance(results[1], InvalidRequest)
+            assert isinstance(results[2], InvalidKey)
+
+    def test_gather_nations_concurrency_above_the_pool(self, monkeypatch):
+        # every fetch waits until 12 are in flight at once, more than the shared client's 10 threads
+        in_flight = threading.Barrier(12, timeout=5)
+
+        def get_nation(nation_id, key, client):
+            in_flight.wait()
+            return nation_id
+
+        async def run():
+            return [result async for result in aio.gather_nations(range(12), "key", concurrency=12)]
+
+        monkeypatch.setattr(aio.api, "get_nation", get_nation)
+        assert sorted(asyncio.run(run())) == [(nation_id, nation_id) for nation_id in range(12)]
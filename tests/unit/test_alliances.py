@@ -0,0 +1,65 @@
+import json
+import requests_mock
+from pwapi.api import *
+from pwapi.exceptions import InvalidRequest
+from tests.stubs import members_stub, nation_stub
+
+
+class TestCompleteAlliance:
+    members_url = f"{pw_api}/alliance-members/?allianceid=615&key=key"
+
+    def test_get_alliance_members(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.members_url, text=json.dumps(members_stub))
+            members = get_alliance_members(615, "key")
+        assert [member.nation_id for member in members] == [582, 4834]
+        assert all(isinstance(member, Member) for member in members)
+
+    def test_joins_members_with_nation_data(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.members_url, text=json.dumps(members_stub))
+            for nation_id in (582, 4834):
+                m.get(f"{pw_api}/nation/id={nation_id}&key=key",
+                      text=json.dumps(dict(nation_stub, nationid=str(nation_id))))
+            members = get_complete_alliance(615, "key")
+        assert [nation_id for nation_id, _ in members] == [582, 4834]
+        member = members[1][1]
+        assert isinstance(member, CompleteMember)
+        assert member.nation_id == 4834 and member.continent == "North America"
+        assert member.steel == 229.16
+
+    def test_partial_failure_is_per_nation(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.members_url, text=json.dumps(members_stub))
+            m.get(f"{pw_api}/nation/id=582&key=key", text='{"general_message": "Nation doesn\'t exist."}')
+            m.get(f"{pw_api}/nation/id=4834&key=key", text=json.dumps(dict(nation_stub, nationid="4834")))
+            members = get_complete_alliance(615, "key", lazy=True)
+        assert isinstance(members[0][1], InvalidRequest)
+        assert members[1][1].nation_id == 4834
+
+    def test_empty_alliance(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.members_url, text='{"nations": []}')
+            assert get_complete_alliance(615, "key") == []
+
+    def test_build_failure_is_per_nation(self):
+        partial = dict(nation_stub, nationid="582")
+        del partial["continent"]
+        with requests_mock.Mocker() as m:
+            m.get(self.members_url, text=json.dumps(members_stub))
+            m.get(f"{pw_api}/nation/id=582&key=key", text=json.dumps(partial))
+            m.get(f"{pw_api}/nation/id=4834&key=key", text=json.dumps(dict(nation_stub, nationid="4834")))
+            members = get_complete_alliance(615, "key")
+        assert isinstance(members[0][1], KeyError)
+        assert members[1][1].nation_id == 4834
+
+    def test_duplicate_members_are_fetched_once(self):
+        rows = members_stub["nations"]
+        with requests_mock.Mocker() as m:
+            m.get(self.members_url, text=json.dumps({"nations": rows + rows[:1]}))
+            for nation_id in (582, 4834):
+                m.get(f"{pw_api}/nation/id={nation_id}&key=key",
+                      text=json.dumps(dict(nation_stub, nationid=str(nation_id))))
+            members = get_complete_alliance(615, "key")
+            assert m.call_count == 3
+        assert [nation_id for nation_id, _ in members] == [582, 4834]
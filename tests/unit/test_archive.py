@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from pwapi.archive import SnapshotArchive, SnapshotWriter
+from pwapi.models import Member, NationStub
+from tests.stubs import nations_stub, members_stub
+
+
+def _nation(nation_id, score, infrastructure=1000.0):
+    return NationStub(dict(nations_stub["nations"][0], nationid=nation_id, score=score,
+                           infrastructure=infrastructure))
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "nations.snap")
+    with SnapshotWriter(path) as writer:
+        writer.append([_nation(30, 300.0), _nation(10, 100.0), _nation(20, 200.0)], timestamp=1.0)
+        writer.append([_nation(10, 110.0), _nation(100000, 5.0)], timestamp=2.0)
+    return path
+
+
+class TestSnapshotArchive:
+    def test_columns_sorted_by_nation_id(self, path):
+        archive = SnapshotArchive(path)
+        assert len(archive) == 2
+        snapshot = archive[0]
+        assert snapshot.nation_ids().tolist() == [10, 20, 30]
+        assert snapshot.column("score").tolist() == [100.0, 200.0, 300.0]
+        assert archive[1].nation_ids().tolist() == [10, 100000]
+
+    def test_series(self, path):
+        timestamps, values = SnapshotArchive(path).series(10, "score")
+        assert timestamps.tolist() == [1.0, 2.0]
+        assert values.tolist() == [100.0, 110.0]
+        timestamps, values = SnapshotArchive(path).series(20, "score")
+        assert timestamps.tolist() == [1.0]
+        assert SnapshotArchive(path).series(999, "score")[1].size == 0
+
+    def test_nation_ids_are_decoded_once(self, path):
+        snapshot = SnapshotArchive(path)[0]
+        assert snapshot.nation_ids() is snapshot.nation_ids()
+        assert not snapshot.nation_ids().flags.writeable
+        assert snapshot.get(20, "score") == 200.0
+        assert snapshot.get(25, "score") is None
+
+    def test_column_history(self, path):
+        history = list(SnapshotArchive(path).column_history("infrastructure"))
+        assert [timestamp for timestamp, _, _ in history] == [1.0, 2.0]
+        assert history[1][1].tolist() == [10, 100000]
+
+    def test_reopened_writer_appends(self, path):
+        with SnapshotWriter(path) as writer:
+            writer.append([_nation(10, 120.0)], timestamp=3.0)
+        assert SnapshotArchive(path).series(10, "score")[1].tolist() == [100.0, 110.0, 120.0]
+
+    def test_truncated_block_is_ignored(self, path):
+        with open(path, "rb+") as file:
+            file.truncate(file.seek(0, 2) - 4)
+        assert len(SnapshotArchive(path)) == 1
+
+    def test_member_stockpile(self, tmp_path):
+        path = str(tmp_path / "members.snap")
+        members = [Member(row) for row in members_stub["nations"]]
+        with SnapshotWriter(path) as writer:
+            writer.append(members, timestamp=1.0)
+        snapshot = SnapshotArchive(path)[0]
+        assert {"money", "steel", "spies", "soldiers", "project_flags"} <= set(snapshot.fields)
+        order = np.argsort([member.nation_id for member in members])
+        assert snapshot.column("money").tolist() == [members[i].money for i in order]
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "other"
+        path.write_bytes(b"not an archive")
+        with pytest.raises(ValueError):
+            SnapshotArchive(str(path))
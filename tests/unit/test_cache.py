@@ -0,0 +1,71 @@
+import pytest
+import requests_mock
+from pwapi.cache import *
+from pwapi.exceptions import InvalidRequest
+from pwapi.client import APIClient
+from pwapi.requests import call_api
+
+nation_url = "http://politicsandwar.com/api/nation/id=31191&key="
+
+
+class TestNormalizeURL:
+    def test_strips_trailing_key(self):
+        assert normalize_url(nation_url + "abc") == "http://politicsandwar.com/api/nation/id=31191"
+
+    def test_strips_leading_key(self):
+        url = "http://politicsandwar.com/api/alliance-members/?key=abc&allianceid=615"
+        assert normalize_url(url) == "http://politicsandwar.com/api/alliance-members/?allianceid=615"
+
+    def test_endpoint_type(self):
+        assert endpoint_type(nation_url + "abc") == "nation"
+        assert endpoint_type("http://politicsandwar.com/api/war/12&key=abc") == "war"
+        assert endpoint_type("http://politicsandwar.com/api/alliance-members/?allianceid=615") == "alliance-members"
+
+
+class TestResponseCache:
+    def test_hit_ignores_key(self):
+        cache = ResponseCache()
+        cache.put(nation_url + "abc", {"nationid": "31191"})
+        assert cache.get(nation_url + "def") == {"nationid": "31191"}
+        assert cache.get("http://politicsandwar.com/api/nation/id=1&key=abc") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expired_entries_miss(self):
+        cache = ResponseCache(ttls={"nation": -1})
+        cache.put(nation_url, {"nationid": "31191"})
+        assert cache.get(nation_url) is None
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(max_bytes=20)
+        cache.put("http://a/api/nation/id=1", {}, 10)
+        cache.put("http://a/api/nation/id=2", {}, 10)
+        cache.get("http://a/api/nation/id=1")
+        cache.put("http://a/api/nation/id=3", {}, 10)
+        assert cache.get("http://a/api/nation/id=2") is None
+        assert cache.get("http://a/api/nation/id=1") == {}
+        assert cache.evictions == 1
+
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        ResponseCache(store=SqliteStore(path)).put(nation_url, {"nationid": "31191"})
+        restarted = ResponseCache(store=SqliteStore(path))
+        assert restarted.get(nation_url) == {"nationid": "31191"}
+        assert restarted.stats()["entries"] == 1
+
+    def test_call_api_uses_client_cache(self):
+        client = APIClient(cache=ResponseCache())
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text='{"nationid": "31191"}')
+            call_api(nation_url + "abc", client)
+            call_api(nation_url + "def", client)
+            assert m.call_count == 1
+        assert client.cache.stats()["hits"] == 1
+
+    def test_errors_are_not_cached(self):
+        client = APIClient(cache=ResponseCache())
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text='{"error": "Nation doesn\'t exist."}')
+            for _ in range(2):
+                with pytest.raises(InvalidRequest):
+                    call_api(nation_url, client)
+            assert m.call_count == 2
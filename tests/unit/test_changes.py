@@ -0,0 +1,81 @@
+from pwapi.changes import *
+from pwapi.models import Member
+from tests.stubs import nations_stub, members_stub
+
+
+def _row(nation_id, **changes):
+    defaults = dict(score=1000.0, allianceid=615, color="orange", vacmode=0, offensivewars=0, defensivewars=0,
+                    minutessinceactive=5)
+    return dict(nations_stub["nations"][0], nationid=nation_id, **dict(defaults, **changes))
+
+
+def _payload(*rows):
+    return {"nations": list(rows)}
+
+
+class TestDiff:
+    def test_unchanged_rows_give_no_events(self):
+        assert diff(_payload(_row(1)), _payload(_row(1, minutessinceactive=500))) == []
+
+    def test_typed_events(self):
+        previous = _payload(_row(1), _row(2), _row(3))
+        current = _payload(_row(1, score=1100.5, allianceid=7), _row(2, vacmode=14, offensivewars=2), _row(4))
+        events = diff(previous, current)
+        assert [type(event) for event in events] == [ScoreChanged, AllianceChanged, VacationEntered,
+                                                     OffensiveWarDeclared, NationAdded, NationRemoved]
+        assert events[0].delta == 100.5
+        assert (events[1].old_alliance_id, events[1].new_alliance_id) == (615, 7)
+        assert events[3].count == 2
+        assert events[4].old is None and events[4].new.nation_id == 4
+        assert events[5].nation_id == 3 and events[5].new is None
+
+    def test_vacation_left(self):
+        events = diff(_payload(_row(1, vacmode=3)), _payload(_row(1)))
+        assert [type(event) for event in events] == [VacationLeft]
+
+
+class TestChangeFeed:
+    def test_first_update_adds_everything(self):
+        feed = ChangeFeed()
+        events = feed.update(_payload(_row(1), _row(2)))
+        assert all(isinstance(event, NationAdded) for event in events)
+        assert len(feed) == 2
+
+    def test_only_changed_rows_are_rebuilt(self):
+        feed = ChangeFeed()
+        feed.update(_payload(_row(1), _row(2)))
+        unchanged, changed = feed.get(1), feed.get(2)
+        events = feed.update(_payload(_row(1, minutessinceactive=60), _row(2, color="red")))
+        assert [type(event) for event in events] == [ColorChanged]
+        assert feed.get(1) is unchanged
+        assert feed.get(2) is not changed and feed.get(2).color == "red"
+        assert events[0].old is changed
+
+    def test_removal(self):
+        feed = ChangeFeed()
+        feed.update(_payload(_row(1), _row(2)))
+        events = feed.update(_payload(_row(2)))
+        assert [(type(event), event.nation_id) for event in events] == [(NationRemoved, 1)]
+        assert feed.get(1) is None
+
+    def test_subscribers(self):
+        feed = ChangeFeed()
+        seen, everything = [], []
+        feed.subscribe(seen.append, AllianceChanged, VacationLeft)
+        feed.subscribe(everything.append)
+        feed.update(_payload(_row(1)))
+        feed.update(_payload(_row(1, allianceid=9, score=2.0)))
+        assert [type(event) for event in seen] == [AllianceChanged]
+        assert len(everything) == 3
+        feed.unsubscribe(seen.append)
+        feed.update(_payload(_row(1)))
+        assert len(seen) == 1
+
+    def test_members(self):
+        feed = ChangeFeed(Member)
+        rows = members_stub["nations"]
+        feed.update({"nations": rows})
+        moved = dict(rows[0], allianceid="1")
+        events = feed.update({"nations": [moved] + rows[1:]})
+        assert [type(event) for event in events] == [AllianceChanged]
+        assert isinstance(events[0].new, Member)
@@ -0,0 +1,56 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests_mock
+from pwapi.client import APIClient
+from pwapi.requests import call_api
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests
+    protocol_version = "HTTP/1.1"
+    failures = 0
+
+    def do_GET(self):
+        if self.path.startswith("/flaky") and _Handler.failures:
+            _Handler.failures -= 1
+            status, body = 503, b"unavailable"
+        else:
+            status, body = 200, b'{"nationid": "31191"}'
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestAPIClient:
+    def test_connections_are_reused(self, server_url):
+        with APIClient(pool_size=2) as client:
+            for _ in range(5):
+                assert call_api(f"{server_url}/nation", client) == {"nationid": "31191"}
+            assert client.connection_stats() == {"opened": 1, "reused": 4, "requests": 5}
+
+    def test_retries_transient_server_errors(self, server_url):
+        _Handler.failures = 2
+        with APIClient(retries=3, backoff=0) as client:
+            assert call_api(f"{server_url}/flaky", client) == {"nationid": "31191"}
+            assert client.connection_stats()["requests"] == 3
+
+    def test_injected_client_is_used(self):
+        client = APIClient()
+        with requests_mock.Mocker(session=client.session) as m:
+            m.get("http://injected", text='{"key": "val"}')
+            assert call_api("http://injected", client) == {"key": "val"}
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+import requests_mock
+from pwapi.client import APIClient
+from pwapi.coalesce import *
+from pwapi.exceptions import InvalidRequest, KeyLimited
+from pwapi.metrics import Metrics
+from pwapi.requests import call_api
+from tests.stubs import nation_stub
+
+nation_url = "http://politicsandwar.com/api/nation/id=31191&key="
+
+
+def _run_threads(count, target):
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestCoalescer:
+    def test_concurrent_calls_share_one_result(self):
+        coalescer = Coalescer()
+        release = threading.Event()
+        executed = []
+
+        def slow():
+            executed.append(True)
+            release.wait()
+            return {"value": 1}
+
+        threads, results = _run_threads(5, lambda i: coalescer.call("key", slow))
+        _wait_for(lambda: coalescer.calls == 5)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(executed) == 1
+        assert all(result is results[0] for result in results)
+        assert (coalescer.calls, coalescer.coalesced, coalescer.in_flight()) == (5, 4, 0)
+
+    def test_exception_is_shared(self):
+        coalescer = Coalescer()
+        release = threading.Event()
+
+        def failing():
+            release.wait()
+            raise InvalidRequest("Nation does not exist.")
+
+        threads, results = _run_threads(3, lambda i: coalescer.call("key", failing))
+        _wait_for(lambda: coalescer.calls == 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert all(isinstance(result, InvalidRequest) for result in results)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        coalescer = Coalescer()
+        assert [coalescer.call("key", lambda: i) for i in range(3)] == [0, 1, 2]
+        assert coalescer.coalesced == 0
+
+
+class TestAsyncCoalescer:
+    def test_concurrent_calls_share_one_result(self):
+        coalescer = AsyncCoalescer()
+        executed = []
+
+        async def fetch():
+            executed.append(True)
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        async def main():
+            return await asyncio.gather(*(coalescer.call("key", fetch) for _ in range(4)),
+                                        coalescer.call("other", fetch))
+
+        results = asyncio.run(main())
+        assert len(executed) == 2
+        assert results[0] is results[3] and results[0] is not results[4]
+        assert coalescer.coalesced == 3 and coalescer.in_flight() == 0
+
+    def test_exception_is_shared(self):
+        coalescer = AsyncCoalescer()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise InvalidRequest("War does not exist.")
+
+        async def main():
+            return await asyncio.gather(*(coalescer.call("key", fetch) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(result, InvalidRequest) for result in asyncio.run(main()))
+
+
+class TestCallAPICoalescing:
+    def test_identical_calls_with_different_keys_share_a_request(self):
+        metrics = Metrics()
+        client = APIClient(coalescer=Coalescer(), hooks=[metrics])
+        release = threading.Event()
+
+        def respond(request, context):
+            release.wait()
+            return json.dumps(nation_stub)
+
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=respond)
+            threads, results = _run_threads(4, lambda i: call_api(nation_url + f"key{i}", client))
+            _wait_for(lambda: client.coalescer.calls == 4)
+            release.set()
+            for thread in threads:
+                thread.join()
+            assert m.call_count == 1
+        assert all(result["nationid"] == "31191" for result in results)
+        report = metrics.report()
+        assert report["endpoints"]["nation"]["coalesced"] == 3
+        assert sum(report["keys"].values()) == 1
+
+    def test_key_errors_are_not_shared_with_other_keys(self):
+        client = APIClient(coalescer=Coalescer())
+        release = threading.Event()
+
+        def respond(request, context):
+            if request.url.endswith("key=bad"):
+                release.wait()
+                return json.dumps({"general_message": "Exceeded max request limit of 2000 for today."})
+            return json.dumps(nation_stub)
+
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=respond)
+            # the call with the limited key leads
+            leader, results = _run_threads(1, lambda i: call_api(nation_url + "bad", client))
+            _wait_for(lambda: client.coalescer.calls == 1)
+            threads, followers = _run_threads(2, lambda i: call_api(nation_url + ("bad", "good")[i], client))
+            _wait_for(lambda: client.coalescer.calls == 3)
+            release.set()
+            for thread in leader + threads:
+                thread.join()
+            results += followers
+            assert m.call_count == 2
+        assert isinstance(results[0], KeyLimited) and isinstance(results[1], KeyLimited)
+        # the leader's exception is shared with its waiter as is
+        assert results[1] is results[0] and not hasattr(results[0], "url")
+        assert results[2]["nationid"] == "31191"
@@ -10,4 +10,29 @@ def test_militarization():
     mil_total = (mil_soldiers + mil_tanks + mil_aircraft + mil_ships) / 4
     mil = militarization(city_count=10, soldiers=500, tanks=12500, aircraft=18, ships=15)
     assert mil == {"total": mil_total, "soldiers": mil_soldiers, "tanks": mil_tanks, "aircraft": mil_aircraft,
-                   "ships": mil_ships}
\ No newline at end of file
+                   "ships": mil_ships}
+
+
+def test_war_range():
+    assert war_range(1000) == {"offensive": {"max": 1750, "min": 750}, "defensive": {"max": 1000 / .75,
+                                                                                      "min": 1000 / 1.75}}
+
+
+def test_militarization_batch_matches_scalar():
+    cities = [10, 21, 7]
+    soldiers, tanks, aircraft, ships = [500, 31500, 0], [12500, 0, 3], [18, 1890, 7], [15, 63, 1]
+    batch = militarization_batch(cities, soldiers, tanks, aircraft, ships)
+    for i in range(len(cities)):
+        mil = militarization(cities[i], soldiers[i], tanks[i], aircraft[i], ships[i])
+        assert {field: batch[field][i] for field in mil} == mil
+
+
+def test_war_range_batch_matches_scalar():
+    scores = [2327.0, 0.35, 3733.75]
+    batch = war_range_batch(scores)
+    for i, score in enumerate(scores):
+        ranges = war_range(score)
+        assert batch.offensive_max[i] == ranges["offensive"]["max"]
+        assert batch.offensive_min[i] == ranges["offensive"]["min"]
+        assert batch.defensive_max[i] == ranges["defensive"]["max"]
+        assert batch.defensive_min[i] == ranges["defensive"]["min"]
@@ -0,0 +1,68 @@
+import json
+import pytest
+import requests_mock
+from pwapi import api
+from pwapi.lazy import *
+from pwapi.models import CompleteMember, Member, Nation, Stockpile
+from tests.stubs import nation_stub, members_stub
+
+member_stub = members_stub["nations"][0]
+
+
+def _attributes(cls):
+    names = set()
+    for klass in cls.__mro__:
+        names.update(getattr(klass, "__slots__", ()))
+    return names - {"_data", "_member_data"}
+
+
+class TestLazyModels:
+    def test_nation_matches_eager(self):
+        eager, lazy = Nation(nation_stub), LazyNation(nation_stub)
+        assert isinstance(lazy, Nation)
+        for name in _attributes(Nation):
+            assert getattr(lazy, name) == getattr(eager, name), name
+
+    def test_member_matches_eager(self):
+        eager, lazy = Member(member_stub), LazyMember(member_stub)
+        for name in _attributes(Member) - {"stockpile"} | set(Stockpile.__slots__) | {"projects"}:
+            assert getattr(lazy, name) == getattr(eager, name), name
+
+    def test_complete_member_matches_eager(self):
+        eager, lazy = CompleteMember(member_stub, nation_stub), LazyCompleteMember(member_stub, nation_stub)
+        for name in _attributes(CompleteMember) - {"stockpile"} | set(Stockpile.__slots__) | {"projects"}:
+            assert getattr(lazy, name) == getattr(eager, name), name
+
+    def test_lazy_models_have_no_dict(self):
+        assert not hasattr(LazyMember(member_stub), "__dict__")
+        assert not hasattr(LazyCompleteMember(member_stub, nation_stub), "__dict__")
+
+    def test_fields_are_decoded_once_and_cached(self):
+        data = dict(nation_stub)
+        nation = LazyNation(data)
+        assert nation.score == 2327.0
+        data["score"] = "1.00"
+        assert nation.score == 2327.0
+
+    def test_fields_can_be_assigned(self):
+        nation = LazyNation(nation_stub)
+        nation.score = 10.0
+        assert nation.score == 10.0
+        assert nation.war_range()["offensive"]["max"] == 17.5
+
+    def test_methods_use_lazy_fields(self):
+        nation = LazyNation(nation_stub)
+        assert nation.militarization() == Nation(nation_stub).militarization()
+
+    def test_missing_fields_raise_on_read(self):
+        nation = LazyNation({"nationid": "1"})
+        assert nation.nation_id == 1
+        with pytest.raises(KeyError):
+            nation.score
+
+    def test_get_nation_lazy(self):
+        with requests_mock.Mocker() as m:
+            m.get(f"{api.pw_api}/nation/id=31191&key=key", text=json.dumps(nation_stub))
+            nation = api.get_nation(31191, "key", lazy=True)
+        assert isinstance(nation, LazyNation)
+        assert nation.leader_name == "Mikey"
@@ -0,0 +1,89 @@
+import json
+import pytest
+import requests_mock
+from pwapi import api
+from pwapi.cache import ResponseCache
+from pwapi.client import APIClient
+from pwapi.exceptions import KeyLimited
+from pwapi.metrics import *
+from pwapi.requests import call_api
+from tests.stubs import nation_stub
+
+nation_url = "http://politicsandwar.com/api/nation/id=31191&key="
+
+
+@pytest.fixture
+def records():
+    return []
+
+
+@pytest.fixture
+def client(records):
+    return APIClient(hooks=[records.append])
+
+
+class TestCallRecords:
+    def test_successful_call(self, client, records):
+        body = json.dumps(nation_stub)
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=body)
+            call_api(nation_url + "abc", client)
+        (record,) = records
+        assert (record.url, record.endpoint, record.key) == ("http://politicsandwar.com/api/nation/id=31191",
+                                                             "nation", mask_key("abc"))
+        assert "abc" not in (record.key, record.url)
+        assert record.size == len(body)
+        assert record.status == 200 and record.error is None
+        assert not record.repaired and not record.cached
+        assert record.duration >= record.latency + record.decode_time > 0
+
+    def test_repair_and_error_are_recorded(self, client, records):
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text='{"general_message": "Exceeded max request limit of 2000 for today."}junk')
+            with pytest.raises(KeyLimited):
+                call_api(nation_url + "abc", client)
+        assert records[0].repaired
+        assert records[0].error == "KeyLimited"
+
+    def test_cached_call(self, records):
+        client = APIClient(cache=ResponseCache(), hooks=[records.append])
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=json.dumps(nation_stub))
+            call_api(nation_url + "abc", client)
+            call_api(nation_url + "abc", client)
+        assert [record.cached for record in records] == [False, True]
+
+    def test_model_builds(self, client, records):
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=json.dumps(nation_stub))
+            api.get_nation(31191, "abc", client)
+            api.get_nation(31191, "abc", client, lazy=True)
+        assert [record.model for record in records if isinstance(record, BuildRecord)] == ["Nation", "LazyNation"]
+
+    def test_no_hooks_no_records(self):
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=json.dumps(nation_stub))
+            assert api.get_nation(31191, "abc", APIClient()).nation_id == 31191
+
+
+class TestMetrics:
+    def test_report(self):
+        metrics = Metrics()
+        client = APIClient(hooks=[metrics])
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=json.dumps(nation_stub))
+            for key in ("a", "a", "b"):
+                api.get_nation(31191, key, client)
+            m.get(requests_mock.ANY, status_code=404)
+            with pytest.raises(Exception):
+                call_api(nation_url + "a", client)
+        report = metrics.report()
+        nation = report["endpoints"]["nation"]
+        assert nation["calls"] == 4
+        assert nation["errors"] == {"HTTPError": 1}
+        assert nation["latency"]["count"] == 4
+        assert nation["latency"]["p50"] <= nation["latency"]["p99"] <= nation["latency"]["max"]
+        assert report["builds"]["Nation"]["count"] == 3
+        assert metrics.quota_used() == {mask_key("a"): 3, mask_key("b"): 1}
+        metrics.reset()
+        assert metrics.report() == {"endpoints": {}, "builds": {}, "keys": {}}
@@ -25,3 +25,37 @@ class TestNationsStub:
         assert nation.nation == "Nightsilver Woods"
         assert nation.infrastructure == 17767.35
         assert nation.vm
+
+
+class TestMember:
+    def test_init_with_member_data(self):
+        member = Member(members_stub['nations'][0])
+        assert member.money == 169067412.65
+        assert member.stockpile.steel == 2012.97
+        assert not hasattr(member, "__dict__")
+
+    def test_resources_can_be_assigned(self):
+        member = Member(members_stub['nations'][0])
+        member.money = 1.0
+        assert member.stockpile.money == 1.0
+
+    def test_complete_member_combines_data(self):
+        member = CompleteMember(members_stub['nations'][0], nation_stub)
+        assert member.nation_id == 31191
+        assert member.aluminum == 55156.81
+        assert isinstance(member, Nation)
+        assert not hasattr(member, "__dict__")
+
+
+class TestProjects:
+    def test_projects_are_flags(self):
+        nation = Nation(nation_stub)
+        assert nation.has_project(Project.IW)
+        assert not nation.has_project(Project.AS)
+        assert nation.project_flags & Project.MLP
+
+    def test_projects_dict(self):
+        projects = Member(members_stub['nations'][1]).projects
+        assert len(projects) == 14
+        assert projects["iw"] and projects["nrf"]
+        assert not projects["mlp"] and not projects["bw"]
@@ -0,0 +1,80 @@
+import json
+import pickle
+import pytest
+import requests_mock
+from pwapi import api
+from pwapi.api import pw_api
+from pwapi.client import APIClient
+from pwapi.exceptions import InvalidRequest
+from pwapi.scheduler import KeyPool
+from pwapi.models import Member, Nation
+from pwapi.pipeline import *
+from tests.stubs import members_stub, nation_stub
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    with Pipeline(io_workers=4, processes=2) as pipeline:
+        yield pipeline
+
+
+def _members_url(alliance_id):
+    return f"{pw_api}/alliance-members/?allianceid={alliance_id}&key=key"
+
+
+class TestPackedModels:
+    def test_round_trip(self):
+        members = [Member(row) for row in members_stub["nations"]]
+        packed = pickle.loads(pickle.dumps(PackedModels.pack(members, Member)))
+        assert len(packed) == 2
+        assert packed.column("nation_id") == [582, 4834]
+        for original, unpacked in zip(members, packed):
+            assert type(unpacked) is Member
+            assert unpacked.score == original.score and unpacked.steel == original.steel
+            assert unpacked.project_flags == original.project_flags
+
+    def test_parse_repairs_and_validates(self):
+        body = (json.dumps(members_stub).replace(', "', ',, "', 1) + "garbage").encode()
+        assert parse(body, Member, True).column("nation_id") == [582, 4834]
+        with pytest.raises(InvalidRequest):
+            parse(b'{"general_message": "Alliance doesn\'t exist."}', Member, True)
+
+
+class TestFetchBytes:
+    def test_large_error_body_rotates_key(self, monkeypatch):
+        monkeypatch.setattr(api, "key_pool", KeyPool(["limited", "good"]))
+        records = []
+        client = APIClient(hooks=[records.append])
+        limited = json.dumps({"general_message": "Exceeded max request limit of 2000 for today.",
+                              "padding": "x" * 4096})
+        with requests_mock.Mocker() as m:
+            m.get(_members_url(1).replace("key=key", "key=limited"), text=limited)
+            m.get(_members_url(1).replace("key=key", "key=good"), text=json.dumps(members_stub))
+            body = fetch_bytes("alliance-members/?allianceid=1", client=client)
+        assert json.loads(body) == members_stub
+        assert [record.error for record in records] == ["KeyLimited", None]
+
+
+class TestPipeline:
+    def test_alliances_in_order_with_errors(self, pipeline):
+        with requests_mock.Mocker() as m:
+            m.get(_members_url(1), text=json.dumps(members_stub))
+            m.get(_members_url(2), text='{"general_message": "Alliance doesn\'t exist."}')
+            m.get(_members_url(3), text=json.dumps({"nations": members_stub["nations"][:1]}))
+            m.get(_members_url(4), status_code=500)
+            results = list(pipeline.alliances([1, 2, 3, 4], "key"))
+        assert [alliance_id for alliance_id, _ in results] == [1, 2, 3, 4]
+        assert [member.nation_id for member in results[0][1]] == [582, 4834]
+        assert isinstance(results[1][1], InvalidRequest)
+        assert len(results[2][1]) == 1
+        assert isinstance(results[3][1], Exception)
+
+    def test_nations(self, pipeline):
+        with requests_mock.Mocker() as m:
+            for nation_id in (10, 11):
+                m.get(f"{pw_api}/nation/id={nation_id}&key=key",
+                      text=json.dumps(dict(nation_stub, nationid=str(nation_id))))
+            results = dict(pipeline.nations([11, 10], "key"))
+        assert isinstance(results[10], Nation)
+        assert results[11].nation_id == 11
+        assert results[11].city_ids == [int(city_id) for city_id in nation_stub["cityids"]]
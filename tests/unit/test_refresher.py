@@ -0,0 +1,94 @@
+import threading
+import time
+import pytest
+from pwapi.exceptions import InvalidRequest
+from pwapi.models import NationStub
+from pwapi.refresher import *
+from pwapi.scheduler import KeyPool
+from tests.stubs import nations_stub
+
+
+def _nation(nation_id, minutes_inactive=10, wars=0, vacmode=0):
+    return NationStub(dict(nations_stub["nations"][0], nationid=nation_id, minutessinceactive=minutes_inactive,
+                           offensivewars=wars, defensivewars=0, vacmode=vacmode))
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+class TestRefreshInterval:
+    def test_busier_nations_refresh_sooner(self):
+        war, active, idle, dormant = (refresh_interval(_nation(1, wars=1)), refresh_interval(_nation(1)),
+                                      refresh_interval(_nation(1, 2000)), refresh_interval(_nation(1, vacmode=5)))
+        assert war < active < idle < dormant
+
+
+class TestNationStore:
+    def test_put_get(self):
+        store = NationStore()
+        assert store.get(1) is None and store.age(1) is None
+        store.put(_nation(1), refreshed=time.time() - 30)
+        assert store.get(1).nation_id == 1 and 1 in store
+        assert 29 < store.age(1) < 60
+        store.remove(1)
+        assert len(store) == 0
+
+
+class TestRefresher:
+    def test_loads_and_refreshes_by_policy(self):
+        calls = []
+        lock = threading.Lock()
+
+        def fetch(nation_id, key, client):
+            with lock:
+                calls.append(nation_id)
+            return _nation(nation_id, wars=1 if nation_id == 1 else 0)
+
+        policy = lambda nation: 0.02 if nation.offensive_war_count else 10
+        with Refresher(KeyPool(["k"]), daily_budget=10 ** 8, fetch=fetch, policy=policy) as refresher:
+            refresher.track([1, 2])
+            _wait_for(lambda: calls.count(1) >= 5)
+            assert refresher.get(2).nation_id == 2
+        assert calls.count(2) == 1
+
+    def test_failures_keep_data_and_missing_nations_are_dropped(self):
+        def fetch(nation_id, key, client):
+            if nation_id == 1:
+                raise InvalidRequest("Nation does not exist.")
+            raise ConnectionError("down")
+
+        refresher = Refresher(KeyPool(["k"]), daily_budget=10 ** 8, fetch=fetch, policy=lambda nation: 10)
+        refresher.load([_nation(1), _nation(2)])
+        with refresher:
+            refresher.refresh_now(1)
+            refresher.refresh_now(2)
+            _wait_for(lambda: len(refresher.failures()) == 2)
+            _wait_for(lambda: 1 not in refresher.store)
+        assert isinstance(refresher.failures()[2], ConnectionError)
+        assert refresher.get(2).nation_id == 2
+
+    def test_urgent_nations_first_when_over_budget(self):
+        order = []
+        release = threading.Event()
+
+        def fetch(nation_id, key, client):
+            release.wait()
+            order.append(nation_id)
+            return _nation(nation_id)
+
+        nations = [_nation(nation_id, wars=nation_id % 2) for nation_id in range(1, 7)]
+        refresher = Refresher(KeyPool(["k"]), daily_budget=10 ** 8, workers=1, fetch=fetch,
+                              policy=lambda nation: 5 if nation.offensive_war_count else 50)
+        refresher.load(nations)
+        with refresher:
+            for nation in nations:
+                refresher.refresh_now(nation.nation_id)
+            _wait_for(lambda: refresher.scheduler.pending() >= 5)
+            release.set()
+            _wait_for(lambda: len(order) == 6)
+        # nation 1 is queued first, and the other nations at war are queued ahead of the rest
+        assert set(order[:3]) == {1, 3, 5}
@@ -1,4 +1,5 @@
 import pytest
+from pwapi.decoders import available, get_decoder
 from pwapi.requests import *
 
 
@@ -27,6 +28,75 @@ class TestFixJSON:
                                   "quotes: line 1 column 2 (char 1)"
 
 
+class TestRepairJSON:
+    def test_valid_json_is_decoded(self):
+        assert repair_json(' {"key": [1, 2]}\n') == {"key": [1, 2]}
+
+    def test_cuts_extra_data(self):
+        assert repair_json('{ "key": "val"}<bad data>') == {"key": "val"}
+
+    def test_fixes_double_comma(self):
+        assert repair_json('{"key1": "val",, "key2": {"key3": 1 , ,"key4": 2}}>ERROR') == \
+               {"key1": "val", "key2": {"key3": 1, "key4": 2}}
+
+    def test_fixes_repeated_commas(self):
+        assert repair_json('{"key1": [{"key2": 1,, ,"key3": 2}],,, "key4": "}"}]') == \
+               {"key1": [{"key2": 1, "key3": 2}], "key4": "}"}
+
+    def test_double_commas_in_strings_are_kept(self):
+        assert repair_json('{"key1": "a,, \\",, b",, "key2": ",,"}') == {"key1": 'a,, ",, b', "key2": ",,"}
+
+    def test_double_commas_in_arrays_are_not_fixed(self):
+        with pytest.raises(RuntimeError):
+            repair_json('{"key1": "val",, "key2": [1,, 2]}')
+
+    def test_double_commas_in_string_arrays_are_not_fixed(self):
+        with pytest.raises(RuntimeError):
+            repair_json('{"key1": ["a",, "b"]}')
+
+    @pytest.mark.parametrize("text", ['{', '{"key1": 1,', '{"key1": "\u00e9",'])
+    def test_truncated_body_throws_exception(self, text):
+        with pytest.raises(RuntimeError):
+            repair_json(text)
+
+    def test_unknown_error_throws_exception(self):
+        with pytest.raises(RuntimeError) as e:
+            repair_json('<h1>Header</h1><p>This is HTML, not JSON!</p>')
+        assert e.value.args[0] == "Unexpected error in returned JSON: Expecting value: line 1 column 1 (char 0)"
+
+
+@pytest.mark.parametrize("backend", available())
+class TestRepairJSONBytes:
+    def test_cuts_extra_data(self, backend):
+        assert repair_json(b' { "key": "val"}\n<bad data>', get_decoder(backend).loads) == {"key": "val"}
+
+    def test_fixes_double_comma_and_extra_data(self, backend):
+        assert repair_json(b'{"key1": "a,, b",, "key2": {"key3": 1 , ,"key4": 2}}>ERROR', get_decoder(backend).loads) \
+               == {"key1": "a,, b", "key2": {"key3": 1, "key4": 2}}
+
+    def test_non_ascii(self, backend):
+        assert repair_json('{"key1": "\u00e9",, "key2": 2}<br>'.encode(), get_decoder(backend).loads) == \
+               {"key1": "\u00e9", "key2": 2}
+
+    def test_unfixable(self, backend):
+        with pytest.raises(RuntimeError):
+            repair_json(b'{"key1": "val",, "key2": [1,, 2]}', get_decoder(backend).loads)
+        with pytest.raises(RuntimeError):
+            repair_json(b'<h1>Header</h1>', get_decoder(backend).loads)
+        with pytest.raises(RuntimeError):
+            repair_json('{"key1": "\u00e9",'.encode(), get_decoder(backend).loads)
+
+
+class TestDecoders:
+    def test_default_is_fastest_installed(self):
+        assert get_decoder().name == available()[0]
+        assert available()[-1] == "json"
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_decoder("simdjson")
+
+
 class TestValidateAPIData:
     def test_invalid_key_throws_exception(self):
         with pytest.raises(InvalidKey):
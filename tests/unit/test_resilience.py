@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+import pytest
+import requests
+import requests_mock
+from pwapi.client import APIClient
+from pwapi.exceptions import *
+from pwapi.metrics import Metrics, mask_key
+from pwapi.requests import call_api
+from pwapi.resilience import CircuitBreaker, Resilience, retriable
+from pwapi.scheduler import KeyPool
+from tests.stubs import nation_stub
+
+nation_url = "http://politicsandwar.com/api/nation/id=31191&key="
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def _failing(*errors, result="ok"):
+    """Function raising each error in turn, then returning result"""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(True)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return fn, calls
+
+
+class TestRetriable:
+    @pytest.mark.parametrize("error", [requests.ConnectionError(), requests.Timeout(), _http_error(503),
+                                       _http_error(429), MalformedJSON("Unexpected error in returned JSON")])
+    def test_retriable(self, error):
+        assert retriable(error)
+
+    @pytest.mark.parametrize("error", [InvalidKey(), KeyLimited(), InvalidPermissions(), InvalidRequest(),
+                                       _http_error(404), DeadlineExceeded(), CircuitOpen(), KeyError(),
+                                       RuntimeError("Scheduler has been shut down")])
+    def test_not_retriable(self, error):
+        assert not retriable(error)
+
+
+class TestCircuitBreaker:
+    def test_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.failure()
+        breaker.before()
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.open
+        with pytest.raises(CircuitOpen):
+            breaker.before()
+        time.sleep(0.06)
+        breaker.before()
+        assert breaker.state == CircuitBreaker.half_open
+        with pytest.raises(CircuitOpen):
+            breaker.before()
+        breaker.failure()
+        assert breaker.state == CircuitBreaker.open
+        time.sleep(0.06)
+        breaker.before()
+        breaker.success()
+        assert breaker.state == CircuitBreaker.closed and breaker.failures == 0
+
+
+class TestResilience:
+    def test_retries_with_backoff(self):
+        fn, calls = _failing(requests.ConnectionError(), _http_error(502))
+        with Resilience(backoff=0.01) as resilience:
+            assert resilience.call(fn) == "ok"
+        assert len(calls) == 3 and resilience.retries == 2
+
+    @pytest.mark.parametrize("error", [InvalidKey(), KeyLimited(), InvalidRequest(), _http_error(404)])
+    def test_never_retries_api_errors(self, error):
+        fn, calls = _failing(error)
+        with Resilience(backoff=0.01) as resilience:
+            with pytest.raises(type(error)):
+                resilience.call(fn)
+        assert len(calls) == 1 and resilience.breaker.failures == 0
+
+    def test_gives_up_after_retries(self):
+        fn, calls = _failing(*[requests.Timeout()] * 5)
+        with Resilience(retries=2, backoff=0.01) as resilience:
+            with pytest.raises(requests.Timeout):
+                resilience.call(fn)
+        assert len(calls) == 3
+
+    def test_deadline(self):
+        release = threading.Event()
+        with Resilience(deadline=0.05) as resilience:
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceeded):
+                resilience.call(lambda: release.wait(5))
+            assert time.monotonic() - start < 1
+            release.set()
+
+    def test_hedges_slow_requests(self):
+        calls = []
+
+        def fn():
+            calls.append(True)
+            if len(calls) == 22:
+                time.sleep(1)
+                return "slow"
+            return "fast"
+
+        with Resilience(hedge_budget=1, min_samples=20) as resilience:
+            for _ in range(21):
+                resilience.call(fn)
+            assert resilience.hedge_delay() is not None
+            start = time.monotonic()
+            assert resilience.call(fn) == "fast"
+            assert time.monotonic() - start < 0.5
+        assert resilience.hedges == 1
+
+    def test_time_queued_does_not_count_towards_hedging(self):
+        with Resilience(hedge_budget=1, min_samples=5, workers=1) as resilience:
+            for _ in range(5):
+                resilience.call(lambda: time.sleep(0.05))
+            release = threading.Event()
+            resilience._executor.submit(release.wait, 5)
+            # queued behind the busy worker for longer than the hedge delay, then answered at once
+            threading.Timer(0.3, release.set).start()
+            assert resilience.call(lambda: "fast") == "fast"
+        assert resilience.hedges == 0
+
+    def test_hedges_respect_budget_and_quota(self):
+        with Resilience(hedge_budget=0.01, min_samples=1) as resilience:
+            resilience.call(lambda: None)
+            assert not resilience._may_hedge()
+        keys = KeyPool(["key"], daily_limit=100)
+        with Resilience(hedge_budget=1, keys=keys, reserve=100) as resilience:
+            resilience.call(lambda: None)
+            assert not resilience._may_hedge()
+
+    def test_circuit_breaker_fails_fast(self):
+        fn, calls = _failing(*[requests.ConnectionError()] * 5)
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        with Resilience(retries=5, backoff=0.001, breaker=breaker) as resilience:
+            with pytest.raises(CircuitOpen):
+                resilience.call(fn)
+            with pytest.raises(CircuitOpen):
+                resilience.call(fn)
+        assert len(calls) == 2
+
+    def test_closed_policy_does_not_hold_a_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.failure()
+        resilience = Resilience(breaker=breaker)
+        resilience._executor.shutdown()
+        # closed between the breaker letting a trial through and the request being submitted
+        breaker.before()
+        assert breaker._trial
+        with pytest.raises(RuntimeError):
+            resilience._attempt(lambda: None, time.monotonic() + 1)
+        assert not breaker._trial
+        resilience.close()
+        with pytest.raises(RuntimeError):
+            resilience.call(lambda: None)
+
+
+class TestCallAPIResilience:
+    def test_retries_html_error_pages(self):
+        metrics = Metrics()
+        with Resilience(backoff=0.001) as resilience:
+            client = APIClient(retries=0, resilience=resilience, hooks=[metrics])
+            with requests_mock.Mocker() as m:
+                m.get(nation_url, [{"text": "<html>Bad Gateway</html>"}, {"text": json.dumps(nation_stub)}])
+                assert call_api(nation_url, client) == nation_stub
+                assert m.call_count == 2
+        assert metrics.quota_used() == {mask_key(""): 2}
+
+    def test_api_errors_are_raised_once(self):
+        with Resilience(backoff=0.001) as resilience:
+            client = APIClient(retries=0, resilience=resilience)
+            with requests_mock.Mocker() as m:
+                m.get(nation_url, text=json.dumps({"general_message": "Nation doesn't exist."}))
+                with pytest.raises(InvalidRequest):
+                    call_api(nation_url, client)
+                assert m.call_count == 1
+
+    def test_record_describes_the_successful_attempt(self):
+        metrics = Metrics()
+        records = []
+        with Resilience(backoff=0.001) as resilience:
+            client = APIClient(retries=0, resilience=resilience, hooks=[metrics, records.append])
+            with requests_mock.Mocker() as m:
+                m.get(nation_url, [{"text": "<html>Unavailable</html>", "status_code": 503},
+                                   {"text": json.dumps(nation_stub)}])
+                call_api(nation_url, client)
+        record, = records
+        assert record.status == 200 and record.size == len(json.dumps(nation_stub)) and record.retries == 1
+        assert record.decode_time > 0 and record.error is None
+
+    def test_failed_call_records_last_attempt(self):
+        records = []
+        with Resilience(retries=1, backoff=0.001) as resilience:
+            client = APIClient(retries=0, resilience=resilience, hooks=[records.append])
+            with requests_mock.Mocker() as m:
+                m.get(nation_url, text="<html>Unavailable</html>", status_code=503)
+                with pytest.raises(requests.HTTPError):
+                    call_api(nation_url, client)
+        assert records[0].status == 503 and records[0].retries == 1 and records[0].error == "HTTPError"
@@ -0,0 +1,86 @@
+import json
+import threading
+import pytest
+import requests_mock
+from pwapi import api
+from pwapi.exceptions import *
+from pwapi.scheduler import *
+from tests.stubs import nation_stub
+
+limited = '{"general_message": "Exceeded max request limit of 2000 for today."}'
+
+
+class TestKeyPool:
+    def test_rotates_to_key_with_most_calls_left(self):
+        pool = KeyPool(["a", "b"], daily_limit=3)
+        assert [pool.acquire() for _ in range(4)] == ["a", "b", "a", "b"]
+        assert pool.remaining() == 2
+
+    def test_exhausted_pool_raises_key_limited(self):
+        pool = KeyPool(["a"], daily_limit=1)
+        pool.acquire()
+        with pytest.raises(KeyLimited):
+            pool.acquire()
+
+    def test_empty_pool_raises_invalid_key(self):
+        with pytest.raises(InvalidKey):
+            KeyPool().acquire()
+
+    def test_limited_key_is_retired_and_call_repeated(self):
+        pool = KeyPool(["a", "b"])
+        calls = []
+
+        def call(key):
+            calls.append(key)
+            if key == "a":
+                raise KeyLimited()
+            return key
+
+        assert pool.call(call) == "b"
+        assert calls == ["a", "b"]
+        assert pool.call(call) == "b"
+
+
+class TestTokenBucket:
+    def test_burst_is_capped(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+
+class TestScheduler:
+    def test_runs_by_priority(self):
+        gate = threading.Event()
+        order = []
+
+        def call(name, key):
+            gate.wait()
+            order.append(name)
+
+        scheduler = Scheduler(KeyPool(["a"]), rate=1000, workers=1)
+        blocker = scheduler.submit(call, "first")
+        futures = [scheduler.submit(call, "low", priority=5), scheduler.submit(call, "high", priority=1)]
+        gate.set()
+        for future in [blocker] + futures:
+            future.result(timeout=5)
+        scheduler.shutdown()
+        assert order == ["first", "high", "low"]
+
+    def test_get_nation_switches_key_on_limit(self):
+        scheduler = Scheduler(KeyPool(["a", "b"]), rate=1000)
+        with requests_mock.Mocker() as m:
+            m.get(f"{api.pw_api}/nation/id=31191&key=a", text=limited)
+            m.get(f"{api.pw_api}/nation/id=31191&key=b", text=json.dumps(nation_stub))
+            nation = scheduler.submit(api.get_nation, 31191).result(timeout=5)
+        scheduler.shutdown()
+        assert nation.nation_id == 31191
+        assert scheduler.keys.usage() == {"a": 1, "b": 1}
+
+
+class TestAPIKeyPool:
+    def test_calls_without_key_use_pool(self, monkeypatch):
+        monkeypatch.setattr(api, "key_pool", KeyPool(["pooled"]))
+        with requests_mock.Mocker() as m:
+            m.get(f"{api.pw_api}/nation/id=31191&key=pooled", text=json.dumps(nation_stub))
+            assert api.get_nation(31191).nation_id == 31191
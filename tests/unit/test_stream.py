@@ -0,0 +1,64 @@
+import json
+import pytest
+import requests_mock
+from pwapi.exceptions import *
+from pwapi.models import Member, NationStub
+from pwapi.stream import iter_nations, stream_nations
+from tests.stubs import nations_stub, members_stub
+
+
+def _chunks(text, size=7):
+    body = text.encode()
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestIterNations:
+    def test_yields_models_across_chunk_boundaries(self):
+        nations = list(iter_nations(_chunks(json.dumps(nations_stub))))
+        assert all(isinstance(nation, NationStub) for nation in nations)
+        assert [nation.nation_id for nation in nations] == [33841, 2685]
+
+    def test_yields_members(self):
+        members = list(iter_nations(_chunks(json.dumps(members_stub)), Member))
+        assert [member.money for member in members] == [169067412.65, 0.0]
+
+    def test_raw_rows(self):
+        assert list(iter_nations(_chunks(json.dumps(nations_stub)), None)) == nations_stub["nations"]
+
+    def test_tolerates_double_commas_and_trailing_garbage(self):
+        text = '{"success": true,, "nations": [' + json.dumps(nations_stub["nations"][0]) + ',,' + \
+               json.dumps(nations_stub["nations"][1]) + ']}<b>SERVERERROR</b>'
+        assert len(list(iter_nations(_chunks(text), None))) == 2
+
+    @pytest.mark.parametrize("size", [1, 7, 4096])
+    def test_tolerates_double_commas_inside_nations(self, size):
+        text = json.dumps(nations_stub).replace(', "', ',, "').replace('[{', '[ {')
+        assert list(iter_nations(_chunks(text, size), None)) == nations_stub["nations"]
+
+    def test_double_commas_in_nation_arrays_raise(self):
+        text = json.dumps({"nations": [dict(nations_stub["nations"][0], cityids=[1, 2])]}).replace("1, 2", "1,, 2")
+        with pytest.raises(RuntimeError):
+            list(iter_nations(_chunks(text), None))
+
+    def test_error_messages_after_nations_raise(self):
+        text = json.dumps(dict(nations_stub, general_message="Invalid API key."))
+        with pytest.raises(InvalidKey):
+            list(iter_nations(_chunks(text)))
+
+    def test_error_messages_raise(self):
+        with pytest.raises(KeyLimited):
+            next(iter_nations(_chunks('{"general_message": "Exceeded max request limit of 5000 for today."}')))
+        with pytest.raises(InvalidRequest):
+            next(iter_nations(_chunks('{"success": false, "error": "Alliance doesn\'t exist."}')))
+
+    def test_truncated_body_raises(self):
+        with pytest.raises(RuntimeError):
+            list(iter_nations(_chunks(json.dumps(nations_stub)[:-40])))
+
+
+class TestStreamNations:
+    def test_streams_response(self):
+        with requests_mock.Mocker() as m:
+            m.get("http://politicsandwar.com/api/nations/?key=key", text=json.dumps(nations_stub))
+            nations = stream_nations("http://politicsandwar.com/api/nations/?key=key", chunk_size=16)
+            assert [nation.nation_name for nation in nations] == ["The Great British Empire", "carvell"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from pwapi.models import NationStub
+from pwapi.table import NationTable
+from tests.stubs import nations_stub, members_stub
+
+
+class TestNationTable:
+    def test_columns_from_nations_data(self):
+        table = NationTable.from_payload(nations_stub)
+        assert len(table) == 2
+        assert table["nation_id"].tolist() == [33841, 2685]
+        assert table["score"].dtype == np.float64
+        assert not table["vacation_mode"].any()
+
+    def test_columns_from_member_data(self):
+        table = NationTable.from_payload(members_stub)
+        assert table["score"].tolist() == [1674.18, 1248.13]
+        assert table["infrastructure"].tolist() == [17767.35, 1525.23]
+        assert table["vacation_mode"].tolist() == [True, False]
+
+    def test_mask_selects_rows(self):
+        table = NationTable.from_payload(members_stub)
+        active = table[~table["vacation_mode"]]
+        assert active["nation_id"].tolist() == [4834]
+        assert active.row(0).nation_name == "Nero"
+
+    def test_rows_are_nation_stubs(self):
+        table = NationTable.from_payload(nations_stub).sort("score")
+        stubs = list(table)
+        assert all(isinstance(stub, NationStub) for stub in stubs)
+        assert [stub.nation_id for stub in stubs] == [2685, 33841]
+
+    def test_where_and_sort(self):
+        table = NationTable.from_payload(members_stub)
+        assert len(table.where(color="orange", alliance_id=615)) == 1
+        assert table.sort("score", descending=True)["nation_id"].tolist() == [582, 4834]
+
+    def test_sort_descending_keeps_ties_in_order(self):
+        table = NationTable.from_payload(members_stub)
+        assert table.sort("alliance_id", descending=True)["nation_id"].tolist() == [582, 4834]
+        assert table.sort("vacation_mode", descending=True)["nation_id"].tolist() == [582, 4834]
+        assert table.sort("vacation_mode")["nation_id"].tolist() == [4834, 582]
+
+    def test_group_by_and_aggregate(self):
+        table = NationTable.from_payload(members_stub)
+        groups = table.group_by("color")
+        assert sorted(groups) == ["gray", "orange"]
+        assert groups["gray"]["nation_id"].tolist() == [582]
+        assert table.aggregate("alliance_id", "score", "sum") == {615: pytest.approx(1674.18 + 1248.13)}
+        assert table.aggregate("alliance_id", "city_count", "max") == {615: 22}
+        assert table.aggregate("color", "score", "count") == {"gray": 1, "orange": 1}
+
+    def test_war_range(self):
+        table = NationTable.from_payload(nations_stub)
+        assert table.war_range().offensive_max.tolist() == [3733.75 * 1.75, 3639.5 * 1.75]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from pwapi.models import NationStub
+from pwapi.targets import TargetIndex
+from tests.stubs import nations_stub
+
+
+def _nation(nation_id, score, alliance_id=615, color="orange", vacmode=0, offensive=0, defensive=0):
+    row = dict(nations_stub["nations"][0], nationid=nation_id, score=score, allianceid=alliance_id, color=color,
+               vacmode=vacmode, offensivewars=offensive, defensivewars=defensive)
+    return NationStub(row)
+
+
+@pytest.fixture
+def index():
+    return TargetIndex([_nation(1, 500), _nation(2, 750), _nation(3, 1000, alliance_id=1, color="red"),
+                        _nation(4, 1750, vacmode=12), _nation(5, 1751, defensive=3), _nation(6, 2000)])
+
+
+def _ids(nations):
+    return [nation.nation_id for nation in nations]
+
+
+class TestTargetIndex:
+    def test_offensive_range_is_inclusive(self, index):
+        assert _ids(index.offensive(1000)) == [2, 3, 4]
+
+    def test_defensive_range(self, index):
+        # nations scoring between 1000 / 1.75 and 1000 / .75 can declare on a 1000 score nation
+        assert _ids(index.defensive(1000)) == [2, 3]
+
+    def test_filters(self, index):
+        assert _ids(index.offensive(1000, alliance_id=615)) == [2, 4]
+        assert _ids(index.offensive(1000, alliance_id={1, 615}, color="red")) == [3]
+        assert _ids(index.offensive(1000, vacation_mode=False)) == [2, 3]
+        assert _ids(index.offensive(1001, open_slots=True)) == [3, 4]
+        assert index.offensive(1000, ids=True).tolist() == [2, 3, 4]
+
+    def test_update_score_moves_nation(self, index):
+        index.update_score(1, 1500)
+        index.update_score(6, 100)
+        assert _ids(index.in_range(0, 10000)) == [6, 2, 3, 1, 4, 5]
+        assert index.get(1).score == 1500
+        assert _ids(index.offensive(1000)) == [2, 3, 1, 4]
+
+    def test_add_and_remove(self, index):
+        index.add(_nation(7, 900))
+        index.add(_nation(2, 1200))
+        index.remove(3)
+        assert _ids(index.offensive(1000)) == [7, 2, 4]
+        assert len(index) == 6
+        assert 3 not in index
+
+    def test_numpy_alliance_id(self, index):
+        assert _ids(index.offensive(1000, alliance_id=np.int64(1))) == [3]
+
+    def test_remove_after_score_changed_elsewhere(self, index):
+        index.get(5).score = 3000
+        index.remove(5)
+        assert 5 not in index and _ids(index.in_range(0, 10000)) == [1, 2, 3, 4, 6]
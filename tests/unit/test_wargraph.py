@@ -0,0 +1,58 @@
+from pwapi.models import Nation, War
+from pwapi.wargraph import WarGraph
+from tests.stubs import nation_stub, war_stub
+
+
+def _war(war_id, attacker, defender, attacker_alliance="A", defender_alliance="B", ended=False):
+    data = dict(war_stub["war"][0], aggressor_id=str(attacker), defender_id=str(defender),
+                aggressor_alliance=attacker_alliance, defender_alliance=defender_alliance, war_ended=ended)
+    return War(data, war_id)
+
+
+def _graph():
+    return WarGraph([_war(1, 10, 20), _war(2, 11, 20), _war(3, 20, 12, "B", "A"), _war(4, 30, 40, "C", "B"),
+                     _war(5, 50, 60, "None", "D"), _war(6, 70, 80, "E", "F", ended=True)])
+
+
+class TestWarGraph:
+    def test_neighbors(self):
+        graph = _graph()
+        assert len(graph) == 5 and 6 not in graph
+        assert graph.opponents(20) == {10, 11, 12}
+        assert sorted(war.war_id for war in graph.wars_of(20)) == [1, 2, 3]
+        assert graph.opponents(99) == set()
+
+    def test_alliances(self):
+        graph = _graph()
+        assert graph.alliance_opponents("B") == {"A": 3, "C": 1}
+        assert sorted(war.war_id for war in graph.wars_between("A", "B")) == [1, 2, 3]
+        assert graph.wars_between("A", "C") == []
+        assert graph.alliance_opponents("D") == {}
+        assert graph.fronts() == [("A", "B", 3), ("B", "C", 1)]
+
+    def test_components_and_coalitions(self):
+        graph = _graph()
+        assert graph.component(10) == {10, 11, 12, 20}
+        assert graph.components() == [{10, 11, 12, 20}, {30, 40}, {50, 60}]
+        assert graph.coalition("A") == ({"A", "C"}, {"B"})
+
+    def test_updates(self):
+        graph = _graph()
+        graph.end_war(3)
+        assert graph.opponents(20) == {10, 11}
+        assert graph.alliance_opponents("A") == {"B": 2}
+        graph.add_war(_war(1, 10, 20, ended=True))
+        graph.end_war(2)
+        assert graph.opponents(20) == set() and graph.alliance_opponents("A") == {}
+        assert graph.components() == [{30, 40}, {50, 60}]
+        graph.add_war(_war(7, 12, 40, "A", "C"))
+        assert graph.coalition("A") == ({"A", "B"}, {"C"})
+
+    def test_from_nations(self):
+        war = _war(1, 31191, 20)
+        attacker = Nation(nation_stub)
+        defender = Nation(dict(nation_stub, nationid="20"))
+        attacker.wars = {"offensive": [war], "defensive": []}
+        defender.wars = {"offensive": [], "defensive": [war]}
+        graph = WarGraph.from_nations([attacker, defender])
+        assert len(graph) == 1 and graph.opponents(31191) == {20}
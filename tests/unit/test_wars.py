@@ -0,0 +1,37 @@
+import json
+import requests_mock
+from pwapi.api import *
+from tests.stubs import nation_stub, war_stub
+
+
+def _nation(nation_id, offensive, defensive):
+    data = dict(nation_stub, nationid=str(nation_id), offensivewar_ids=offensive, defensivewar_ids=defensive)
+    return Nation(data)
+
+
+class TestLoadNationWars:
+    def test_get_wars_fills_nation_wars(self):
+        nation = _nation(31191, ["11", "12"], ["13"])
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=json.dumps(war_stub))
+            wars = nation.get_wars(key="key")
+        assert [war.war_id for war in wars["offensive"]] == [11, 12]
+        assert [war.war_id for war in wars["defensive"]] == [13]
+        assert nation.wars is wars
+
+    def test_shared_wars_are_fetched_once(self):
+        attacker = _nation(31191, ["11"], [])
+        defender = _nation(33841, [], ["11", "12"])
+        with requests_mock.Mocker() as m:
+            m.get(requests_mock.ANY, text=json.dumps(war_stub))
+            wars = load_nation_wars([attacker, defender], "key")
+            assert m.call_count == 2
+        assert set(wars) == {11, 12}
+        assert attacker.wars["offensive"][0] is defender.wars["defensive"][0]
+
+    def test_no_wars_makes_no_requests(self):
+        nation = _nation(31191, [], [])
+        with requests_mock.Mocker() as m:
+            nation.get_wars(key="key")
+            assert m.call_count == 0
+        assert nation.wars == {"offensive": [], "defensive": []}